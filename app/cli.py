@@ -0,0 +1,234 @@
+"""
+=============================================================================
+MODULE: cli.py
+DESCRIPTION:
+    Headless MyDrop: send and receive from a terminal or a service, without
+    the tray, camera or clipboard (no PyQt6 / OpenCV / MediaPipe imports).
+    Speaks the same UDP offer + TCP transfer protocol as the tray app, so
+    both can talk to each other.
+
+    Commands:
+    - send PATH...:  Bundles folders / several files (bundle cache), broadcasts
+                     the offer and serves it to up to --receivers receivers.
+                     The offer is repeated while waiting, for late receivers.
+    - receive:       Waits for offers and downloads them (asks first unless
+                     --auto-accept). Exits after --count downloads.
+    - daemon:        'receive --auto-accept' that runs until stopped
+                     (SIGTERM / Ctrl+C), e.g. on build boxes for bulk distribution.
+                     With --extract, received folder bundles are unpacked while
+                     they stream in (no ZIP is saved).
+
+    Encryption: 'send --encrypt' prints a pairing code (or use '--code' for a
+    fixed one); receivers pass the same '--code' (or are asked for it).
+
+USAGE:
+    python main.py send build/ notes.txt --receivers 5
+    python main.py receive --auto-accept --dir /srv/drops
+    python main.py daemon --dir /srv/drops --from buildhost --log-file mydrop.log
+    python main.py send secrets.txt --encrypt      /  python main.py receive --code K7QM-3XPA
+    (or: python -m app.cli ...)
+=============================================================================
+"""
+
+#import statements
+import argparse
+import os
+import queue
+import signal
+import socket
+import sys
+import threading
+import time
+import uuid
+
+from app.core.logging_setup import setup_logging, get_logger
+from app.network.discovery_service import DiscoveryService, BROADCAST_PORT
+from app.network.secure_channel import PairingKey, PairingError, generate_pairing_code
+from app.network.transfer_service import TransferService, TRANSFER_PORT, ACCEPT_TIMEOUT
+
+log = get_logger("cli")
+
+REPEAT_INTERVAL = 2.0  # Seconds between repeated offers while a sender waits
+SEEN_OFFERS = 256      # Offer ids remembered by a receiver (repeats are ignored)
+
+def _prepare_payload(paths):
+    """Single file: sent as is. Folders / several files: a (cached) ZIP bundle."""
+    if len(paths) == 1 and os.path.isfile(paths[0]):
+        size = os.path.getsize(paths[0])
+        return paths[0], {"file_count": 1, "content_bytes": size}
+
+    from app.core.bundle_cache import BundleCache
+    from app.core.dir_scanner import scan_paths, format_size
+    scan = scan_paths(paths)
+    print(f"Bundling {scan.file_count} files ({format_size(scan.total_bytes)})...", flush=True)
+    zip_path = BundleCache().get_bundle(paths, scan=scan)
+    return zip_path, {"file_count": scan.file_count, "content_bytes": scan.total_bytes}
+
+def cmd_send(args):
+    paths = [os.path.abspath(p) for p in args.paths]
+    missing = [p for p in paths if not os.path.exists(p)]
+    if missing:
+        print(f"Not found: {', '.join(missing)}", file=sys.stderr)
+        return 2
+
+    filepath, extra = _prepare_payload(paths)
+    if not filepath:
+        print("Could not create the bundle.", file=sys.stderr)
+        return 1
+    extra["offer_id"] = uuid.uuid4().hex
+
+    pairing = None
+    if args.encrypt or args.code:
+        pairing = PairingKey(args.code or generate_pairing_code())
+        extra["encryption"] = pairing.offer_fields()
+        print(f"Pairing code: {pairing.code}", flush=True)
+
+    discovery = DiscoveryService(args.name, port=args.discovery_port, broadcast_target=args.broadcast)
+    transfer = TransferService(port=args.port, accept_timeout=args.timeout,
+                               on_complete=lambda message: print(message, flush=True))
+    transfer.start_server(filepath, max_receivers=args.receivers, pairing=pairing)
+
+    filename = os.path.basename(filepath)
+    filesize = os.path.getsize(filepath)
+    print(f"Offering {filename} ({filesize} bytes) to up to {args.receivers} receiver(s)...", flush=True)
+
+    # Repeat the offer while the server still waits (UDP can drop, receivers can start late)
+    try:
+        while transfer.thread.is_alive():
+            discovery.broadcast_offer(filename, filesize, extra)
+            transfer.thread.join(args.repeat)
+    except KeyboardInterrupt:
+        transfer.stop_server()
+        return 130
+
+    # on_complete already printed the outcome
+    return 0 if transfer.last_result and transfer.last_result[0] else 1
+
+def _offer_key(message):
+    return message.get("offer_id") or (message.get("instance_id"), message.get("filename"), message.get("filesize"))
+
+def _offer_pairing(message, args):
+    """PairingKey for an encrypted offer, None for a plaintext one. Raises PairingError."""
+    fields = message.get("encryption")
+    if not fields:
+        return None
+    code = args.code
+    if not code:
+        if args.auto_accept:
+            raise PairingError("Encrypted offer, but no --code given")
+        code = input("Pairing code shown on the sender: ")
+    return PairingKey.from_offer(code, fields)
+
+def cmd_receive(args, forever=False):
+    offers = queue.Queue()
+    discovery = DiscoveryService(args.name, port=args.discovery_port,
+                                 on_offer=lambda message, ip: offers.put((time.monotonic(), message, ip)))
+    transfer = TransferService(download_dir=args.dir, port=args.port, auto_extract=args.extract)
+    stop = threading.Event()
+    if forever:
+        # Service managers stop us with SIGTERM
+        signal.signal(signal.SIGTERM, lambda *_: stop.set())
+
+    discovery.start_listening()
+    print(f"Waiting for offers (saving to {transfer.download_dir})...", flush=True)
+
+    seen = []
+    received = 0
+    try:
+        while not stop.is_set() and (forever or received < args.count):
+            try:
+                heard_at, message, sender_ip = offers.get(timeout=0.5)
+            except queue.Empty:
+                continue
+
+            key = _offer_key(message)
+            if key in seen:
+                continue # Repeated announce of an offer we already handled
+            seen.append(key)
+            del seen[:-SEEN_OFFERS]
+
+            sender = message.get("sender", "Unknown User")
+            filename = message.get("filename")
+            if not filename:
+                continue
+            if args.sender and sender not in args.sender and sender_ip not in args.sender:
+                log.info("Ignored offer from %s (%s)", sender, sender_ip)
+                continue
+            if time.monotonic() - heard_at > ACCEPT_TIMEOUT:
+                continue # The sender stopped waiting for us
+
+            details = f"{filename} ({message.get('filesize', '?')} bytes) from {sender} [{sender_ip}]"
+            if message.get("encryption"):
+                details += " (encrypted)"
+            if not args.auto_accept:
+                answer = input(f"Accept {details}? [y/N] ").strip().lower()
+                if answer not in ("y", "yes"):
+                    continue
+
+            try:
+                pairing = _offer_pairing(message, args)
+            except PairingError as e:
+                print(f"Skipped {details}: {e}", flush=True)
+                continue
+
+            print(f"Downloading {details}...", flush=True)
+            success, result = transfer.download(sender_ip, filename, pairing=pairing)
+            print(result, flush=True)
+            if success:
+                received += 1
+    except (KeyboardInterrupt, EOFError):
+        pass
+    finally:
+        discovery.stop()
+    return 0 if forever or received >= args.count else 1
+
+def build_parser():
+    # Shared options, accepted after the command: 'mydrop send --name x ...'
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--name", default=socket.gethostname(), help="Device name shown to receivers.")
+    common.add_argument("--port", type=int, default=TRANSFER_PORT, help="TCP transfer port.")
+    common.add_argument("--discovery-port", type=int, default=BROADCAST_PORT, help="UDP discovery port.")
+    common.add_argument("--log-levels", default=None,
+                        help="e.g. 'info' or 'info,net=debug' (default: warning, daemon: info).")
+    common.add_argument("--log-file", default=None, help="Also write the log to this (rotated) file.")
+
+    parser = argparse.ArgumentParser(prog="mydrop", description="Headless MyDrop send/receive.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    send = commands.add_parser("send", parents=[common], help="Offer files/folders to receivers.")
+    send.add_argument("paths", nargs="+")
+    send.add_argument("--receivers", type=int, default=1, help="Serve up to N receivers (default 1).")
+    send.add_argument("--timeout", type=float, default=ACCEPT_TIMEOUT, help="Seconds to wait for each receiver.")
+    send.add_argument("--repeat", type=float, default=REPEAT_INTERVAL, help="Seconds between repeated offers.")
+    send.add_argument("--broadcast", default=None, help="Broadcast address (default: the Wi-Fi x.x.x.255).")
+    send.add_argument("--encrypt", action="store_true", help="Encrypt the transfer; prints a pairing code.")
+    send.add_argument("--code", default=None, help="Encrypt with this pairing code instead of a random one.")
+
+    for name, help_text in (("receive", "Download offered files."),
+                            ("daemon", "Keep receiving (auto-accept) until stopped.")):
+        receive = commands.add_parser(name, parents=[common], help=help_text)
+        receive.add_argument("--dir", default=None, help="Download folder (default ~/Downloads/MyDrop).")
+        receive.add_argument("--from", dest="sender", action="append",
+                             help="Only accept offers from this device name or IP (repeatable).")
+        receive.add_argument("--code", default=None, help="Pairing code for encrypted offers.")
+        receive.add_argument("--extract", action="store_true",
+                             help="Unpack received folder bundles while they arrive instead of saving the ZIP.")
+        if name == "receive":
+            receive.add_argument("--auto-accept", action="store_true", help="Don't ask before downloading.")
+            receive.add_argument("--count", type=int, default=1, help="Exit after N downloads (default 1).")
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    levels = args.log_levels or ("info" if args.command == "daemon" else "warning")
+    setup_logging(args.log_file, levels=levels, capture_stdio=False)
+
+    if args.command == "send":
+        return cmd_send(args)
+    if args.command == "daemon":
+        args.auto_accept = True
+        return cmd_receive(args, forever=True)
+    return cmd_receive(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,315 @@
+"""
+=============================================================================
+MODULE: bundle_cache.py
+DESCRIPTION:
+    Reuses ZIP bundles between grabs instead of re-zipping from scratch.
+
+    Mechanism:
+    1. Manifest: Every grab is described by {archive name: (size, mtime)} of
+       the files it contains (one parallel scandir pass, see dir_scanner.py).
+       The cache key is the set of grabbed paths.
+    2. Cache Hit: Same key + same manifest -> the existing ZIP is returned
+       as-is (re-sending an unchanged folder skips bundling entirely).
+    3. Incremental Update: Same key, some files changed -> a new ZIP is written
+       where unchanged members are copied as raw compressed bytes from the old
+       ZIP and only new/changed files are compressed again.
+       The raw copy appends to the ZipFile through CPython's private writer
+       state (_writecheck, start_dir, _didModify), so it is only used on the
+       Python versions it was checked against (RAW_COPY_MAX_PYTHON). Elsewhere
+       unchanged members are streamed through ZipFile.open() instead: decoded
+       and compressed again, but still without re-reading the source files.
+    4. Unique Artifacts: Every build gets its own file name and is written to
+       a '.part' file first, so a send that is still reading an older bundle
+       is never disturbed.
+    5. LRU Eviction: Least recently used bundles are deleted once the cache
+       exceeds its disk quota (files still in use are retried later).
+
+    6. Progress / Cancel: Optional callbacks so bundling can run on a worker
+       thread and be aborted (raises BundleCancelled).
+
+USAGE:
+    zip_path = BundleCache().get_bundle(file_paths, progress=callback, cancelled=event.is_set)
+=============================================================================
+"""
+
+#import statements
+import hashlib
+import json
+import os
+import shutil
+import struct
+import sys
+import tempfile
+import threading
+import time
+import uuid
+import zipfile
+
+from app.core.dir_scanner import scan_paths
+from app.core.logging_setup import get_logger
+from app.core.metrics import metrics
+
+log = get_logger("grab")
+
+CACHE_DIR = os.path.join(tempfile.gettempdir(), "MyDrop_Cache")
+DEFAULT_QUOTA_BYTES = 8 * 1024 ** 3
+INDEX_NAME = "index.json"
+BUNDLE_PREFIX = "MyDrop_Bundle_"
+
+# Leftover files nobody references are removed after this long (seconds)
+ORPHAN_AGE = 3600
+
+COPY_CHUNK = 1024 * 1024
+
+# Newest Python whose zipfile writer internals _copy_raw_member() relies on were checked
+RAW_COPY_MAX_PYTHON = (3, 14)
+
+class BundleCancelled(Exception):
+    """Raised when the caller cancelled the bundle while it was being built."""
+
+def cache_key(file_paths):
+    normalized = sorted(os.path.normcase(os.path.abspath(p)) for p in file_paths)
+    return hashlib.sha1("\n".join(normalized).encode("utf-8")).hexdigest()
+
+class BundleCache:
+    def __init__(self, cache_dir=CACHE_DIR, quota_bytes=DEFAULT_QUOTA_BYTES):
+        self.cache_dir = cache_dir
+        self.quota_bytes = quota_bytes
+        self._lock = threading.Lock()
+        self._index = None  # key -> {"path", "size", "last_used", "files": {arcname: [size, mtime_ns]}}
+
+    def get_bundle(self, file_paths, progress=None, cancelled=None, scan=None):
+        """
+        Returns the path of an up-to-date ZIP for the given files/folders
+        (cached, incrementally updated or freshly built), or None on failure.
+        - progress: Optional callback(percent), called as members are written.
+        - cancelled: Optional callable; when it returns True the build stops
+          with BundleCancelled (nothing half-written is left behind).
+        - scan: Optional ScanManifest of 'file_paths' the caller already made.
+        """
+        manifest = (scan or scan_paths(file_paths)).files
+        signature = {arc: [size, mtime] for arc, (_, size, mtime) in manifest.items()}
+        key = cache_key(file_paths)
+
+        with self._lock:
+            self._load_index()
+            entry = self._index.get(key)
+            previous = entry["path"] if entry and os.path.exists(entry["path"]) else None
+
+            # Nothing changed: skip bundling entirely
+            if previous and entry["files"] == signature:
+                log.info("Reusing bundle %s", os.path.basename(previous))
+                metrics.incr("grab.bundle_cache_hits")
+                entry["last_used"] = time.time()
+                self._save_index()
+                return previous
+
+            zip_path = os.path.join(self.cache_dir, f"{BUNDLE_PREFIX}{key[:8]}_{uuid.uuid4().hex[:6]}.zip")
+            try:
+                written = self._build(zip_path, manifest, previous, entry["files"] if previous else {},
+                                      progress, cancelled)
+            except BundleCancelled:
+                self._try_delete(zip_path + ".part")
+                raise
+            except Exception as e:
+                log.error("Bundle failed: %s", e)
+                self._try_delete(zip_path + ".part")
+                return None
+
+            self._index[key] = {
+                "path": zip_path,
+                "size": os.path.getsize(zip_path),
+                "last_used": time.time(),
+                "files": written,
+            }
+            if previous:
+                self._try_delete(previous)
+            self._evict(keep=key)
+            self._save_index()
+            return zip_path
+
+    # --- Building ---
+    def _build(self, zip_path, manifest, previous_path, previous_files, progress=None, cancelled=None):
+        """Writes the bundle, reusing unchanged members of 'previous_path'. Returns the stored signature."""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        part_path = zip_path + ".part"
+        written = {}
+        reused = 0
+        total_bytes = sum(size for _, size, _ in manifest.values()) or 1
+        done_bytes = 0
+        last_percent = -1
+
+        old_zip = zipfile.ZipFile(previous_path, "r") if previous_path else None
+        try:
+            with zipfile.ZipFile(part_path, "w", zipfile.ZIP_DEFLATED) as zipf:
+                for arcname, (full_path, size, mtime) in manifest.items():
+                    if cancelled is not None and cancelled():
+                        raise BundleCancelled()
+                    if progress is not None:
+                        percent = int(done_bytes * 100 / total_bytes)
+                        if percent != last_percent:
+                            progress(percent)
+                            last_percent = percent
+                    done_bytes += size
+
+                    # Unchanged since the last bundle: copy the compressed bytes as they are
+                    if old_zip is not None and previous_files.get(arcname) == [size, mtime]:
+                        try:
+                            _copy_member(old_zip, old_zip.getinfo(arcname), zipf)
+                            written[arcname] = [size, mtime]
+                            reused += 1
+                            continue
+                        except (KeyError, zipfile.BadZipFile, OSError) as e:
+                            log.warning("Re-compressing %s: %s", arcname, e)
+
+                    try:
+                        zipf.write(full_path, arcname=arcname)
+                        written[arcname] = [size, mtime]
+                    except Exception as e:
+                        # If a specific file is locked/denied, SKIP IT and continue
+                        log.warning("Zip skipped %s: %s", full_path, e)
+        finally:
+            if old_zip is not None:
+                old_zip.close()
+
+        os.replace(part_path, zip_path)
+        metrics.incr("grab.bundles_built")
+        metrics.incr("grab.bundle_members_reused", reused)
+        mode = f"incremental, {reused}/{len(manifest)} reused" if previous_path else "full"
+        log.info("Built bundle %s (%s)", os.path.basename(zip_path), mode)
+        return written
+
+    # --- Index / Eviction ---
+    def _load_index(self):
+        if self._index is not None:
+            return
+        try:
+            with open(os.path.join(self.cache_dir, INDEX_NAME), "r", encoding="utf-8") as f:
+                self._index = json.load(f)
+        except (OSError, ValueError):
+            self._index = {}
+
+    def _save_index(self):
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = os.path.join(self.cache_dir, INDEX_NAME + ".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._index, f)
+            os.replace(tmp_path, os.path.join(self.cache_dir, INDEX_NAME))
+        except OSError as e:
+            log.warning("Could not save the bundle index: %s", e)
+
+    def _evict(self, keep):
+        """Deletes least recently used bundles until the cache fits the quota."""
+        entries = sorted(self._index.items(), key=lambda item: item[1]["last_used"])
+        total = sum(e["size"] for _, e in entries)
+        for key, entry in entries:
+            if total <= self.quota_bytes:
+                break
+            if key == keep:
+                continue
+            if self._try_delete(entry["path"]):
+                total -= entry["size"]
+                del self._index[key]
+
+        # Bundles that couldn't be deleted earlier (still being sent) and crash leftovers
+        referenced = {os.path.basename(e["path"]) for e in self._index.values()}
+        now = time.time()
+        for name in os.listdir(self.cache_dir):
+            if name in referenced or not name.startswith(BUNDLE_PREFIX):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                if name.endswith(".zip") or now - os.path.getmtime(path) > ORPHAN_AGE:
+                    os.remove(path)
+            except OSError:
+                pass # In use, next time
+
+    @staticmethod
+    def _try_delete(path):
+        try:
+            os.remove(path)
+            return True
+        except FileNotFoundError:
+            return True
+        except OSError:
+            return False # Windows: still open by a running send
+
+def _strip_zip64_extra(extra):
+    """Drops the ZIP64 field (FileHeader() writes a fresh one if needed)."""
+    out = b""
+    i = 0
+    while i + 4 <= len(extra):
+        field_id, length = struct.unpack("<HH", extra[i:i + 4])
+        if field_id != 0x0001:
+            out += extra[i:i + 4 + length]
+        i += 4 + length
+    return out
+
+def _raw_copy_supported(dst_zip):
+    return (sys.version_info[:2] <= RAW_COPY_MAX_PYTHON
+            and all(hasattr(dst_zip, name) for name in ("_writecheck", "start_dir", "_didModify")))
+
+def _copy_member(src_zip, src_info, dst_zip):
+    """Appends one member of 'src_zip' to 'dst_zip', as raw bytes where the zipfile internals allow it."""
+    if _raw_copy_supported(dst_zip):
+        _copy_raw_member(src_zip, src_info, dst_zip)
+    else:
+        _recompress_member(src_zip, src_info, dst_zip)
+
+def _recompress_member(src_zip, src_info, dst_zip):
+    """
+    Public-API fallback: streams the member through ZipFile.open() (the CRC is checked on the way).
+    If the old member turns out corrupt, the caller writes the file again under the same name;
+    readers (zipfile, BundleExtractor) then keep the later copy.
+    """
+    info = zipfile.ZipInfo(src_info.filename, src_info.date_time)
+    info.compress_type = dst_zip.compression
+    info.external_attr = src_info.external_attr
+    info.create_system = src_info.create_system
+    with src_zip.open(src_info) as src, \
+            dst_zip.open(info, "w", force_zip64=src_info.file_size > zipfile.ZIP64_LIMIT) as dst:
+        shutil.copyfileobj(src, dst, COPY_CHUNK)
+
+def _copy_raw_member(src_zip, src_info, dst_zip):
+    """
+    Appends one member of 'src_zip' to 'dst_zip' without decompressing it.
+    Mirrors what ZipFile.write() does internally for a seekable file, using the
+    writer's private state: only call it when _raw_copy_supported(dst_zip).
+    """
+    src = src_zip.fp
+    src.seek(src_info.header_offset)
+    header = src.read(zipfile.sizeFileHeader)
+    if header[:4] != zipfile.stringFileHeader:
+        raise zipfile.BadZipFile(f"Bad local header for {src_info.filename}")
+    name_length, extra_length = struct.unpack("<HH", header[26:30])
+    src.seek(src_info.header_offset + zipfile.sizeFileHeader + name_length + extra_length)
+
+    info = zipfile.ZipInfo(src_info.filename, src_info.date_time)
+    info.compress_type = src_info.compress_type
+    info.CRC = src_info.CRC
+    info.compress_size = src_info.compress_size
+    info.file_size = src_info.file_size
+    info.external_attr = src_info.external_attr
+    info.create_system = src_info.create_system
+    info.extra = _strip_zip64_extra(src_info.extra)
+    info.flag_bits = src_info.flag_bits & ~0x08  # Sizes are in the local header, no data descriptor
+
+    dst_zip._writecheck(info)
+    dst = dst_zip.fp
+    dst.seek(dst_zip.start_dir)
+    info.header_offset = dst.tell()
+    dst.write(info.FileHeader())
+
+    remaining = src_info.compress_size
+    while remaining > 0:
+        chunk = src.read(min(COPY_CHUNK, remaining))
+        if not chunk:
+            raise zipfile.BadZipFile(f"Truncated member {src_info.filename}")
+        dst.write(chunk)
+        remaining -= len(chunk)
+
+    dst_zip.filelist.append(info)
+    dst_zip.NameToInfo[info.filename] = info
+    dst_zip.start_dir = dst.tell()
+    dst_zip._didModify = True
@@ -0,0 +1,292 @@
+"""
+=============================================================================
+MODULE: bundle_extractor.py
+DESCRIPTION:
+    Unpacks a MyDrop bundle (ZIP) while it is still being received, instead
+    of saving the ZIP and extracting it afterwards (which reads and writes
+    every byte a second time).
+
+    Mechanism:
+    1. Streaming: Used like a file opened for writing; the download loop
+       write()s the received bytes, the local file headers are parsed as
+       they arrive and each member is inflated straight to its final path.
+       The central directory at the end is not needed (it only repeats the
+       local headers) and is skipped.
+    2. Usable Early: A member is written to '<name>.part' and renamed to its
+       real name once its CRC matched, so every file can be opened as soon
+       as its member is complete, and a broken stream never leaves a
+       half-written file under a real name.
+    3. Path Safety: Absolute paths, drive letters and '..' components are
+       refused (the member is skipped), and the final path must resolve
+       inside the target folder (no escaping through existing symlinks).
+       Nothing but regular files and folders is ever created.
+    4. Formats: Stored and deflated members, data descriptors and ZIP64 sizes.
+
+USAGE:
+    with BundleExtractor(download_dir) as sink:
+        for chunk in stream:
+            sink.write(chunk)
+    print(sink.files)
+=============================================================================
+"""
+
+#import statements
+import os
+import struct
+import zlib
+
+from zipfile import BadZipFile
+from app.core.bundle_cache import BUNDLE_PREFIX
+from app.core.logging_setup import get_logger
+from app.core.metrics import metrics
+
+log = get_logger("transfer")
+
+OUTPUT_CHUNK = 1024 * 1024    # Max inflated bytes per step (bounds memory on highly compressed data)
+
+_LOCAL_HEADER = struct.Struct("<4s5HL2L2H")
+_LOCAL_SIG = b"PK\x03\x04"
+_DESCRIPTOR_SIG = b"PK\x07\x08"
+_END_SIGS = (b"PK\x01\x02", b"PK\x05\x06", b"PK\x06\x06") # Central directory / end records
+
+_STORED, _DEFLATED = 0, 8
+_FLAG_ENCRYPTED, _FLAG_DESCRIPTOR, _FLAG_UTF8 = 0x01, 0x08, 0x800
+
+# Parser states
+_HEADER, _NAME, _DATA, _DESCRIPTOR, _DONE = range(5)
+
+def is_bundle_name(filename):
+    """True for the ZIP bundles FileGrabber/BundleCache produce (single files are sent as they are)."""
+    name = os.path.basename(str(filename).replace("\\", "/"))
+    return name.startswith(BUNDLE_PREFIX) and name.lower().endswith(".zip")
+
+def safe_member_path(root, name):
+    """Final path of member 'name' inside 'root', or None if it would land outside."""
+    name = name.replace("\\", "/")
+    parts = [p for p in name.split("/") if p not in ("", ".")]
+    if not parts or name.startswith("/") or ".." in parts or ":" in parts[0]:
+        return None
+    path = os.path.join(root, *parts)
+    real_root = os.path.realpath(root)
+    if not os.path.realpath(path).startswith(real_root + os.sep):
+        return None
+    return path
+
+class BundleExtractor:
+    def __init__(self, target_dir):
+        self.target_dir = os.path.abspath(target_dir)
+        self.files = []        # Final paths of the completed members, in stream order
+        self.skipped = []      # Member names refused by the path check
+        self.bytes_written = 0 # Uncompressed bytes written to disk
+
+        self._state = _HEADER
+        self._pending = bytearray() # Header / descriptor bytes collected so far
+        self._needed = _LOCAL_HEADER.size
+        self._member = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
+
+    @property
+    def finished(self):
+        return self._state == _DONE
+
+    @property
+    def top_level(self):
+        """The one folder everything was extracted into, else the target folder."""
+        roots = {os.path.relpath(path, self.target_dir).split(os.sep)[0] for path in self.files}
+        if len(roots) == 1 and len(self.files) > 1:
+            return os.path.join(self.target_dir, roots.pop())
+        return self.target_dir
+
+    # --- File-like API used by the download loop ---
+    def write(self, data):
+        view = memoryview(data)
+        while len(view):
+            if self._state == _DONE:
+                return # Central directory: nothing left to extract
+            if self._state == _DATA:
+                view = self._feed_member(view)
+                continue
+
+            # Fixed-size pieces (headers, names, descriptors) are collected first
+            take = self._needed - len(self._pending)
+            self._pending += view[:take]
+            view = view[take:]
+            if len(self._pending) < self._needed:
+                return
+            if self._state == _HEADER:
+                self._on_header()
+            elif self._state == _NAME:
+                self._on_name()
+            else:
+                self._on_descriptor()
+
+    def close(self):
+        """Checks that the whole bundle arrived. Raises BadZipFile otherwise."""
+        if not self.finished:
+            self.abort()
+            raise BadZipFile("Bundle ended before its last member")
+        metrics.incr("transfer.members_extracted", len(self.files))
+        log.info("Extracted %d files to %s", len(self.files), self.target_dir)
+
+    def abort(self):
+        """Drops the member being written (completed members stay)."""
+        member = self._member
+        self._member = None
+        if member and member.get("out"):
+            member["out"].close()
+            try:
+                os.remove(member["part"])
+            except OSError:
+                pass
+
+    # --- Parser ---
+    def _expect(self, size, state):
+        self._pending = bytearray()
+        self._needed = size
+        self._state = state
+
+    def _on_header(self):
+        signature = bytes(self._pending[:4])
+        if signature in _END_SIGS:
+            self._state = _DONE
+            return
+        if signature != _LOCAL_SIG:
+            raise BadZipFile("Not a ZIP stream (bad local header)")
+        (_, _, flags, method, _, _, crc, compress_size, file_size,
+         name_length, extra_length) = _LOCAL_HEADER.unpack(bytes(self._pending))
+        if flags & _FLAG_ENCRYPTED:
+            raise BadZipFile("Encrypted ZIP members are not supported")
+        if method not in (_STORED, _DEFLATED):
+            raise BadZipFile(f"Unsupported compression method {method}")
+        # Every key abort() / _finish_member() read exists from here on, even if the name turns out bad
+        self._member = {"flags": flags, "method": method, "crc": crc, "compress_size": compress_size,
+                        "file_size": file_size, "name_length": name_length, "zip64": False,
+                        "name": None, "out": None, "path": None, "part": None}
+        self._expect(name_length + extra_length, _NAME)
+
+    def _on_name(self):
+        member = self._member
+        raw_name = bytes(self._pending[:member["name_length"]])
+        try:
+            name = raw_name.decode("utf-8" if member["flags"] & _FLAG_UTF8 else "cp437")
+        except UnicodeDecodeError:
+            raise BadZipFile(f"Invalid member name {raw_name!r}")
+        member["name"] = name
+        self._read_zip64_sizes(bytes(self._pending[member["name_length"]:]))
+
+        has_descriptor = member["flags"] & _FLAG_DESCRIPTOR
+        if has_descriptor and member["method"] == _STORED:
+            # Without sizes the end of a stored member can't be found in a stream
+            raise BadZipFile(f"Stored member without sizes: {name}")
+
+        member.update(remaining=None if has_descriptor else member["compress_size"],
+                      computed_crc=0, written=0,
+                      inflater=zlib.decompressobj(-15) if member["method"] == _DEFLATED else None)
+
+        path = safe_member_path(self.target_dir, name)
+        if path is None:
+            log.warning("Refused unsafe path in bundle: %r", name)
+            metrics.incr("transfer.members_rejected")
+            self.skipped.append(name)
+        elif name.endswith("/") or name.endswith("\\"):
+            os.makedirs(path, exist_ok=True) # Folder entry
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            member["path"] = path
+            member["part"] = path + ".part"
+            member["out"] = open(member["part"], "wb")
+
+        self._pending = bytearray()
+        self._state = _DATA
+        if member["remaining"] == 0:
+            self._finish_member()
+
+    def _read_zip64_sizes(self, extra):
+        """Real sizes of a ZIP64 member (the local header then holds 0xFFFFFFFF)."""
+        member = self._member
+        i = 0
+        while i + 4 <= len(extra):
+            field_id, length = struct.unpack("<HH", extra[i:i + 4])
+            if field_id == 0x0001:
+                member["zip64"] = True
+                values = extra[i + 4:i + 4 + length]
+                offset = 0
+                for key in ("file_size", "compress_size"):
+                    if member[key] == 0xFFFFFFFF and offset + 8 <= len(values):
+                        member[key] = struct.unpack("<Q", values[offset:offset + 8])[0]
+                        offset += 8
+            i += 4 + length
+
+    def _feed_member(self, view):
+        """Consumes member data from 'view'. Returns what is left of 'view'."""
+        member = self._member
+        if member["remaining"] is not None:
+            chunk, view = view[:member["remaining"]], view[member["remaining"]:]
+            member["remaining"] -= len(chunk)
+        else:
+            chunk, view = view, view[len(view):]
+
+        inflater = member["inflater"]
+        if inflater is None:
+            self._output(chunk)
+        else:
+            data = inflater.decompress(chunk, OUTPUT_CHUNK)
+            self._output(data)
+            while inflater.unconsumed_tail:
+                self._output(inflater.decompress(inflater.unconsumed_tail, OUTPUT_CHUNK))
+            if inflater.eof and member["remaining"] is None:
+                # Size came in a data descriptor: the deflate stream's own end marks the member end
+                leftover = inflater.unused_data
+                self._expect(4, _DESCRIPTOR)
+                return memoryview(leftover + bytes(view)) if leftover else view
+
+        if member["remaining"] == 0:
+            if inflater is not None and not inflater.eof:
+                self._output(inflater.flush())
+            self._finish_member()
+        return view
+
+    def _output(self, data):
+        if not data:
+            return
+        member = self._member
+        member["computed_crc"] = zlib.crc32(data, member["computed_crc"])
+        member["written"] += len(data)
+        if member["out"]:
+            member["out"].write(data)
+
+    def _on_descriptor(self):
+        member = self._member
+        size_bytes = 8 if member["zip64"] else 4
+        if len(self._pending) == 4:
+            # The descriptor signature is optional: 4 more bytes if it is there
+            rest = 4 + 2 * size_bytes if bytes(self._pending) == _DESCRIPTOR_SIG else 2 * size_bytes
+            self._needed = 4 + rest
+            return
+        fields = bytes(self._pending[-(4 + 2 * size_bytes):])
+        member["crc"] = struct.unpack("<L", fields[:4])[0]
+        member["file_size"] = struct.unpack("<Q" if size_bytes == 8 else "<L", fields[4 + size_bytes:])[0]
+        self._finish_member()
+
+    def _finish_member(self):
+        member = self._member
+        if member["computed_crc"] != member["crc"] or member["written"] != member["file_size"]:
+            self.abort()
+            raise BadZipFile(f"Corrupt member {member['name']} (CRC/size mismatch)")
+        if member["out"]:
+            member["out"].close()
+            os.replace(member["part"], member["path"]) # Usable from here on
+            self.files.append(member["path"])
+            self.bytes_written += member["written"]
+            log.debug("Extracted %s", member["path"])
+        self._member = None
+        self._expect(_LOCAL_HEADER.size, _HEADER)
@@ -0,0 +1,127 @@
+"""
+=============================================================================
+MODULE: camera_session.py
+DESCRIPTION:
+    Owns the webcam handle so it is opened exactly once per sender session.
+
+    Before: diagnose_camera() opened the camera, read 21 frames, released it,
+    and the gesture loop opened it again from scratch (1-2 s on most laptops).
+    Now:
+    1. acquire(): Opens the camera (or reuses the still-warm handle).
+    2. health_check(): Brightness / closed-shutter check on the live stream.
+       Returns as soon as one good frame arrives.
+    3. The gesture loop gets the very same handle.
+    4. release(): Keeps the camera open for a grace period, so re-entering
+       sender mode is instant. close() shuts it down immediately.
+
+THREADING:
+    acquire/release/close may be called from the UI thread, the gesture loop
+    and the grace timer; everything is guarded by one lock.
+=============================================================================
+"""
+
+#import statements
+import threading
+import numpy as np
+
+from app.core.frame_sources import CameraSource
+from app.core.logging_setup import get_logger
+
+log = get_logger("gesture")
+
+# Seconds the camera stays open after the gesture loop stops (0 = close right away)
+CAMERA_GRACE_PERIOD = 15
+
+class CameraSession:
+    def __init__(self, index=0, grace_period=CAMERA_GRACE_PERIOD):
+        self.index = index
+        self.grace_period = grace_period
+        self._lock = threading.Lock()
+        self._source = None
+        self._close_timer = None
+
+    @property
+    def is_open(self):
+        with self._lock:
+            return self._source is not None and self._source.isOpened()
+
+    def acquire(self):
+        """Returns an opened CameraSource (warm if possible), or None if no camera."""
+        with self._lock:
+            self._cancel_close_timer()
+            if self._source is not None and self._source.isOpened():
+                return self._source
+
+            log.info("Opening camera...")
+            source = CameraSource(self.index)
+            if not source.open():
+                source.release()
+                self._source = None
+                return None
+            self._source = source
+            return source
+
+    def health_check(self, max_frames=20, min_brightness=30):
+        """
+        Healthy / closed-shutter check on the live stream.
+        Reads until one frame is bright enough, so a warm camera passes instantly.
+        Returns: (is_healthy, message)
+        """
+        source = self.acquire()
+        if source is None:
+            return False, "No camera."
+
+        try:
+            got_frame = False
+            for _ in range(max_frames + 1):
+                success, frame, _ = source.read()
+                if not success:
+                    continue
+                got_frame = True
+                # Strided view is plenty for an average brightness
+                if np.mean(frame[::4, ::4]) >= min_brightness:
+                    return True, "Healthy"
+        except Exception as e:
+            return False, str(e)
+
+        if not got_frame:
+            return False, "Camera read error."
+        return False, "Camera too dark/closed."
+
+    def release(self):
+        """Done with the camera for now: close it after the grace period."""
+        with self._lock:
+            self._cancel_close_timer()
+            if self._source is None:
+                return
+            if self.grace_period <= 0:
+                self._close_locked()
+                return
+            self._close_timer = threading.Timer(self.grace_period, self._on_grace_expired)
+            self._close_timer.daemon = True
+            self._close_timer.start()
+
+    def close(self):
+        """Closes the camera immediately."""
+        with self._lock:
+            self._cancel_close_timer()
+            self._close_locked()
+
+    def _on_grace_expired(self):
+        with self._lock:
+            # Someone re-acquired (or re-released) the camera while we waited for the lock
+            if self._close_timer is not threading.current_thread():
+                return
+            self._close_timer = None
+            self._close_locked()
+
+    def _close_locked(self):
+        if self._source is not None:
+            self._source.release()
+            self._source = None
+            log.info("Camera closed.")
+
+    def _cancel_close_timer(self):
+        if self._close_timer is not None:
+            self._close_timer.cancel()
+            self._close_timer = None
@@ -10,32 +10,61 @@ DESCRIPTION:
     3. Smart Batching: 
        - If 1 file: Returns path.
        - If multiple files or folder: Automatically zips them into a temp file.
+         Bundles are cached (see bundle_cache.py): an unchanged selection is not
+         zipped again, a changed one is only updated incrementally.
     4. Error Handling: Skips locked/admin-only files during zipping to prevent crashes.
+    5. Background Friendly: Polls the clipboard instead of fixed sleeps, reports
+       bundling progress and can be cancelled (runs on GrabWorker's pool).
+    6. Size Estimate: The selection is scanned once up front (dir_scanner.py), so
+       the file count and total size are known before zipping starts.
 
 USAGE:
-    filepath, error = FileGrabber.get_grabbed_content()
+    filepath, error = FileGrabber.get_grabbed_content(progress=callback, cancel_event=event, on_scan=callback)
 =============================================================================
 """
 
 #import statements
 import time
-import pyautogui
-import win32clipboard
-import win32con
 import os
-import zipfile
-import tempfile
+
+from app.core.bundle_cache import BundleCache, BundleCancelled
+from app.core.dir_scanner import scan_paths
+from app.core.logging_setup import get_logger
+from app.core.metrics import metrics
+
+log = get_logger("grab")
+
+# Upper bounds for the clipboard polling (we continue as soon as it's ready)
+COPY_TIMEOUT = 0.5
+OPEN_TIMEOUT = 0.2
+POLL_INTERVAL = 0.01
+
+# Foreground windows Ctrl+C must not be sent to (it interrupts whatever runs there, maybe MyDrop)
+TERMINAL_WINDOW_CLASSES = ("ConsoleWindowClass", "CASCADIA_HOSTING_WINDOW_CLASS", "mintty", "VirtualConsoleClass")
 
 class FileGrabber:
+    _bundle_cache = None
+
     @staticmethod
-    def get_grabbed_content():
+    def get_grabbed_content(progress=None, cancel_event=None, on_scan=None):
         """
         Simulates Ctrl+C.
         - If 1 file selected: Returns path to that file.
         - If Multiple files or Folder selected: Zips them and returns path to Zip.
         Orchestrates the grab process: Trigger Copy -> Read Clipboard -> Decide Zip vs Single.
+        - progress: Optional callback(percent) while bundling.
+        - cancel_event: Optional threading.Event; when set, the grab stops with "Cancelled".
+        - on_scan: Optional callback({"file_count", "total_bytes"}) once the selection is scanned.
         Returns: (path_to_file_or_zip, error_message)
         """
+        # Heavy / Windows-only modules load on first grab (or the startup prewarm)
+        import pyautogui
+        import win32clipboard
+        import win32con
+
+        if FileGrabber._foreground_is_terminal():
+            return None, "Don't grab the Terminal! Click a file first."
+
         # --- Clear Clipboard First ---
         try:
             win32clipboard.OpenClipboard()
@@ -43,25 +72,27 @@ class FileGrabber:
             win32clipboard.CloseClipboard()
         except Exception:
             pass
+        sequence = win32clipboard.GetClipboardSequenceNumber()
 
-        # 1. Simulate Ctrl+C
+        # 1. Simulate Ctrl+C, then wait until Explorer actually updated the clipboard
         try:
-            pyautogui.hotkey('ctrl', 'c')
-            time.sleep(0.5) 
-        except KeyboardInterrupt:
-            return None, "Don't grab the Terminal! Click a file first."
+            with metrics.span("grab.clipboard_copy", trace="send") as span:
+                pyautogui.hotkey('ctrl', 'c')
+                updated = FileGrabber._wait_until(
+                    lambda: win32clipboard.GetClipboardSequenceNumber() != sequence, COPY_TIMEOUT)
+                span.set(updated=updated)
         except Exception as e:
             return None, f"Keyboard Error: {e}"
 
-        # 2. Open Native Clipboard
-        try:
-            win32clipboard.OpenClipboard()
-        except Exception:
-            time.sleep(0.2)
-            try:
-                win32clipboard.OpenClipboard()
-            except:
-                return None, "Clipboard is locked by System."
+        if cancel_event is not None and cancel_event.is_set():
+            return None, "Cancelled"
+
+        # 2. Open Native Clipboard (retry briefly while another app holds it)
+        with metrics.span("grab.clipboard_open", trace="send"):
+            opened = FileGrabber._wait_until(FileGrabber._try_open_clipboard, OPEN_TIMEOUT)
+        if not opened:
+            metrics.incr("grab.clipboard_locked")
+            return None, "Clipboard is locked by System."
 
         # 3. Read File List
         file_paths = []
@@ -80,57 +111,72 @@ class FileGrabber:
         if not file_paths:
             return None, error_msg
 
-        # 4. DECISION LOGIC: Single File vs. Batch
+        # 4. Scan the selection once: file count + total size before any zipping
+        with metrics.span("grab.scan", trace="send") as span:
+            scan = scan_paths(file_paths)
+            span.set(files=scan.file_count, total_bytes=scan.total_bytes)
+        log.info("Scanned %d files (%d bytes) in %.0f ms", scan.file_count, scan.total_bytes, scan.seconds * 1000)
+        if on_scan is not None:
+            on_scan(scan.summary())
+
+        if cancel_event is not None and cancel_event.is_set():
+            return None, "Cancelled"
+
+        # 5. DECISION LOGIC: Single File vs. Batch
         # If it's a single file (not a folder), return it directly
         if len(file_paths) == 1 and os.path.isfile(file_paths[0]):
-            print(f"[FileGrabber] Single file detected: {file_paths[0]}")
+            log.info("Single file detected: %s", file_paths[0])
             return file_paths[0], None
         
         # Otherwise (Multiple files OR a Folder), create a ZIP
         else:
-            print(f"[FileGrabber] Batch/Folder detected. Zipping...")
-            return FileGrabber._create_temp_zip(file_paths), None
+            log.info("Batch/Folder detected. Zipping...")
+            try:
+                with metrics.span("grab.bundle", trace="send", files=scan.file_count, bytes=scan.total_bytes):
+                    zip_path = FileGrabber._create_temp_zip(file_paths, progress, cancel_event, scan)
+            except BundleCancelled:
+                log.info("Bundling cancelled.")
+                return None, "Cancelled"
+            if not zip_path:
+                return None, "Could not create the bundle."
+            return zip_path, None
 
     @staticmethod
-    def _create_temp_zip(file_paths):
-        """Compresses list of paths into a temporary zip file, skipping errors."""
+    def _create_temp_zip(file_paths, progress=None, cancel_event=None, scan=None):
         """
-        Iterates through file paths and compresses them into a temp ZIP.
-        Includes logic to handle recursion for folders and 'try-catch' for permission errors.
+        Returns a ZIP of the given paths from the bundle cache (built or updated as needed).
+        Locked/admin-only files are skipped instead of failing the whole bundle.
         """
+        if FileGrabber._bundle_cache is None:
+            FileGrabber._bundle_cache = BundleCache()
+        cancelled = cancel_event.is_set if cancel_event is not None else None
+        return FileGrabber._bundle_cache.get_bundle(file_paths, progress=progress, cancelled=cancelled, scan=scan)
+
+    @staticmethod
+    def _foreground_is_terminal():
+        """True if the focused window is a console / terminal (best effort, False if unknown)."""
         try:
-            temp_dir = tempfile.gettempdir()
-            zip_path = os.path.join(temp_dir, "MyDrop_Bundle.zip")
-            
-            with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-                for path in file_paths:
-                    # Case 1: It's a single File
-                    if os.path.isfile(path):
-                        try:
-                            zipf.write(path, arcname=os.path.basename(path))
-                        except Exception as e:
-                            print(f"[Zip Error] Skipped file {path}: {e}")
-
-                    # Case 2: It's a Folder
-                    elif os.path.isdir(path):
-                        root_len = len(os.path.dirname(path))
-                        for root, dirs, files in os.walk(path):
-                            for file in files:
-                                full_path = os.path.join(root, file)
-                                try:
-                                    # Logic to keep folder structure inside zip
-                                    rel_path = full_path[root_len:]
-                                    zipf.write(full_path, arcname=rel_path)
-                                except Exception as e:
-                                    # If a specific file is locked/denied, SKIP IT and continue
-                                    print(f"[Zip Error] Skipped {file}: {e}")
-            
-            return zip_path
-        except Exception as e:
-            print(f"[Zip Critical Fail] {e}")
-            return None
-            
-            return zip_path
-        except Exception as e:
-            print(f"[Zip Error] {e}")
-            return None
\ No newline at end of file
+            import win32gui
+            return win32gui.GetClassName(win32gui.GetForegroundWindow()) in TERMINAL_WINDOW_CLASSES
+        except Exception:
+            return False
+
+    @staticmethod
+    def _try_open_clipboard():
+        import win32clipboard
+        try:
+            win32clipboard.OpenClipboard()
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _wait_until(condition, timeout):
+        """Polls 'condition' until it is true or 'timeout' seconds passed. Returns True on success."""
+        deadline = time.monotonic() + timeout
+        while True:
+            if condition():
+                return True
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(POLL_INTERVAL)
@@ -0,0 +1,162 @@
+"""
+=============================================================================
+MODULE: frame_pipeline.py
+DESCRIPTION:
+    Prepares camera frames for MediaPipe as cheaply as possible.
+
+    Responsibilities:
+    1. Adaptive Resolution: Hand detection runs on a downscaled copy of the
+       frame instead of the full camera resolution.
+    2. ROI Cropping: Once a hand is found, only a region around its last known
+       bounding box is converted and passed to MediaPipe (tracking mode).
+       Falls back to full-frame detection as soon as the hand is lost.
+    3. Frame-Rate Control: Picks the loop interval from the measured inference
+       cost (keeps the tracker inside a CPU budget) instead of a fixed sleep.
+
+USAGE:
+    pipeline = AdaptiveFramePipeline()
+    image = pipeline.prepare(frame)            # small RGB image for MediaPipe
+    pipeline.update(points, inference_seconds) # points normalized to 'image'
+    time.sleep(pipeline.next_delay(elapsed))
+=============================================================================
+"""
+
+#import statements
+import cv2
+import numpy as np
+
+class AdaptiveFramePipeline:
+    def __init__(self, detect_width=320, track_width=256, roi_margin=0.35,
+                 min_roi_fraction=0.25, max_fps=30, min_fps=8, cpu_budget=0.35):
+        # Resolution used when searching the whole frame vs. tracking inside the ROI
+        self.detect_width = detect_width
+        self.track_width = track_width
+
+        # ROI Settings (all relative to the full frame)
+        self.roi_margin = roi_margin              # Padding around the hand box
+        self.min_roi_fraction = min_roi_fraction  # Never crop smaller than this
+
+        # Frame-Rate Settings
+        self.max_fps = max_fps
+        self.min_fps = min_fps
+        self.cpu_budget = cpu_budget  # Fraction of one core we allow inference to use
+
+        # State
+        self.roi = None          # (x0, y0, x1, y1) normalized to the full frame, None = full frame
+        self._crop_box = None    # ROI actually used for the last prepared image
+        self.avg_inference = None
+
+    @property
+    def target_fps(self):
+        """The loop rate we can afford given the current inference cost."""
+        return 1.0 / self._frame_interval()
+
+    def reset(self):
+        """Forget the last hand position (e.g. when the camera restarts)."""
+        self.roi = None
+        self._crop_box = None
+
+    def prepare(self, frame):
+        """
+        Crops (if tracking) and downscales a BGR frame, then converts it to RGB.
+        Cropping is a NumPy view, so the color conversion only touches the
+        pixels MediaPipe will actually see.
+        Returns: Read-only RGB image ready for Hands.process().
+        """
+        h, w = frame.shape[:2]
+
+        if self.roi is not None:
+            x0, y0, x1, y1 = self.roi
+            px0, py0 = int(x0 * w), int(y0 * h)
+            px1, py1 = max(px0 + 1, int(x1 * w)), max(py0 + 1, int(y1 * h))
+            frame = frame[py0:py1, px0:px1]
+            target_width = self.track_width
+        else:
+            target_width = self.detect_width
+        self._crop_box = self.roi
+
+        # Downscale first so the color conversion runs on fewer pixels
+        crop_h, crop_w = frame.shape[:2]
+        if crop_w > target_width:
+            target_height = max(1, int(crop_h * target_width / crop_w))
+            frame = cv2.resize(frame, (target_width, target_height), interpolation=cv2.INTER_AREA)
+
+        image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        image.flags.writeable = False
+        return image
+
+    def to_frame_coords(self, points):
+        """Maps normalized (x, y) points of the prepared image back to the full frame."""
+        points = np.asarray(points, dtype=np.float32)
+        if self._crop_box is None:
+            return points
+        x0, y0, x1, y1 = self._crop_box
+        mapped = points.copy()
+        mapped[:, 0] = x0 + points[:, 0] * (x1 - x0)
+        mapped[:, 1] = y0 + points[:, 1] * (y1 - y0)
+        return mapped
+
+    def update(self, points, inference_seconds):
+        """
+        Feeds back the result of the last inference.
+        - points: (N, 2+) landmarks normalized to the prepared image, or None if no hand.
+        - inference_seconds: How long Hands.process() took.
+        """
+        # Exponential moving average keeps the FPS choice stable
+        if self.avg_inference is None:
+            self.avg_inference = inference_seconds
+        else:
+            self.avg_inference += 0.2 * (inference_seconds - self.avg_inference)
+
+        if points is None or len(points) == 0:
+            # Hand lost (maybe it left the ROI): search the full frame again
+            self.roi = None
+            return
+
+        frame_points = self.to_frame_coords(np.asarray(points)[:, :2])
+        hand_box = (
+            float(frame_points[:, 0].min()), float(frame_points[:, 1].min()),
+            float(frame_points[:, 0].max()), float(frame_points[:, 1].max())
+        )
+
+        # Only move the ROI when the hand approaches its edge or the ROI is far too big.
+        # A stable crop keeps MediaPipe's own tracker happy.
+        if self.roi is None or self._needs_new_roi(hand_box):
+            self.roi = self._roi_around(hand_box)
+
+    def next_delay(self, elapsed):
+        """Seconds to sleep so the loop runs at the target FPS (never negative)."""
+        return max(0.0, self._frame_interval() - elapsed)
+
+    def _frame_interval(self):
+        if self.avg_inference is None:
+            return 1.0 / self.max_fps
+        # Inference should use at most 'cpu_budget' of the wall clock
+        interval = self.avg_inference / self.cpu_budget
+        return min(max(interval, 1.0 / self.max_fps), 1.0 / self.min_fps)
+
+    def _needs_new_roi(self, hand_box):
+        x0, y0, x1, y1 = self.roi
+        roi_w, roi_h = x1 - x0, y1 - y0
+        inner_x, inner_y = roi_w * 0.1, roi_h * 0.1
+
+        near_edge = (
+            hand_box[0] < x0 + inner_x or hand_box[1] < y0 + inner_y or
+            hand_box[2] > x1 - inner_x or hand_box[3] > y1 - inner_y
+        )
+        hand_area = (hand_box[2] - hand_box[0]) * (hand_box[3] - hand_box[1])
+        too_big = hand_area < 0.08 * roi_w * roi_h and roi_w > self.min_roi_fraction
+        return near_edge or too_big
+
+    def _roi_around(self, hand_box):
+        """Box around the hand, padded and clamped to the frame."""
+        cx = (hand_box[0] + hand_box[2]) / 2
+        cy = (hand_box[1] + hand_box[3]) / 2
+        size = max(hand_box[2] - hand_box[0], hand_box[3] - hand_box[1])
+        size = max(size * (1 + 2 * self.roi_margin), self.min_roi_fraction)
+        half = min(size, 1.0) / 2
+
+        # Shift (rather than shrink) the box when it hits the frame border
+        x0 = min(max(cx - half, 0.0), 1.0 - 2 * half)
+        y0 = min(max(cy - half, 0.0), 1.0 - 2 * half)
+        return (x0, y0, x0 + 2 * half, y0 + 2 * half)
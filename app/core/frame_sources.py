@@ -0,0 +1,188 @@
+"""
+=============================================================================
+MODULE: frame_sources.py
+DESCRIPTION:
+    Pluggable inputs for the gesture pipeline, so it can run without a webcam.
+
+    Sources (all share open() / read() / release()):
+    - CameraSource: Live webcam via OpenCV (the normal app).
+    - VideoFileSource: Any video OpenCV can decode (recorded clips).
+    - ImageDirectorySource: A folder of numbered images (one frame each).
+    - LandmarkSource: Pre-extracted landmarks (.npy / .npz), skips MediaPipe.
+
+    read() returns (success, data, timestamp):
+    - data is a BGR frame, or for LandmarkSource a (21, 3) array of normalized
+      MediaPipe coordinates (None when no hand was visible).
+    - timestamp is in seconds: monotonic clock for live sources, media time
+      (frame_index / fps) for recorded ones.
+
+USAGE:
+    source = open_source("clip.mp4")   # or 0, "camera:1", "frames/", "hand.npz"
+=============================================================================
+"""
+
+#import statements
+import os
+import time
+import cv2
+import numpy as np
+from app.core.logging_setup import get_logger
+
+log = get_logger("gesture")
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp")
+LANDMARK_EXTENSIONS = (".npy", ".npz")
+
+class CameraSource:
+    is_live = True
+    provides_landmarks = False
+
+    def __init__(self, index=0):
+        self.index = index
+        self.cap = None
+
+    def open(self):
+        self.cap = cv2.VideoCapture(self.index)
+        # Keep only the newest frame queued, the loop doesn't read at the camera's full rate
+        self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        return self.cap.isOpened()
+
+    def isOpened(self):
+        return self.cap is not None and self.cap.isOpened()
+
+    def read(self):
+        success, frame = self.cap.read()
+        return success, frame, time.monotonic()
+
+    def release(self):
+        if self.cap:
+            self.cap.release()
+
+class VideoFileSource:
+    is_live = False
+    provides_landmarks = False
+
+    def __init__(self, path):
+        self.path = path
+        self.cap = None
+        self.fps = 30.0
+        self.frame_index = 0
+
+    def open(self):
+        self.cap = cv2.VideoCapture(self.path)
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) or 30.0
+        self.frame_index = 0
+        return self.cap.isOpened()
+
+    def isOpened(self):
+        return self.cap is not None and self.cap.isOpened()
+
+    def read(self):
+        success, frame = self.cap.read()
+        timestamp = self.frame_index / self.fps
+        self.frame_index += 1
+        return success, frame, timestamp
+
+    def release(self):
+        if self.cap:
+            self.cap.release()
+
+class ImageDirectorySource:
+    is_live = False
+    provides_landmarks = False
+
+    def __init__(self, path, fps=30.0):
+        self.path = path
+        self.fps = fps
+        self.files = []
+        self.frame_index = 0
+
+    def open(self):
+        try:
+            names = sorted(n for n in os.listdir(self.path) if n.lower().endswith(IMAGE_EXTENSIONS))
+        except OSError:
+            return False
+        self.files = [os.path.join(self.path, n) for n in names]
+        self.frame_index = 0
+        return bool(self.files)
+
+    def isOpened(self):
+        return self.frame_index < len(self.files)
+
+    def read(self):
+        if self.frame_index >= len(self.files):
+            return False, None, None
+        frame = cv2.imread(self.files[self.frame_index])
+        timestamp = self.frame_index / self.fps
+        self.frame_index += 1
+        return frame is not None, frame, timestamp
+
+    def release(self):
+        self.files = []
+
+class LandmarkSource:
+    """
+    Replays landmarks recorded as an (N, 21, 3) array of normalized coordinates.
+    Frames without a hand are stored as NaN. An .npz may also carry 'fps' and
+    'frame_size' (width, height) of the original video.
+    """
+    is_live = False
+    provides_landmarks = True
+
+    def __init__(self, path_or_array, fps=30.0, frame_size=(640, 480)):
+        self.path_or_array = path_or_array
+        self.fps = fps
+        self.frame_size = frame_size
+        self.landmarks = None
+        self.frame_index = 0
+
+    def open(self):
+        data = self.path_or_array
+        try:
+            if isinstance(data, str):
+                data = np.load(data)
+            if hasattr(data, "files"):  # .npz archive
+                if "fps" in data.files:
+                    self.fps = float(data["fps"])
+                if "frame_size" in data.files:
+                    self.frame_size = tuple(int(v) for v in data["frame_size"])
+                data = data["landmarks"]
+        except (OSError, KeyError, ValueError) as e:
+            log.error("Could not load landmarks: %s", e)
+            return False
+
+        self.landmarks = np.asarray(data, dtype=np.float32).reshape(-1, 21, 3)
+        self.frame_index = 0
+        return True
+
+    def isOpened(self):
+        return self.landmarks is not None and self.frame_index < len(self.landmarks)
+
+    def read(self):
+        if not self.isOpened():
+            return False, None, None
+        points = self.landmarks[self.frame_index]
+        timestamp = self.frame_index / self.fps
+        self.frame_index += 1
+        if np.isnan(points).any():
+            points = None
+        return True, points, timestamp
+
+    def release(self):
+        self.landmarks = None
+
+def open_source(spec):
+    """
+    Builds a source from a CLI-style spec (does not open it):
+    int or 'camera:N' -> CameraSource, folder -> ImageDirectorySource,
+    .npy/.npz -> LandmarkSource, anything else -> VideoFileSource.
+    """
+    if isinstance(spec, int):
+        return CameraSource(spec)
+    if spec.startswith("camera:"):
+        return CameraSource(int(spec.split(":", 1)[1] or 0))
+    if os.path.isdir(spec):
+        return ImageDirectorySource(spec)
+    if spec.lower().endswith(LANDMARK_EXTENSIONS):
+        return LandmarkSource(spec)
+    return VideoFileSource(spec)
@@ -0,0 +1,157 @@
+"""
+=============================================================================
+MODULE: gesture_classifier.py
+DESCRIPTION:
+    Pure NumPy gesture classification (no camera, no MediaPipe, no Qt), so it
+    can be tested and benchmarked on recorded landmark arrays.
+
+    Pipeline:
+    1. Features: All 21 hand landmarks -> bend angles of the 4 long fingers
+       (wrist/MCP/PIP/DIP/TIP chain). Angles are rotation-invariant, so a
+       tilted or sideways hand classifies the same as an upright one.
+    2. Smoothing: A short rolling window of 'fist scores' with hysteresis
+       thresholds, so a single noisy frame can't flip FIST <-> OPEN.
+    3. Edges: GestureEdgeDetector turns OPEN->FIST into 'GRAB' and
+       FIST->OPEN into 'DROP' (only while holding).
+
+USAGE:
+    classifier = GestureClassifier()
+    state, confidence = classifier.update(points)   # points: (21, 3) array or None
+    event = edges.feed(state)                       # 'GRAB', 'DROP' or None
+=============================================================================
+"""
+
+#import statements
+from collections import deque
+import numpy as np
+
+# MediaPipe landmark indices: Wrist + (MCP, PIP, DIP, TIP) for index, middle, ring, pinky
+WRIST = 0
+FINGER_CHAINS = np.array([
+    [0, 5, 6, 7, 8],
+    [0, 9, 10, 11, 12],
+    [0, 13, 14, 15, 16],
+    [0, 17, 18, 19, 20],
+])
+
+# Total bend (MCP + PIP + DIP) of a fully curled finger, in radians (~250 degrees)
+FULL_CURL = np.radians(250)
+
+# Mean curl that counts as clearly open / clearly closed
+OPEN_CURL = 0.25
+FIST_CURL = 0.60
+
+def landmarks_to_array(landmarks, width=1.0, height=1.0):
+    """
+    Converts MediaPipe landmarks (anything with .x, .y, .z) to a (21, 3) float32 array.
+    Pass the image size to undo the non-square normalization of x and y.
+    """
+    return np.array(
+        [(lm.x * width, lm.y * height, lm.z * width) for lm in landmarks],
+        dtype=np.float32
+    )
+
+def finger_curl(points):
+    """
+    Curl of the 4 long fingers, 0.0 = straight, 1.0 = fully folded.
+    Works on a single hand (21, 3) or a batch (..., 21, 3).
+    """
+    points = np.asarray(points, dtype=np.float32)
+    chains = points[..., FINGER_CHAINS, :]   # (..., 4 fingers, 5 joints, 3)
+    bones = np.diff(chains, axis=-2)          # (..., 4, 4 bones, 3)
+
+    # Angle between consecutive bones = bend at MCP, PIP and DIP
+    a, b = bones[..., :-1, :], bones[..., 1:, :]
+    dot = np.sum(a * b, axis=-1)
+    norms = np.linalg.norm(a, axis=-1) * np.linalg.norm(b, axis=-1)
+    cos = np.clip(dot / np.maximum(norms, 1e-9), -1.0, 1.0)
+    bend = np.arccos(cos).sum(axis=-1)        # (..., 4)
+
+    return np.clip(bend / FULL_CURL, 0.0, 1.0)
+
+def fist_score(points):
+    """Probability-like score (0 = open palm, 1 = fist) from the mean finger curl."""
+    curl = finger_curl(points).mean(axis=-1)
+    return np.clip((curl - OPEN_CURL) / (FIST_CURL - OPEN_CURL), 0.0, 1.0)
+
+class GestureClassifier:
+    def __init__(self, window=3, fist_threshold=0.65, open_threshold=0.35):
+        self.window = window
+        self.fist_threshold = fist_threshold  # Smoothed score needed to enter FIST
+        self.open_threshold = open_threshold  # Smoothed score needed to enter OPEN
+        self.reset()
+
+    def reset(self):
+        self._scores = deque(maxlen=self.window)
+        self.state = "UNKNOWN"
+        self.confidence = 0.0
+
+    def update(self, points):
+        """
+        Feeds one frame of landmarks (or None when no hand is visible).
+        Returns: (state, confidence) where state is 'FIST', 'OPEN' or 'UNKNOWN'.
+        """
+        if points is None:
+            # Hand lost: keep the last state, but don't mix stale scores with new ones
+            self._scores.clear()
+            self.confidence = 0.0
+            return self.state, self.confidence
+
+        self._scores.append(float(fist_score(points)))
+        scores = np.fromiter(self._scores, dtype=np.float32)
+        smoothed = float(scores.mean())
+
+        # Hysteresis: the in-between band keeps whatever we had before
+        if smoothed >= self.fist_threshold:
+            self.state = "FIST"
+        elif smoothed <= self.open_threshold:
+            self.state = "OPEN"
+
+        # Distance from the decision boundary, reduced when the window disagrees
+        margin = abs(smoothed - 0.5) * 2
+        self.confidence = float(np.clip(margin * (1.0 - scores.std() * 2), 0.0, 1.0))
+        return self.state, self.confidence
+
+class GestureEdgeDetector:
+    """Turns a stream of FIST/OPEN states into GRAB/DROP events."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.is_holding = False
+        self.last_gesture = "UNKNOWN"
+
+    def feed(self, gesture):
+        """Returns 'GRAB', 'DROP' or None."""
+        event = None
+        if gesture == "UNKNOWN" or gesture == self.last_gesture:
+            return event
+
+        if self.last_gesture == "OPEN" and gesture == "FIST" and not self.is_holding:
+            self.is_holding = True
+            event = "GRAB"
+        elif self.last_gesture == "FIST" and gesture == "OPEN" and self.is_holding:
+            self.is_holding = False
+            event = "DROP"
+
+        self.last_gesture = gesture
+        return event
+
+def classify_sequence(frames, classifier=None):
+    """
+    Runs recorded landmarks through the classifier + edge detector.
+    - frames: Iterable of (21, 3) arrays or None (no hand), e.g. an (N, 21, 3) array.
+    Returns: List of (frame_index, 'GRAB' | 'DROP').
+    """
+    classifier = classifier or GestureClassifier()
+    edges = GestureEdgeDetector()
+    events = []
+    for i, points in enumerate(frames):
+        if points is not None and np.isnan(points).any():
+            points = None
+        state, _ = classifier.update(points)
+        event = edges.feed(state)
+        if event:
+            events.append((i, event))
+    return events
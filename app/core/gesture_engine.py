@@ -5,164 +5,319 @@ DESCRIPTION:
     Encapsulates all MediaPipe and OpenCV logic.
     
     Responsibilities:
-    1. Camera Management: Safely opens/releases the webcam.
-    2. Hand Tracking: Uses MediaPipe Hands to detect landmarks.
-    3. Gesture Recognition: Analyzes finger coordinates (Index & Middle Tip vs PIP)
-       to classify 'FIST' (Grab) vs 'OPEN' (Drop) states.
+    1. Camera Management: One warm camera session (camera_session.py) shared by
+       the health check and the loop, or any other frame source from
+       frame_sources.py (video file, images, landmarks).
+    2. Hand Tracking: Uses MediaPipe Hands to detect landmarks on downscaled,
+       ROI-cropped frames (see frame_pipeline.py), paced by inference cost.
+    3. Gesture Recognition: Converts all 21 landmarks to finger curl features and
+       classifies 'FIST' (Grab) vs 'OPEN' (Drop) over a short rolling window
+       with hysteresis (see gesture_classifier.py).
     4. Event Debouncing: Prevents rapid-fire signal spamming.
+    5. Motion Gating: Skips inference on static frames and idles the loop when
+       nobody is in front of the camera (see motion_gate.py).
+
+    The per-frame work lives in gesture_processor.py (Qt-free, used by the
+    offline benchmark too); this class owns the thread and the signals.
 
 SIGNALS:
     - gesture_detected(str): Emits 'GRAB' or 'DROP'.
+    - error_occurred(str): The loop (or worker) failed; gestures stopped.
+    - camera_checked(bool, str): Result of check_camera() (healthy, message).
 
 THREADING:
-    Runs in a separate QThread to prevent freezing the UI during video processing.
+    GestureEngine runs in a separate thread to prevent freezing the UI during video processing.
+    RemoteGestureEngine (same interface) runs capture + inference in a child
+    process instead and only receives GRAB/DROP events (see inference_worker.py).
 =============================================================================
 """
 #import statements
 
 import cv2
-import mediapipe as mp
 import time
 import threading
-import numpy as np
-from PyQt6.QtCore import QObject, pyqtSignal
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+
+from app.core.camera_session import CameraSession, CAMERA_GRACE_PERIOD
+from app.core.gesture_processor import GestureProcessor, get_hands
+from app.core.logging_setup import get_logger
+from app.core.metrics import metrics
+
+log = get_logger("gesture")
+
+def _check_in_background(engine):
+    """
+    Runs engine.diagnose_camera() on a daemon thread and emits camera_checked.
+    The check reads frames for up to several seconds; it must never run on the UI thread.
+    One check at a time: a request while one runs gets that check's result.
+    """
+    if engine._check_thread is not None and engine._check_thread.is_alive():
+        return
+
+    def run():
+        try:
+            is_healthy, message = engine.diagnose_camera()
+        except Exception as e:
+            log.error("Camera check failed: %s", e)
+            is_healthy, message = False, f"Camera check failed: {e}"
+        engine.camera_checked.emit(is_healthy, message)
+
+    engine._check_thread = threading.Thread(target=run, name="MyDrop-CameraCheck", daemon=True)
+    engine._check_thread.start()
+
+# How often the loop logs its duty cycle (seconds)
+STATS_INTERVAL = 60
+
+# start() while the previous loop is still winding down (e.g. stuck in a camera read)
+START_RETRY_MS = 500
+START_RETRIES = 10
 
 class GestureEngine(QObject):
     # --- SIGNALS ---
     # These let the engine talk to the UI thread
     gesture_detected = pyqtSignal(str)  # Sends "GRAB" or "DROP"
     error_occurred = pyqtSignal(str)    # Sends error messages
+    camera_checked = pyqtSignal(bool, str) # (is_healthy, message) of check_camera()
 
-    def __init__(self):
+    def __init__(self, source=None, camera_session=None):
         super().__init__()
         self.running = False
-        self.cap = None
-        
-        # Initialize MediaPipe (The AI)
-        self.mp_hands = mp.solutions.hands
-        self.hands = self.mp_hands.Hands(
-            static_image_mode=False,
-            max_num_hands=1,
-            min_detection_confidence=0.7,
-            min_tracking_confidence=0.7
-        )
+        self.thread = None
+        self._start_retries = 0 # > 0 while a deferred start() is scheduled
+        self._check_thread = None
+        # Custom frame source (video/images/landmarks), None = the webcam session
+        self.source = source
+        self.camera = camera_session or CameraSession(0)
         
-        # State Tracking
-        self.is_holding = False
-        self.last_gesture = "UNKNOWN"
+        # Frame pipeline; MediaPipe (The AI) is attached when the loop starts,
+        # usually already built by the startup prewarm thread
+        self.processor = GestureProcessor()
+
+    def check_camera(self):
+        """diagnose_camera() on a background thread; the result arrives as camera_checked."""
+        _check_in_background(self)
 
     def diagnose_camera(self):
-        """ (Your existing healthy/closed shutter check) """
-        try:
-            time.sleep(0.2)
-            temp_cap = cv2.VideoCapture(0)
-            if not temp_cap.isOpened(): return False, "No camera."
-            for _ in range(20): temp_cap.read() # Warmup
-            ret, frame = temp_cap.read()
-            temp_cap.release()
-            if not ret: return False, "Camera read error."
-            
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            avg = np.mean(gray)
-            if avg < 30: return False, "Camera too dark/closed."
-            return True, "Healthy"
-        except Exception as e:
-            return False, str(e)
+        """
+        Opens the camera (or reuses the warm one) and runs the healthy/closed shutter
+        check on the live stream. The gesture loop then reuses the same handle.
+        Blocking: the UI uses check_camera().
+        """
+        if self.source is not None:
+            return True, "Healthy" # Replay sources have no shutter
+        is_healthy, message = self.camera.health_check()
+        if not is_healthy:
+            self.camera.close()
+        return is_healthy, message
 
     def start(self):
         """Starts the processing loop in a separate thread"""
-        if self.running: return
+        if self.running or self._start_retries: return
+        # A previous loop may still be winding down; never run two on one camera
+        if self.thread and self.thread.is_alive():
+            self.thread.join(timeout=1.0)
+        if self.thread and self.thread.is_alive():
+            log.warning("Previous gesture loop still running, starting once it has exited.")
+            self._start_retries = 1
+            QTimer.singleShot(START_RETRY_MS, self._retry_start)
+            return
+        self._launch()
+
+    def _retry_start(self):
+        """Deferred start(): polls (no join, the UI thread must not block) until the old loop is gone."""
+        if not self._start_retries:
+            return # stop() was called in the meantime
+        if self.thread and self.thread.is_alive():
+            if self._start_retries >= START_RETRIES:
+                self._start_retries = 0
+                log.error("Previous gesture loop did not exit, not starting a second one.")
+                self.error_occurred.emit("Camera is still busy.")
+                return
+            self._start_retries += 1
+            QTimer.singleShot(START_RETRY_MS, self._retry_start)
+            return
+        self._start_retries = 0
+        self._launch()
+
+    def _launch(self):
         self.running = True
         
         # Run the loop in a background thread so the GUI doesn't freeze
         self.thread = threading.Thread(target=self._process_loop, daemon=True)
         self.thread.start()
 
-    def stop(self):
-        """Stops the loop safely"""
+    def stop(self, keep_warm=True):
+        """
+        Stops the loop safely (the loop thread hands the camera back on exit).
+        keep_warm=False closes the camera right away instead of after the grace period.
+        """
         self.running = False
-        if self.cap:
-            self.cap.release()
+        self._start_retries = 0
+        if not keep_warm:
+            if self.thread and self.thread.is_alive() and self.thread is not threading.current_thread():
+                self.thread.join(timeout=1.0)
+            self.camera.close()
+        elif self.source is None and not (self.thread and self.thread.is_alive()):
+            # Checked but never started (sender mode cancelled): no loop will hand the camera back
+            self.camera.release()
 
     def _process_loop(self):
         """
         The main infinite loop running in the background thread.
-        - Reads frame from Camera.
-        - Passes frame to MediaPipe.
-        - Determines logical gesture state.
+        - Reads frame from the source (Camera by default).
+        - Passes frame to the GestureProcessor (gate -> MediaPipe -> classifier).
         - Emits signal only on state *change* (Edge Detection).
         - Handles errors (e.g., Camera disconnect) gracefully.
         """
-        print("[Core] Starting Gesture Loop...")
+        log.info("Starting Gesture Loop...")
+        if self.processor.hands is None:
+            try:
+                self.processor.hands = get_hands()
+            except Exception as e:
+                log.error("Could not load hand model: %s", e)
+                self.error_occurred.emit("Could not load hand model.")
+                self.running = False
+                return
         
-        # Open Camera
-        self.cap = cv2.VideoCapture(0)
+        # Open Source (the camera is usually still open from diagnose_camera)
+        if self.source is not None:
+            source = self.source if self.source.open() else None
+        else:
+            source = self.camera.acquire()
+        if source is None:
+            log.error("Could not open frame source.")
+            self.error_occurred.emit("Could not open camera.")
+            self.running = False
+            return
+        self.processor.reset()
+        last_report = time.monotonic()
+        last_timestamp = last_report
         
         while self.running:
             # SAFETY CHECK 1: Is camera still existing?
-            if self.cap is None or not self.cap.isOpened():
+            if not source.isOpened():
                 break
 
             try:
+                loop_start = time.perf_counter()
+
                 # SAFETY CHECK 2: Catch the specific MSMF error here
-                success, image = self.cap.read()
+                success, data, timestamp = source.read()
                 
                 if not success:
+                    if not source.is_live:
+                        break # End of recording
                     # If read fails, wait a bit and try again (don't crash)
                     time.sleep(0.01)
                     continue
 
-                # Performance: Mark writable false
-                image.flags.writeable = False
-                image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-                results = self.hands.process(image)
+                last_timestamp = timestamp
+                now = time.monotonic()
+                if now - last_report >= STATS_INTERVAL:
+                    log.info("%s", self.processor.report(timestamp))
+                    last_report = now
 
-                # --- Logic ---
-                current_gesture = "UNKNOWN"
-                
-                if results.multi_hand_landmarks:
-                    hand_landmarks = results.multi_hand_landmarks[0]
-                    
-                    index_tip_y = hand_landmarks.landmark[self.mp_hands.HandLandmark.INDEX_FINGER_TIP].y
-                    index_pip_y = hand_landmarks.landmark[self.mp_hands.HandLandmark.INDEX_FINGER_PIP].y
-                    middle_tip_y = hand_landmarks.landmark[self.mp_hands.HandLandmark.MIDDLE_FINGER_TIP].y
-                    middle_pip_y = hand_landmarks.landmark[self.mp_hands.HandLandmark.MIDDLE_FINGER_PIP].y
-
-                    if (index_tip_y > index_pip_y and middle_tip_y > middle_pip_y):
-                        current_gesture = "FIST"
-                    else:
-                        current_gesture = "OPEN"
-
-                    if current_gesture != self.last_gesture:
-                        if self.last_gesture == "OPEN" and current_gesture == "FIST":
-                            if not self.is_holding:
-                                self.is_holding = True
-                                print("[Core] GRAB Detected!")
-                                self.gesture_detected.emit("GRAB")
-
-                        elif self.last_gesture == "FIST" and current_gesture == "OPEN":
-                            if self.is_holding:
-                                self.is_holding = False
-                                print("[Core] DROP Detected!")
-                                self.gesture_detected.emit("DROP")
-                        
-                        self.last_gesture = current_gesture
-
-                time.sleep(0.01)
+                event = self.processor.process(
+                    data, timestamp,
+                    provides_landmarks=source.provides_landmarks,
+                    frame_size=getattr(source, "frame_size", None)
+                )
+                metrics.incr("gesture.frames")
+                if self.processor.last_inference_time is not None:
+                    metrics.observe("gesture.inference", self.processor.last_inference_time)
+                if event:
+                    metrics.incr(f"gesture.{event.lower()}")
+                    log.info("%s Detected!", event)
+                    self.gesture_detected.emit(event)
+
+                # Adaptive frame rate (slow polling when idle) instead of a fixed sleep
+                if source.is_live:
+                    time.sleep(self.processor.next_delay(time.perf_counter() - loop_start))
 
             except cv2.error:
                 # If OpenCV crashes mid-read, just exit the loop
-                print("[Core] Camera released safely.")
+                log.info("Camera released safely.")
                 break
             except Exception as e:
-                print(f"[Core] Loop Error: {e}")
+                log.error("Loop Error: %s", e)
                 break
 
-        # Cleanup
-        if self.cap:
-            self.cap.release()
-        print("[Core] Gesture Loop Stopped.")
+        # Cleanup (the camera stays warm for a grace period)
+        if self.source is not None:
+            source.release()
+        else:
+            self.camera.release()
+        self.running = False
+        log.info("%s", self.processor.report(time.monotonic() if source.is_live else last_timestamp))
+        log.info("Gesture Loop Stopped.")
+
+class RemoteGestureEngine(QObject):
+    """Drop-in replacement for GestureEngine that runs the pipeline out of process."""
+    gesture_detected = pyqtSignal(str)
+    error_occurred = pyqtSignal(str)
+    camera_checked = pyqtSignal(bool, str)
+
+    def __init__(self, camera_index=0, grace_period=CAMERA_GRACE_PERIOD):
+        super().__init__()
+        from app.core.inference_worker import InferenceWorkerHost
+        self.running = False
+        self.grace_period = grace_period
+        self.worker = InferenceWorkerHost(camera_index, on_message=self._on_worker_message)
+        self._shutdown_timer = None
+        self._check_thread = None
+
+    @property
+    def stats(self):
+        return self.worker.stats
+
+    def check_camera(self):
+        """diagnose_camera() on a background thread; the result arrives as camera_checked."""
+        _check_in_background(self)
+
+    def diagnose_camera(self):
+        """Starts (or reuses) the worker and checks its frames from shared memory. Blocking."""
+        self._cancel_shutdown()
+        self.worker.ensure_started()
+        is_healthy, message = self.worker.health_check()
+        if not is_healthy:
+            self.worker.shutdown()
+        return is_healthy, message
+
+    def start(self):
+        if self.running: return
+        self._cancel_shutdown()
+        self.worker.ensure_started()
+        self.running = True
+        self.worker.set_active(True)
+        log.info("Gesture worker active.")
+
+    def stop(self, keep_warm=True):
+        """Pauses inference; the worker (and camera) shut down after the grace period."""
+        self.running = False
+        self.worker.set_active(False)
+        self._cancel_shutdown()
+        if keep_warm and self.grace_period > 0:
+            self._shutdown_timer = threading.Timer(self.grace_period, self.worker.shutdown)
+            self._shutdown_timer.daemon = True
+            self._shutdown_timer.start()
+        else:
+            self.worker.shutdown()
+
+    def _cancel_shutdown(self):
+        if self._shutdown_timer is not None:
+            self._shutdown_timer.cancel()
+            self._shutdown_timer = None
+
+    def _on_worker_message(self, kind, payload):
+        # Called from the worker host's reader thread
+        if kind == "EVENT" and self.running:
+            metrics.incr(f"gesture.{payload.lower()}")
+            log.info("%s Detected! (worker)", payload)
+            self.gesture_detected.emit(payload)
+        elif kind == "STATS":
+            for name in ("duty_cycle", "target_fps", "avg_inference_ms"):
+                metrics.set_gauge(f"gesture.{name}", payload.get(name, 0.0))
+        elif kind == "ERROR":
+            log.error("Gesture worker error: %s", payload)
+            self.error_occurred.emit(payload)
 
-        # Cleanup when loop ends
-        self.cap.release()
-        print("[Core] Gesture Loop Stopped.")
\ No newline at end of file
@@ -0,0 +1,124 @@
+"""
+=============================================================================
+MODULE: gesture_processor.py
+DESCRIPTION:
+    The per-frame gesture pipeline, without threads, camera or Qt.
+
+    GestureEngine (live app) and the offline benchmark both drive this class:
+    frame -> motion gate -> downscale/ROI -> MediaPipe -> classifier -> edges.
+    Landmark sources skip straight to the classifier.
+
+USAGE:
+    processor = GestureProcessor(create_hands())
+    event = processor.process(data, timestamp, provides_landmarks=False)
+    time.sleep(processor.next_delay(elapsed))
+=============================================================================
+"""
+
+#import statements
+import threading
+import time
+import numpy as np
+
+from app.core.frame_pipeline import AdaptiveFramePipeline
+from app.core.motion_gate import MotionGate
+from app.core.gesture_classifier import GestureClassifier, GestureEdgeDetector, landmarks_to_array
+
+def create_hands():
+    """Builds the MediaPipe Hands model (imported here so landmark replays don't need it)."""
+    import mediapipe as mp
+    return mp.solutions.hands.Hands(
+        static_image_mode=False,
+        max_num_hands=1,
+        min_detection_confidence=0.7,
+        min_tracking_confidence=0.7
+    )
+
+_hands_lock = threading.Lock()
+_shared_hands = None
+
+def get_hands():
+    """
+    The app's MediaPipe Hands model, built on first use (thread-safe).
+    The startup prewarm thread calls this so the first sender session starts instantly.
+    """
+    global _shared_hands
+    with _hands_lock:
+        if _shared_hands is None:
+            _shared_hands = create_hands()
+        return _shared_hands
+
+class GestureProcessor:
+    def __init__(self, hands=None):
+        self.hands = hands
+
+        # Downscaling / ROI cropping / frame pacing
+        self.pipeline = AdaptiveFramePipeline()
+        # Skips inference on static frames, idles when nobody is there
+        self.motion_gate = MotionGate()
+        # State Tracking (multi-frame classifier + GRAB/DROP edge detection)
+        self.classifier = GestureClassifier()
+        self.edges = GestureEdgeDetector()
+
+        self.last_inference_time = None  # None when the last frame skipped inference
+
+    def reset(self):
+        self.pipeline.reset()
+        self.motion_gate.reset()
+        self.classifier.reset()
+        self.edges.reset()
+        self.last_inference_time = None
+
+    @property
+    def is_holding(self):
+        return self.edges.is_holding
+
+    def process(self, data, now, provides_landmarks=False, frame_size=None):
+        """
+        Runs one frame (or one set of recorded landmarks) through the pipeline.
+        Returns: 'GRAB', 'DROP' or None.
+        """
+        if provides_landmarks:
+            self.last_inference_time = None
+            points = data
+            if points is not None:
+                width, height = frame_size or (1, 1)
+                points = points * np.array([width, height, width], dtype=np.float32)
+            return self._classify(points)
+
+        # Power saving: nothing moved -> no inference
+        if not self.motion_gate.check(data, now):
+            self.last_inference_time = None
+            return None
+
+        # Performance: Downscale / crop to the hand before color conversion + inference
+        image = self.pipeline.prepare(data)
+        infer_start = time.perf_counter()
+        results = self.hands.process(image)
+        self.last_inference_time = time.perf_counter() - infer_start
+
+        points = None
+        if results.multi_hand_landmarks:
+            points = landmarks_to_array(results.multi_hand_landmarks[0].landmark)
+            self.pipeline.update(points, self.last_inference_time)
+            self.motion_gate.mark_active(now)
+
+            # Back to pixel proportions so the curl angles aren't skewed
+            height, width = image.shape[:2]
+            points = points * np.array([width, height, width], dtype=np.float32)
+        else:
+            self.pipeline.update(None, self.last_inference_time)
+
+        return self._classify(points)
+
+    def next_delay(self, elapsed):
+        """Seconds to wait before the next frame (adaptive FPS, slow polling when idle)."""
+        active_delay = self.pipeline.next_delay(elapsed)
+        return max(0.0, self.motion_gate.poll_interval(active_delay + elapsed) - elapsed)
+
+    def report(self, now):
+        return f"{self.motion_gate.report(now)}, target FPS {self.pipeline.target_fps:.1f}"
+
+    def _classify(self, points):
+        current_gesture, _ = self.classifier.update(points)
+        return self.edges.feed(current_gesture)
@@ -0,0 +1,80 @@
+"""
+=============================================================================
+MODULE: grab_worker.py
+DESCRIPTION:
+    Runs FileGrabber off the Qt thread.
+
+    A GRAB used to block the GUI thread for the clipboard waits plus the whole
+    zip job. Now every grab is a job on a single-thread worker pool (the
+    clipboard is global, so grabs never run in parallel).
+
+    - start(): Queues a new grab job (cancelling the previous one) and returns its id.
+    - cancel(): Stops the running job (between clipboard steps / zip members).
+    - Results come back through signals, tagged with the job id so the UI can
+      ignore answers from jobs it already cancelled.
+
+SIGNALS:
+    - scanned(int, dict): job id, {"file_count", "total_bytes"} of the selection.
+    - progress(int, int): job id, percent bundled.
+    - finished(int, str, str): job id, file path ('' on failure), error ('' on success).
+=============================================================================
+"""
+
+#import statements
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from PyQt6.QtCore import QObject, pyqtSignal
+
+class GrabWorker(QObject):
+    scanned = pyqtSignal(int, dict)
+    progress = pyqtSignal(int, int)
+    finished = pyqtSignal(int, str, str)
+
+    def __init__(self):
+        super().__init__()
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="MyDrop-Grab")
+        self._lock = threading.Lock()
+        self._job_id = 0
+        self._cancel_event = None
+        self._future = None
+
+    @property
+    def is_busy(self):
+        """True while a grab is queued or running."""
+        return self._future is not None and not self._future.done()
+
+    def start(self):
+        """Cancels any running grab and queues a new one. Returns the job id."""
+        with self._lock:
+            if self._cancel_event is not None:
+                self._cancel_event.set()
+            self._job_id += 1
+            self._cancel_event = threading.Event()
+            self._future = self._pool.submit(self._run, self._job_id, self._cancel_event)
+            return self._job_id
+
+    def cancel(self):
+        with self._lock:
+            if self._cancel_event is not None:
+                self._cancel_event.set()
+
+    def shutdown(self):
+        self.cancel()
+        self._pool.shutdown(wait=False)
+
+    def _run(self, job_id, cancel_event):
+        """Runs on the pool thread."""
+        if cancel_event.is_set():
+            self.finished.emit(job_id, "", "Cancelled")
+            return
+
+        from app.core.file_grabber import FileGrabber
+        try:
+            filepath, error = FileGrabber.get_grabbed_content(
+                progress=lambda percent: self.progress.emit(job_id, percent),
+                cancel_event=cancel_event,
+                on_scan=lambda summary: self.scanned.emit(job_id, summary)
+            )
+        except Exception as e:
+            filepath, error = None, f"Grab Error: {e}"
+        self.finished.emit(job_id, filepath or "", error or "")
@@ -0,0 +1,361 @@
+"""
+=============================================================================
+MODULE: inference_worker.py
+DESCRIPTION:
+    Optional out-of-process gesture pipeline (python main.py --gesture-process).
+
+    Capture + MediaPipe run in a child process, so inference no longer fights
+    the Qt event loop and the transfer threads for the GIL.
+
+    Data Flow:
+    - Frames: The child captures straight into a ring of slots in
+      multiprocessing.shared_memory (cv2 writes into the slot buffer, no copy).
+      The parent maps the same memory and reads frames zero-copy (used for the
+      camera health check). Frames are published while MediaPipe is still
+      loading, so the check doesn't wait for the model.
+    - Events: Only compact messages come back over a queue:
+        ("EVENT", "GRAB" | "DROP"), ("STATS", {...}), ("ERROR", message),
+        ("LOG", LogRecord) - the worker's log records, written by the parent's logger
+    - Control: Shared flags for active/paused and stop, plus a heartbeat.
+
+    Watchdog:
+    - A parent thread restarts the worker if it crashes or its heartbeat stalls,
+      with a restart budget so a broken camera/driver doesn't loop forever.
+
+    This module is Qt-free on purpose: the child process imports it directly.
+=============================================================================
+"""
+
+#import statements
+import logging
+import logging.handlers
+import multiprocessing
+import queue
+import threading
+import time
+import numpy as np
+from multiprocessing import shared_memory
+from app.core.logging_setup import get_logger, apply_levels, active_levels, ROOT_NAME
+
+log = get_logger("gesture")
+
+# Frame ring in shared memory (sized for up to 1080p BGR)
+MAX_FRAME_BYTES = 1920 * 1080 * 3
+FRAME_SLOTS = 3
+
+# Layout of the shared header (array of doubles)
+HDR_LATEST, HDR_COUNT, HDR_HEIGHT, HDR_WIDTH, HDR_HEARTBEAT = range(5)
+HEADER_SIZE = 5
+
+STATS_INTERVAL = 2.0      # Seconds between STATS messages
+HEARTBEAT_TIMEOUT = 5.0   # Worker considered hung after this many seconds of silence
+STARTUP_TIMEOUT = 30.0    # Loading MediaPipe in a fresh process can take a while
+MAX_RESTARTS = 5          # ... within RESTART_WINDOW seconds
+RESTART_WINDOW = 60.0
+
+def frame_view(buf, slot, height, width):
+    """NumPy view of one frame slot (no copy)."""
+    return np.ndarray((height, width, 3), dtype=np.uint8, buffer=buf, offset=slot * MAX_FRAME_BYTES)
+
+# --- CHILD PROCESS ---
+class _EventQueueLogHandler(logging.handlers.QueueHandler):
+    """Sends the worker's log records to the parent over the events queue."""
+
+    def enqueue(self, record):
+        self.queue.put_nowait(("LOG", record))
+
+def _setup_worker_logging(events, log_levels):
+    root = logging.getLogger(ROOT_NAME)
+    root.handlers[:] = [_EventQueueLogHandler(events)]
+    root.propagate = False
+    apply_levels(log_levels)
+
+def worker_main(shm_name, header, events, active, stop, camera_index, log_levels=""):
+    """Entry point of the child process: capture -> shared memory -> inference."""
+    _setup_worker_logging(events, log_levels)
+    from app.core.frame_sources import CameraSource
+    from app.core.gesture_processor import GestureProcessor, create_hands
+
+    # Spawned children share the parent's resource tracker, so attaching here
+    # doesn't add a second owner: the parent still unlinks the segment.
+    shm = shared_memory.SharedMemory(name=shm_name)
+    source = CameraSource(camera_index)
+    view = None
+    try:
+        if not source.open():
+            events.put(("ERROR", "No camera."))
+            return
+
+        # Learn the frame size from the first frame
+        success, frame, _ = source.read()
+        if not success:
+            events.put(("ERROR", "Camera read error."))
+            return
+        height, width = frame.shape[:2]
+        if height * width * 3 > MAX_FRAME_BYTES:
+            events.put(("ERROR", f"Camera resolution {width}x{height} is too large."))
+            return
+        header[HDR_HEIGHT], header[HDR_WIDTH] = height, width
+
+        # The model loads on the side (several seconds on a cold start) while frames already
+        # reach shared memory, so the parent's camera check doesn't wait for MediaPipe
+        processor = GestureProcessor()
+        model = {}
+        def load_model():
+            try:
+                model["hands"] = create_hands()
+            except Exception as e:
+                model["error"] = f"Could not load hand model: {e}"
+        loader = threading.Thread(target=load_model, name="MyDrop-ModelLoad", daemon=True)
+        loader.start()
+        was_active = False
+        slot = 0
+        next_stats = time.monotonic() + STATS_INTERVAL
+
+        while not stop.is_set():
+            loop_start = time.perf_counter()
+            header[HDR_HEARTBEAT] = time.time()
+
+            # Capture straight into the shared slot
+            view = frame_view(shm.buf, slot, height, width)
+            success, frame = source.cap.read(view)
+            if not success:
+                time.sleep(0.01)
+                continue
+            if frame.shape != view.shape:
+                events.put(("ERROR", "Camera resolution changed."))
+                return
+            if not np.shares_memory(frame, view):
+                view[...] = frame # Backend allocated its own buffer: one copy
+            header[HDR_LATEST] = slot
+            header[HDR_COUNT] += 1
+            slot = (slot + 1) % FRAME_SLOTS
+
+            if processor.hands is None:
+                if "error" in model:
+                    events.put(("ERROR", model["error"]))
+                    return
+                processor.hands = model.get("hands")
+
+            # Paused (sender mode off) or model still loading: keep the camera warm, skip inference
+            if not active.value or processor.hands is None:
+                was_active = False
+                time.sleep(0.1)
+                continue
+            if not was_active:
+                processor.reset()
+                was_active = True
+
+            now = time.monotonic()
+            event = processor.process(view, now)
+            if event:
+                events.put(("EVENT", event))
+
+            if now >= next_stats:
+                next_stats = now + STATS_INTERVAL
+                events.put(("STATS", {
+                    "duty_cycle": processor.motion_gate.duty_cycle,
+                    "target_fps": processor.pipeline.target_fps,
+                    "avg_inference_ms": (processor.pipeline.avg_inference or 0.0) * 1000,
+                    "frames": int(header[HDR_COUNT]),
+                }))
+
+            time.sleep(processor.next_delay(time.perf_counter() - loop_start))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        view = frame = None
+        source.release()
+        shm.close()
+
+# --- PARENT PROCESS ---
+class InferenceWorkerHost:
+    def __init__(self, camera_index=0, on_message=None):
+        self.camera_index = camera_index
+        self.on_message = on_message  # Called from a background thread with (kind, payload)
+
+        # 'spawn' everywhere: never fork a process that has Qt and sockets running
+        self._ctx = multiprocessing.get_context("spawn")
+        self._lock = threading.Lock()
+        self._shm = None
+        self._header = None
+        self._events = None
+        self._active = self._ctx.Value("b", 0, lock=False)
+        self._stop = None
+        self.process = None
+        self._wanted = False
+        self._started_at = 0.0
+        self._restarts = []
+        self._threads = {} # Loop name -> thread
+        self.stats = {}
+
+    @property
+    def is_running(self):
+        return self.process is not None and self.process.is_alive()
+
+    def ensure_started(self):
+        with self._lock:
+            if self._wanted and self.is_running:
+                return
+            if self._shm is None:
+                self._shm = shared_memory.SharedMemory(create=True, size=MAX_FRAME_BYTES * FRAME_SLOTS)
+                self._header = self._ctx.Array("d", HEADER_SIZE, lock=False)
+            self._wanted = True
+            self._spawn_locked()
+
+            # One watchdog + one reader, even across shutdown/restart cycles. Each is checked on its
+            # own: the watchdog returns as soon as it gives up while the reader may still be draining
+            for name, target in (("watchdog", self._watchdog_loop), ("reader", self._reader_loop)):
+                thread = self._threads.get(name)
+                if thread is None or not thread.is_alive():
+                    thread = threading.Thread(target=target, name=f"MyDrop-Gesture-{name}", daemon=True)
+                    self._threads[name] = thread
+                    thread.start()
+
+    def set_active(self, active):
+        self._active.value = 1 if active else 0
+
+    def latest_frame_brightness(self, last_count):
+        """
+        Mean brightness of the newest shared frame (read in place, no copy).
+        Returns: (frame_count, brightness or None if no new frame yet)
+        """
+        header = self._header
+        count = int(header[HDR_COUNT])
+        if count == last_count or count == 0:
+            return last_count, None
+        view = frame_view(self._shm.buf, int(header[HDR_LATEST]), int(header[HDR_HEIGHT]), int(header[HDR_WIDTH]))
+        brightness = float(np.mean(view[::4, ::4]))
+        del view
+        return count, brightness
+
+    def health_check(self, timeout=10.0, max_frames=20, min_brightness=30):
+        """
+        Waits for the worker's frames and checks them for a closed shutter / dark camera.
+        Blocks for up to 'timeout' seconds (longer while a fresh worker is still starting):
+        call it off the UI thread (GestureEngine.check_camera).
+        """
+        deadline = time.monotonic() + timeout
+        last_count = int(self._header[HDR_COUNT])
+        frames_checked = 0
+        while frames_checked <= max_frames:
+            now = time.monotonic()
+            # A spawned worker first has to import OpenCV and open the camera
+            if now >= deadline and not (last_count == 0 and now < self._started_at + STARTUP_TIMEOUT):
+                break
+            if not self._wanted:
+                return False, self.stats.get("error", "Gesture worker stopped.")
+            last_count, brightness = self.latest_frame_brightness(last_count)
+            if brightness is None:
+                time.sleep(0.02)
+                continue
+            frames_checked += 1
+            if brightness >= min_brightness:
+                return True, "Healthy"
+        if frames_checked == 0:
+            return False, self.stats.get("error", "Camera read error.")
+        return False, "Camera too dark/closed."
+
+    def shutdown(self):
+        with self._lock:
+            self._wanted = False
+            self._stop_process_locked()
+            if self._shm is not None:
+                self._shm.close()
+                self._shm.unlink()
+                self._shm = None
+
+    # --- Internals ---
+    def _spawn_locked(self):
+        self._events = self._ctx.Queue()
+        self._stop = self._ctx.Event()
+        self._header[HDR_HEARTBEAT] = 0.0
+        self.stats.pop("error", None)
+        self.process = self._ctx.Process(
+            target=worker_main,
+            args=(self._shm.name, self._header, self._events, self._active, self._stop, self.camera_index,
+                  active_levels()),
+            name="MyDrop-GestureWorker",
+            daemon=True
+        )
+        self.process.start()
+        self._started_at = time.monotonic()
+        log.info("Gesture worker started (pid %s).", self.process.pid)
+
+    def _stop_process_locked(self):
+        if self.process is None:
+            return
+        self._stop.set()
+        self.process.join(timeout=2.0)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join(timeout=1.0)
+        self.process = None
+
+    def _watchdog_loop(self):
+        """Restarts the worker when it dies or stops sending heartbeats."""
+        while True:
+            time.sleep(0.5)
+            with self._lock:
+                if not self._wanted:
+                    return
+                if self.process is None:
+                    continue
+                heartbeat = self._header[HDR_HEARTBEAT]
+                if not self.process.is_alive():
+                    reason = f"exited with code {self.process.exitcode}"
+                elif heartbeat and time.time() - heartbeat > HEARTBEAT_TIMEOUT:
+                    reason = "stopped responding"
+                elif not heartbeat and time.monotonic() - self._started_at > STARTUP_TIMEOUT:
+                    reason = "did not start"
+                else:
+                    continue
+
+                # An error the worker reported itself (no camera...) won't fix itself by restarting
+                if "error" in self.stats:
+                    log.error("Gesture worker %s: %s", reason, self.stats["error"])
+                    self._wanted = False
+                    self._stop_process_locked()
+                    return
+
+                now = time.monotonic()
+                self._restarts = [t for t in self._restarts if now - t < RESTART_WINDOW]
+                if len(self._restarts) >= MAX_RESTARTS:
+                    log.error("Gesture worker %s. Giving up after %d restarts.", reason, MAX_RESTARTS)
+                    self._wanted = False
+                    self._stop_process_locked()
+                    self._notify("ERROR", "Gesture worker keeps crashing.")
+                    return
+
+                log.warning("Gesture worker %s. Restarting...", reason)
+                self._restarts.append(now)
+                self._stop_process_locked()
+                self._spawn_locked()
+
+    def _reader_loop(self):
+        """Forwards worker messages to on_message."""
+        while self._wanted:
+            events = self._events # Replaced on every restart
+            try:
+                kind, payload = events.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            except (EOFError, OSError, ValueError):
+                time.sleep(0.1)
+                continue
+
+            if kind == "LOG":
+                logging.getLogger(payload.name).handle(payload)
+                continue
+            if kind == "STATS":
+                self.stats.update(payload)
+            elif kind == "ERROR":
+                self.stats["error"] = payload
+            self._notify(kind, payload)
+
+    def _notify(self, kind, payload):
+        if self.on_message:
+            try:
+                self.on_message(kind, payload)
+            except Exception as e:
+                log.error("Worker message handler failed: %s", e)
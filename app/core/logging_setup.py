@@ -0,0 +1,276 @@
+"""
+=============================================================================
+MODULE: logging_setup.py
+DESCRIPTION:
+    The app's logging backend ('MyDrop_Debug.log' + terminal).
+
+    Mechanism:
+    - Callers only put records on a queue (no formatting, no file I/O), so
+      logging from the gesture and transfer loops costs next to nothing.
+      Disabled levels are skipped before a record is even created.
+    - One background writer thread formats the records and writes them in
+      batches: the file is flushed once the queue runs dry and at most every
+      FLUSH_INTERVAL seconds, immediately for warnings and errors.
+    - Size-based rotation (MyDrop_Debug.log, .1, .2, ...).
+    - Per-subsystem levels: every module logs to 'mydrop.<subsystem>'
+      (ui, net, transfer, grab, gesture, startup). Levels come from a spec
+      like "info,net=debug,gesture=warning" (--log-levels or MYDROP_LOG_LEVELS).
+    - Uncaught exceptions (main and worker threads) are logged and flushed,
+      and everything still queued is written at exit.
+    - Stray print()/stderr output (third-party libraries, tracebacks) still
+      ends up in the log.
+
+USAGE:
+    setup_logging(levels="info,net=debug")  # once, in main.py
+    log = get_logger("net")                # in each module
+    log.debug("Heard offer from %s", ip)   # args are formatted on the writer thread
+=============================================================================
+"""
+
+#import statements
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+import time
+
+LOG_FILE = "MyDrop_Debug.log"
+MAX_BYTES = 5 * 1024 * 1024
+BACKUP_COUNT = 3
+FLUSH_INTERVAL = 0.5
+DEFAULT_LEVEL = logging.INFO
+ROOT_NAME = "mydrop"
+LEVELS_ENV = "MYDROP_LOG_LEVELS"
+
+FORMAT = "%(asctime)s.%(msecs)03d %(levelname)-7s %(name)s: %(message)s"
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+_backend = None
+_active_spec = ""
+
+def get_logger(subsystem):
+    """Logger of one subsystem ('ui', 'net', 'transfer', 'grab', 'gesture', 'startup', ...)."""
+    return logging.getLogger(f"{ROOT_NAME}.{subsystem}")
+
+def parse_levels(spec):
+    """
+    "info,net=debug,gesture=warning" -> {"": INFO, "net": DEBUG, "gesture": WARNING}
+    The entry without a name is the default for every subsystem.
+    """
+    levels = {}
+    for part in (spec or "").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        name, _, level = part.rpartition("=")
+        value = logging.getLevelName(level.strip().upper())
+        if not isinstance(value, int):
+            raise ValueError(f"Unknown log level '{level}'")
+        levels[name.strip()] = value
+    return levels
+
+def apply_levels(spec):
+    """Sets the per-subsystem levels (can be called again at runtime)."""
+    global _active_spec
+    levels = parse_levels(spec)
+    logging.getLogger(ROOT_NAME).setLevel(levels.pop("", DEFAULT_LEVEL))
+    for name, level in levels.items():
+        logging.getLogger(f"{ROOT_NAME}.{name}").setLevel(level)
+    _active_spec = spec or ""
+
+def active_levels():
+    """The level spec in use (passed on to child processes)."""
+    return _active_spec
+
+class BufferedRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """RotatingFileHandler that only flushes when the writer thread says so."""
+
+    def flush(self):
+        pass # StreamHandler.emit() flushes after every record; batching happens in sync()
+
+    def sync(self):
+        with self.lock:
+            if self.stream and not self.stream.closed:
+                self.stream.flush()
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """Enqueues the record as is: message formatting happens on the writer thread."""
+
+    def prepare(self, record):
+        return record
+
+class _AsyncWriter:
+    _STOP = object()
+
+    def __init__(self, handlers):
+        self.handlers = handlers
+        self.queue = queue.SimpleQueue()
+        self.thread = threading.Thread(target=self._run, name="MyDrop-LogWriter", daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        dirty = False
+        last_flush = time.monotonic()
+        while True:
+            try:
+                item = self.queue.get(timeout=FLUSH_INTERVAL if dirty else None)
+            except queue.Empty:
+                item = None
+
+            if item is self._STOP:
+                self._flush()
+                return
+            if isinstance(item, threading.Event): # flush_logging() waiting for us
+                self._flush()
+                item.set()
+                dirty = False
+                continue
+            if item is not None:
+                self._handle(item)
+                dirty = True
+
+            # Batch: flush when idle or at most every FLUSH_INTERVAL; warnings right away
+            now = time.monotonic()
+            if dirty and (item is None or item.levelno >= logging.WARNING
+                          or (self.queue.empty() and now - last_flush >= FLUSH_INTERVAL)):
+                self._flush()
+                dirty = False
+                last_flush = now
+
+    def _handle(self, record):
+        for handler in self.handlers:
+            if record.levelno >= handler.level:
+                try:
+                    handler.handle(record)
+                except Exception:
+                    pass # Never report through logging here: stderr is captured, it would loop
+
+    def _flush(self):
+        for handler in self.handlers:
+            try:
+                if isinstance(handler, BufferedRotatingFileHandler):
+                    handler.sync()
+                else:
+                    handler.flush()
+            except Exception:
+                pass
+
+    def stop(self, timeout=2.0):
+        self.queue.put(self._STOP)
+        self.thread.join(timeout)
+
+class _StreamToLogger:
+    """File-like object that turns print()/stderr output into log records."""
+
+    def __init__(self, logger, level):
+        self.logger = logger
+        self.level = level
+        self._local = threading.local()
+
+    def write(self, message):
+        buffer = getattr(self._local, "buffer", "") + message
+        *lines, buffer = buffer.split("\n")
+        self._local.buffer = buffer
+        for line in lines:
+            if line.strip():
+                self.logger.log(self.level, line.rstrip())
+        return len(message)
+
+    def flush(self):
+        buffer = getattr(self._local, "buffer", "")
+        if buffer.strip():
+            self.logger.log(self.level, buffer.rstrip())
+        self._local.buffer = ""
+
+    def isatty(self):
+        return False
+
+def setup_logging(path=LOG_FILE, levels=None, console=True, capture_stdio=True):
+    """
+    Starts the backend. 'levels' is a spec string (see parse_levels); the
+    MYDROP_LOG_LEVELS environment variable is used when it's None.
+    """
+    global _backend
+    if _backend is not None:
+        return
+
+    formatter = logging.Formatter(FORMAT, DATE_FORMAT)
+    handlers = []
+    if path:
+        try:
+            file_handler = BufferedRotatingFileHandler(path, maxBytes=MAX_BYTES, backupCount=BACKUP_COUNT,
+                                                       encoding="utf-8", delay=True)
+            file_handler.setFormatter(formatter)
+            handlers.append(file_handler)
+        except OSError as e:
+            if sys.__stderr__ is not None:
+                sys.__stderr__.write(f"Could not open {path}: {e}\n")
+    # The terminal isn't there in the --noconsole EXE
+    if console and sys.__stdout__ is not None:
+        console_handler = logging.StreamHandler(sys.__stdout__)
+        console_handler.setFormatter(formatter)
+        handlers.append(console_handler)
+
+    try:
+        apply_levels(levels if levels is not None else os.environ.get(LEVELS_ENV, ""))
+    except ValueError as e:
+        apply_levels("")
+        if sys.__stderr__ is not None:
+            sys.__stderr__.write(f"{e}, using the default log levels.\n")
+
+    _backend = _AsyncWriter(handlers)
+    root = logging.getLogger(ROOT_NAME)
+    root.addHandler(_DeferredQueueHandler(_backend.queue))
+    root.propagate = False
+
+    if capture_stdio:
+        sys.stdout = _StreamToLogger(get_logger("stdout"), logging.INFO)
+        sys.stderr = _StreamToLogger(get_logger("stderr"), logging.WARNING)
+
+    sys.excepthook = _log_uncaught
+    threading.excepthook = _log_uncaught_thread
+    atexit.register(shutdown_logging)
+
+def shutdown_logging():
+    """Writes everything still queued. Later records go straight to the handlers."""
+    global _backend
+    backend, _backend = _backend, None
+    if backend is None:
+        return
+    backend.stop()
+
+    root = logging.getLogger(ROOT_NAME)
+    for handler in list(root.handlers):
+        if isinstance(handler, _DeferredQueueHandler):
+            root.removeHandler(handler)
+    for handler in backend.handlers:
+        if isinstance(handler, BufferedRotatingFileHandler):
+            handler.sync()
+        root.addHandler(handler)
+
+def flush_logging(timeout=2.0):
+    """Blocks until everything logged so far has been written (used on crashes)."""
+    backend = _backend
+    if backend is None or not backend.thread.is_alive():
+        return
+    done = threading.Event()
+    backend.queue.put(done) # Records are handled in order
+    done.wait(timeout)
+
+def _log_uncaught(exc_type, exc_value, exc_traceback):
+    if issubclass(exc_type, KeyboardInterrupt):
+        sys.__excepthook__(exc_type, exc_value, exc_traceback)
+        return
+    get_logger("crash").critical("Uncaught exception", exc_info=(exc_type, exc_value, exc_traceback))
+    flush_logging()
+
+def _log_uncaught_thread(args):
+    if args.exc_type is SystemExit:
+        return
+    thread_name = args.thread.name if args.thread else "unknown"
+    get_logger("crash").critical("Uncaught exception in thread %s", thread_name,
+                                 exc_info=(args.exc_type, args.exc_value, args.exc_traceback))
+    flush_logging()
@@ -0,0 +1,256 @@
+"""
+=============================================================================
+MODULE: metrics.py
+DESCRIPTION:
+    Lightweight, always-on instrumentation of the grab -> drop -> transfer pipeline.
+
+    Building Blocks:
+    - Counters / Gauges: Plain numbers ('transfer.bytes_sent', 'gesture.target_fps').
+    - Spans: Monotonic-clock (perf_counter) durations of one stage, e.g.
+      'grab.bundle' or 'transfer.accept_wait'. Every finished span goes to an
+      in-memory ring buffer and into a per-name summary (count/sum/max).
+    - observe(): Summary-only durations for per-frame paths (no ring entry).
+    - Traces: One grab -> drop -> transfer (role 'send') or offer -> accept ->
+      download (role 'receive'). Spans tagged with a role are also collected
+      into that role's current trace, so the UI can show 'Last transfer stats'.
+
+    Exposure:
+    - snapshot() (JSON-ready dict) and prometheus_text().
+    - Optional local HTTP endpoint on 127.0.0.1 (python main.py --metrics-port 9465):
+      /metrics (Prometheus text) and /metrics.json.
+
+    Overhead: a span is two perf_counter() calls, a deque append and a short
+    locked dict update; nothing is formatted until someone asks for it.
+
+USAGE:
+    with metrics.span("grab.bundle", trace="send", files=12):
+        ...
+    metrics.incr("discovery.offers_sent")
+    print(format_trace(metrics.last_trace("send")))
+=============================================================================
+"""
+
+#import statements
+import json
+import threading
+import time
+from collections import deque
+
+from app.core.logging_setup import get_logger
+
+log = get_logger("metrics")
+
+RING_SIZE = 512   # Finished spans kept in memory
+TRACE_HISTORY = 20
+
+class Span:
+    __slots__ = ("registry", "name", "trace", "attrs", "start", "duration")
+
+    def __init__(self, registry, name, trace=None, attrs=None):
+        self.registry = registry
+        self.name = name
+        self.trace = trace
+        self.attrs = attrs or {}
+        self.start = time.perf_counter()
+        self.duration = None
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def end(self, **attrs):
+        """Finishes the span (only the first call counts). Returns the duration in seconds."""
+        if self.duration is None:
+            self.duration = time.perf_counter() - self.start
+            if attrs:
+                self.attrs.update(attrs)
+            self.registry._record(self)
+        return self.duration
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.attrs.setdefault("error", exc_type.__name__)
+        self.end()
+        return False
+
+class Trace:
+    def __init__(self, trace_id, role):
+        self.id = trace_id
+        self.role = role
+        self.started_at = time.time()
+        self.start = time.perf_counter()
+        self.total = None
+        self.outcome = None
+        self.stages = []  # (name, seconds, attrs)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "role": self.role,
+            "started_at": self.started_at,
+            "total_seconds": self.total,
+            "outcome": self.outcome,
+            "stages": [{"name": n, "seconds": d, **a} for n, d, a in self.stages],
+        }
+
+class MetricsRegistry:
+    def __init__(self, ring_size=RING_SIZE):
+        self._lock = threading.Lock()
+        self.counters = {}
+        self.gauges = {}
+        self.summaries = {}   # name -> [count, sum, max]
+        self.spans = deque(maxlen=ring_size)
+        self.traces = deque(maxlen=TRACE_HISTORY)
+        self._current = {}    # role -> Trace
+        self._next_trace = 1
+
+    # --- Recording ---
+    def incr(self, name, value=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def set_gauge(self, name, value):
+        self.gauges[name] = value
+
+    def observe(self, name, seconds):
+        """Adds a duration to the summary of 'name' without keeping the individual value."""
+        with self._lock:
+            summary = self.summaries.get(name)
+            if summary is None:
+                self.summaries[name] = [1, seconds, seconds]
+            else:
+                summary[0] += 1
+                summary[1] += seconds
+                if seconds > summary[2]:
+                    summary[2] = seconds
+
+    def span(self, name, trace=None, **attrs):
+        """Starts a span. Use as a context manager or call .end() (e.g. from another thread)."""
+        return Span(self, name, trace, attrs)
+
+    def _record(self, span):
+        self.observe(span.name, span.duration)
+        self.spans.append((span.name, time.time(), span.duration, span.attrs))
+        if span.trace is not None:
+            current = self._current.get(span.trace)
+            if current is not None and current.total is None:
+                current.stages.append((span.name, span.duration, span.attrs))
+
+    # --- Traces ---
+    def begin_trace(self, role):
+        """Starts a new trace for 'send' or 'receive' (an unfinished previous one is dropped)."""
+        with self._lock:
+            trace = Trace(self._next_trace, role)
+            self._next_trace += 1
+            self._current[role] = trace
+        return trace
+
+    def end_trace(self, role, outcome):
+        """Closes the role's current trace and keeps it in the history."""
+        with self._lock:
+            trace = self._current.get(role)
+            if trace is None or trace.total is not None:
+                return None
+            trace.total = time.perf_counter() - trace.start
+            trace.outcome = outcome
+            self.traces.append(trace)
+        self.observe(f"{role}.total", trace.total)
+        return trace
+
+    def last_trace(self, role=None):
+        """The newest finished trace (of the given role), or None."""
+        for trace in reversed(self.traces):
+            if role is None or trace.role == role:
+                return trace
+        return None
+
+    # --- Export ---
+    def snapshot(self):
+        with self._lock:
+            summaries = {name: {"count": c, "sum_seconds": s, "max_seconds": m}
+                         for name, (c, s, m) in self.summaries.items()}
+            counters = dict(self.counters)
+        return {
+            "counters": counters,
+            "gauges": dict(self.gauges),
+            "spans": summaries,
+            "recent_spans": [{"name": n, "ended_at": t, "seconds": d, **a} for n, t, d, a in list(self.spans)],
+            "traces": [t.to_dict() for t in list(self.traces)],
+        }
+
+    def prometheus_text(self):
+        lines = []
+        with self._lock:
+            counters = sorted(self.counters.items())
+            summaries = sorted(self.summaries.items())
+        for name, value in counters:
+            metric = f"mydrop_{_sanitize(name)}_total"
+            lines += [f"# TYPE {metric} counter", f"{metric} {value}"]
+        for name, value in sorted(self.gauges.items()):
+            metric = f"mydrop_{_sanitize(name)}"
+            lines += [f"# TYPE {metric} gauge", f"{metric} {value}"]
+        if summaries:
+            lines.append("# TYPE mydrop_span_seconds summary")
+            for name, (count, total, _) in summaries:
+                label = f'{{span="{name}"}}'
+                lines += [f"mydrop_span_seconds_count{label} {count}",
+                          f"mydrop_span_seconds_sum{label} {total:.6f}"]
+            lines.append("# TYPE mydrop_span_seconds_max gauge")
+            for name, (_, _, maximum) in summaries:
+                lines.append(f'mydrop_span_seconds_max{{span="{name}"}} {maximum:.6f}')
+        return "\n".join(lines) + "\n"
+
+def _sanitize(name):
+    return "".join(c if c.isalnum() else "_" for c in name)
+
+def format_trace(trace):
+    """Human readable summary of one trace (tray menu)."""
+    if trace is None:
+        return "No transfer yet."
+    title = "Send" if trace.role == "send" else "Receive"
+    lines = [f"{title} ({trace.outcome}): {trace.total:.2f}s total"]
+    for name, seconds, attrs in trace.stages:
+        line = f"  {name}: {seconds * 1000:.0f} ms"
+        size = attrs.get("bytes")
+        if size and seconds > 0:
+            line += f" ({size / seconds / 1024 / 1024:.1f} MB/s)"
+        lines.append(line)
+    return "\n".join(lines)
+
+# The app-wide registry
+metrics = MetricsRegistry()
+
+def start_metrics_server(port):
+    """Serves /metrics and /metrics.json on 127.0.0.1:port (daemon thread). Returns the server or None."""
+    # Imported here: http.server is slow to import and only needed with --metrics-port
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class _MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == "/metrics":
+                body, content_type = metrics.prometheus_text().encode("utf-8"), "text/plain; version=0.0.4"
+            elif self.path == "/metrics.json":
+                body, content_type = json.dumps(metrics.snapshot()).encode("utf-8"), "application/json"
+            else:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            log.debug("HTTP %s", format % args)
+
+    try:
+        server = ThreadingHTTPServer(("127.0.0.1", port), _MetricsHandler)
+    except OSError as e:
+        log.error("Could not start the metrics endpoint on port %d: %s", port, e)
+        return None
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="MyDrop-Metrics", daemon=True).start()
+    log.info("Metrics on http://127.0.0.1:%d/metrics", port)
+    return server
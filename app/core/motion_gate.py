@@ -0,0 +1,112 @@
+"""
+=============================================================================
+MODULE: motion_gate.py
+DESCRIPTION:
+    A cheap pre-filter that decides whether a frame is worth sending to MediaPipe.
+
+    Mechanism:
+    - Samples every Nth pixel of one color channel (a strided NumPy view, no copy)
+      and compares it with the previous sample (frame differencing).
+    - Static scene: inference is skipped for that frame.
+    - No motion for 'idle_after' seconds: the gate goes IDLE and the loop polls
+      the camera at a low rate. The first moving frame wakes it up instantly.
+
+    Reporting:
+    - duty_cycle: Fraction of captured frames that actually ran inference.
+    - idle_fraction: Fraction of wall time spent in the IDLE polling mode.
+=============================================================================
+"""
+
+#import statements
+import numpy as np
+from app.core.logging_setup import get_logger
+
+log = get_logger("gesture")
+
+class MotionGate:
+    def __init__(self, step=8, pixel_threshold=25, motion_fraction=0.002,
+                 idle_after=3.0, idle_interval=0.25):
+        # Sampling / sensitivity
+        self.step = step                        # Use every Nth pixel in both directions
+        self.pixel_threshold = pixel_threshold  # Per-pixel change that counts as "moved"
+        self.motion_fraction = motion_fraction  # Share of moved pixels that counts as motion
+
+        # Idle behaviour
+        self.idle_after = idle_after        # Seconds without motion before going IDLE
+        self.idle_interval = idle_interval  # Polling interval while IDLE
+
+        self.reset()
+
+    def reset(self):
+        """Clears the reference frame and counters (e.g. when the camera restarts)."""
+        self._previous = None
+        self._last_activity = None
+        self._idle_since = None
+        self.is_idle = False
+
+        # Stats
+        self.frames_seen = 0
+        self.frames_processed = 0
+        self.idle_seconds = 0.0
+        self._started = None
+
+    def check(self, frame, now):
+        """
+        Returns True if the frame should go through inference.
+        'now' is a monotonic timestamp in seconds.
+        """
+        if self._started is None:
+            self._started = now
+            self._last_activity = now
+        self.frames_seen += 1
+
+        # Green channel carries most of the luminance; int16 avoids uint8 wrap-around
+        sample = frame[::self.step, ::self.step, 1].astype(np.int16)
+        previous, self._previous = self._previous, sample
+
+        moved = previous is None or previous.shape != sample.shape or (
+            np.count_nonzero(np.abs(sample - previous) > self.pixel_threshold)
+            > self.motion_fraction * sample.size
+        )
+
+        if moved:
+            self.mark_active(now)
+        elif not self.is_idle and now - self._last_activity >= self.idle_after:
+            self.is_idle = True
+            self._idle_since = now
+            log.info("No motion. Gesture loop idling.")
+
+        if moved:
+            self.frames_processed += 1
+        return moved
+
+    def mark_active(self, now):
+        """Keeps the gate awake (call it whenever a hand is visible)."""
+        self._last_activity = now
+        if self.is_idle:
+            self.idle_seconds += now - self._idle_since
+            self.is_idle = False
+            self._idle_since = None
+
+    def poll_interval(self, active_interval):
+        """How long the loop should wait before grabbing the next frame."""
+        return self.idle_interval if self.is_idle else active_interval
+
+    @property
+    def duty_cycle(self):
+        if not self.frames_seen:
+            return 0.0
+        return self.frames_processed / self.frames_seen
+
+    def idle_fraction(self, now):
+        if self._started is None or now <= self._started:
+            return 0.0
+        idle = self.idle_seconds
+        if self.is_idle:
+            idle += now - self._idle_since
+        return idle / (now - self._started)
+
+    def report(self, now):
+        """One-line summary for the log."""
+        return (f"Duty cycle: {self.duty_cycle:.0%} of {self.frames_seen} frames ran inference, "
+                f"idle {self.idle_fraction(now):.0%} of the time")
@@ -0,0 +1,149 @@
+"""
+=============================================================================
+MODULE: startup.py
+DESCRIPTION:
+    Helpers that keep the tray icon fast to appear.
+
+    1. BackgroundPrewarm: Imports the heavy modules (OpenCV, MediaPipe,
+       pyautogui/pywin32) and builds the hand model on a low-priority daemon
+       thread *after* the tray is up, so the first Ctrl+Alt+M doesn't pay for it.
+    2. ImportProfiler: Optional '-X importtime'-style breakdown of every module
+       imported through 'import' statements (self + cumulative time).
+       Enabled with: python main.py --profile-imports
+    3. STARTED_AT: Reference point for the 'time-to-tray' log line.
+=============================================================================
+"""
+
+#import statements
+import builtins
+import os
+import sys
+import threading
+import time
+from app.core.logging_setup import get_logger
+
+log = get_logger("startup")
+
+# Set as early as possible (main.py imports this module before anything heavy)
+STARTED_AT = time.perf_counter()
+
+def seconds_since_start():
+    return time.perf_counter() - STARTED_AT
+
+def lower_thread_priority():
+    """Best effort: makes the *calling* thread yield to the UI and hotkey threads."""
+    try:
+        if sys.platform == "win32":
+            import ctypes
+            kernel32 = ctypes.windll.kernel32
+            kernel32.SetThreadPriority(kernel32.GetCurrentThread(), -2) # THREAD_PRIORITY_LOWEST
+        elif sys.platform.startswith("linux"):
+            # On Linux every thread has its own nice value
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 10)
+    except Exception:
+        pass
+
+def _import(name):
+    """
+    Like importlib.import_module, but through builtins.__import__ (looked up per call),
+    so an installed ImportProfiler also sees the modules the prewarm thread loads.
+    """
+    builtins.__import__(name)
+    return sys.modules[name]
+
+class BackgroundPrewarm:
+    def __init__(self, modules, warmups=(), on_done=None):
+        self.modules = modules      # Module names to import
+        self.warmups = warmups      # Callables to run afterwards (e.g. build the hand model)
+        self.on_done = on_done      # Called from the prewarm thread when everything finished
+        self.timings = []           # (name, seconds)
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, name="MyDrop-Prewarm", daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        lower_thread_priority()
+        start = time.perf_counter()
+        for name in self.modules:
+            self._timed(name, _import, name)
+        for warmup in self.warmups:
+            self._timed(getattr(warmup, "__name__", repr(warmup)), warmup)
+
+        total = time.perf_counter() - start
+        summary = ", ".join(f"{name} {seconds:.2f}s" for name, seconds in self.timings)
+        log.info("Prewarm finished in %.2fs (%s)", total, summary)
+        if self.on_done:
+            self.on_done()
+
+    def _timed(self, name, func, *args):
+        start = time.perf_counter()
+        try:
+            func(*args)
+        except Exception as e:
+            # Not fatal: the feature will load (and report the error) on first use
+            log.warning("Prewarm of %s failed: %s", name, e)
+        self.timings.append((name, time.perf_counter() - start))
+
+class ImportProfiler:
+    """
+    Wraps builtins.__import__ and records how long each new module took to import.
+    Self time excludes nested imports, like 'python -X importtime'.
+    """
+
+    def __init__(self):
+        self.records = {}  # module name -> [self seconds, cumulative seconds]
+        self._local = threading.local()
+        self._original_import = None
+
+    def install(self):
+        if self._original_import is None:
+            self._original_import = builtins.__import__
+            builtins.__import__ = self._timed_import
+
+    def uninstall(self):
+        if self._original_import is not None:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+
+    def _timed_import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        original = self._original_import
+        # Fast path: already imported absolute modules cost nothing worth recording
+        if level == 0 and name in sys.modules and not fromlist:
+            return original(name, globals, locals, fromlist, level)
+
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+
+        stack.append(0.0) # Time spent in nested imports
+        start = time.perf_counter()
+        try:
+            return original(name, globals, locals, fromlist, level)
+        finally:
+            elapsed = time.perf_counter() - start
+            nested = stack.pop()
+            if stack:
+                stack[-1] += elapsed
+            if elapsed >= 0.0001:
+                full_name = self._resolve(name, globals, level)
+                record = self.records.setdefault(full_name, [0.0, 0.0])
+                record[0] += elapsed - nested
+                record[1] += elapsed
+
+    @staticmethod
+    def _resolve(name, globals, level):
+        if level == 0 or not globals:
+            return name
+        package = globals.get("__package__") or ""
+        base = package.rsplit(".", level - 1)[0] if level > 1 else package
+        return f"{base}.{name}" if name else base
+
+    def report(self, limit=30):
+        """Returns the slowest imports as an '-X importtime'-style table."""
+        rows = sorted(self.records.items(), key=lambda item: item[1][1], reverse=True)[:limit]
+        lines = ["import time:   self [ms] | cumulative [ms] | module"]
+        for name, (self_time, cumulative) in rows:
+            lines.append(f"import time: {self_time * 1000:10.1f} | {cumulative * 1000:15.1f} | {name}")
+        return "\n".join(lines)
@@ -0,0 +1,142 @@
+"""
+=============================================================================
+MODULE: discovery_service.py
+DESCRIPTION:
+    Qt-free core of "Device Discovery" using UDP Broadcasts (Port 50000).
+    Used directly by the headless CLI/daemon (app/cli.py) and wrapped by
+    DiscoveryManager (discovery.py) for the tray app.
+
+    Mechanism:
+    - Sender: Broadcasts a JSON packet ("ANNOUNCE") containing filename, size, and sender name
+      (plus optional extras such as file_count / content_bytes of a bundle).
+    - Receiver: Listens on Port 50000. When it hears an "ANNOUNCE", it validates
+      the message and calls on_offer(message, sender_ip) from the listener thread.
+
+    Key Features:
+    - Self-Echo Filtering: Uses a unique UUID to ignore its own broadcasts.
+    - Wi-Fi Targeting: Attempts to calculate the specific Broadcast IP (x.x.x.255)
+      to ensure delivery on strict routers (or a fixed 'broadcast_target').
+=============================================================================
+"""
+
+#import statements
+import socket
+import json
+import threading
+import uuid
+from app.core.logging_setup import get_logger
+from app.core.metrics import metrics
+
+log = get_logger("net")
+
+BROADCAST_PORT = 50000
+
+class DiscoveryService:
+    def __init__(self, device_name="MyDrop_User", on_offer=None, port=BROADCAST_PORT, broadcast_target=None):
+        self.device_name = device_name
+        self.instance_id = str(uuid.uuid4())
+        self.broadcast_port = port
+        self.broadcast_target = broadcast_target # None: work out the Wi-Fi broadcast address
+        self.on_offer = on_offer                 # Called from the listener thread with (message, sender_ip)
+        self.running = False
+        self.sock = None
+        self.thread = None
+
+    def get_local_broadcast_ip(self):
+        """
+        Tricks the OS into revealing the real Wi-Fi IP, then calculates
+        the broadcast address
+        """
+        if self.broadcast_target:
+            return self.broadcast_target
+        try:
+            # We don't actually send data, just connecting to Google DNS helps us
+            # find which network interface is the "Real" one (Wi-Fi).
+            s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            s.connect(("8.8.8.8", 80))
+            local_ip = s.getsockname()[0]
+            s.close()
+
+            # Assuming a standard home network (/24 subnet), broadcast ends in .255
+            # This splits "192.168.1.5", takes ["192", "168", "1"], and adds "255"
+            base_ip = local_ip.rsplit('.', 1)[0]
+            return f"{base_ip}.255"
+        except:
+            return '<broadcast>' # Fallback
+
+    def start_listening(self):
+        self.running = True
+        self.thread = threading.Thread(target=self._listen_loop, daemon=True)
+        self.thread.start()
+        log.info("Discovery Listener Started.")
+
+    def stop(self):
+        self.running = False
+        if self.sock:
+            self.sock.close()
+
+    def broadcast_offer(self, filename, filesize, extra=None):
+        """
+        Compiles metadata into JSON and blasts it to the network on Port 50000.
+        'extra' adds optional fields (older receivers simply ignore them).
+        """
+        message = {
+            "type": "ANNOUNCE",
+            "sender": self.device_name,
+            "instance_id": self.instance_id,
+            "filename": filename,
+            "filesize": filesize
+        }
+        if extra:
+            message.update(extra)
+
+        span = metrics.span("discovery.broadcast", trace="send")
+        target_ip = self.get_local_broadcast_ip()
+        log.info("Broadcasting to target: %s", target_ip)
+
+        try:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+
+            json_msg = json.dumps(message).encode('utf-8')
+            sock.sendto(json_msg, (target_ip, self.broadcast_port))
+            sock.close()
+            metrics.incr("discovery.offers_sent")
+            span.end()
+            return True
+        except Exception as e:
+            log.error("Broadcast Error: %s", e)
+            metrics.incr("discovery.broadcast_errors")
+            span.end(error=type(e).__name__)
+            return False
+
+    def _listen_loop(self):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        # CRITICAL: Allow multiple apps to listen on the same port
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+
+        try:
+            # Bind to 0.0.0.0 to hear from ALL interfaces
+            self.sock.bind(('0.0.0.0', self.broadcast_port))
+        except:
+            log.error("Could not bind port %d.", self.broadcast_port)
+            return
+
+        while self.running:
+            try:
+                data, addr = self.sock.recvfrom(4096)
+                message = json.loads(data.decode('utf-8'))
+
+                sender_id = message.get('instance_id')
+                if sender_id == self.instance_id:
+                    metrics.incr("discovery.own_echoes")
+                    continue # Ignore my own echo
+
+                if message.get('type') == "ANNOUNCE":
+                    metrics.incr("discovery.offers_received")
+                    log.debug("Heard offer from %s", addr[0])
+                    if self.on_offer:
+                        self.on_offer(message, addr[0])
+
+            except Exception as e:
+                pass
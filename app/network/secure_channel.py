@@ -0,0 +1,274 @@
+"""
+=============================================================================
+MODULE: secure_channel.py
+DESCRIPTION:
+    Authenticated encryption for the TCP transfer (optional 'encrypted' mode).
+    Qt-free; used by transfer_service.py.
+
+    Pairing:
+    - The sender creates a short pairing code (e.g. 'K7QM-3XPA') and shows it
+      to its user. The discovery announce only carries the algorithm and the
+      code's salt ("encryption" field): nothing derived from the code, so a
+      single broadcast packet can't be used to test guesses.
+    - The receiver's user types the code; both sides derive the same key
+      with scrypt(code, salt). A wrong code shows up as the first frame
+      failing authentication, before any data reaches the disk.
+    - Each connection gets its own random session salt, so the key of one
+      receiver's stream never repeats a nonce of another's.
+
+    Stream format (after the 21-byte header: magic, version, session salt):
+    - Frames of up to 1 MiB plaintext: [length:4][final:1][AES-256-GCM ciphertext + tag].
+    - Nonce = frame counter, the header and counter are authenticated, and the
+      last frame is flagged: reordered, modified or cut-off streams fail.
+
+    Pipelining:
+    - AES-GCM runs at several GB/s and releases the GIL, so frames are
+      sealed / opened on a small thread pool while the calling thread keeps
+      the socket busy (a bounded window of frames in flight, kept in order).
+    - On a single CPU the frames are sealed inline: thread handoffs would
+      only add context switches there.
+
+    Note: A short code can be brute-forced offline by someone who recorded
+    the TCP transfer itself (each guess can be checked against the first
+    frame); scrypt makes every guess expensive. Use a fresh code per send.
+=============================================================================
+"""
+
+#import statements
+import base64
+import hashlib
+import hmac
+import os
+import secrets
+import struct
+import time
+
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+
+ALGORITHM = "AES-256-GCM"
+MAGIC = b"MDE1"
+VERSION = 1
+FRAME_SIZE = 1024 * 1024     # Plaintext bytes per frame
+TAG_SIZE = 16
+SALT_SIZE = 16
+CODE_ALPHABET = "ABCDEFGHJKMNPQRSTUVWXYZ23456789" # No 0/O, 1/I/L
+CODE_LENGTH = 8              # ~40 bits, shown as XXXX-XXXX
+SCRYPT_N = 2 ** 15
+WORKERS = min(4, (os.cpu_count() or 1) - 1) # 0: no pool (one CPU does socket I/O and crypto)
+WINDOW = WORKERS + 2         # Frames in flight per stream (each holds ~2 MiB of buffers)
+
+_FRAME_HEADER = struct.Struct(">IB")
+_STREAM_HEADER_SIZE = len(MAGIC) + 1 + SALT_SIZE
+
+class PairingError(Exception):
+    """Wrong or missing pairing code, or a stream that failed authentication."""
+
+def _crypto():
+    """(AESGCM, InvalidTag). Imported on first use: plaintext transfers never load 'cryptography'."""
+    try:
+        from cryptography.exceptions import InvalidTag
+        from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+    except ImportError:
+        raise PairingError("Encryption needs the 'cryptography' package (pip install cryptography)")
+    return AESGCM, InvalidTag
+
+# --- PAIRING ---
+def generate_pairing_code():
+    code = "".join(secrets.choice(CODE_ALPHABET) for _ in range(CODE_LENGTH))
+    return f"{code[:4]}-{code[4:]}"
+
+def normalize_code(code):
+    """Case, spaces and dashes don't matter when typing the code."""
+    return "".join(ch for ch in str(code).upper() if ch.isalnum())
+
+class PairingKey:
+    """Transfer key derived from a pairing code and the offer's salt."""
+
+    def __init__(self, code, salt=None):
+        self.code = code
+        self.salt = salt or os.urandom(SALT_SIZE)
+        self.key = hashlib.scrypt(normalize_code(code).encode("utf-8"), salt=self.salt,
+                                  n=SCRYPT_N, r=8, p=1, maxmem=64 * 1024 * 1024, dklen=32)
+
+    def offer_fields(self):
+        """The announce's 'encryption' field (nothing a guess could be checked against)."""
+        return {"alg": ALGORITHM,
+                "salt": base64.b64encode(self.salt).decode("ascii")}
+
+    @classmethod
+    def from_offer(cls, code, fields):
+        """
+        Derives the key for an offer's 'encryption' field. Raises PairingError on an unsupported offer.
+        A wrong code is only detected once the transfer starts (receive_encrypted).
+        """
+        if not fields or fields.get("alg") != ALGORITHM:
+            raise PairingError(f"Unsupported encryption: {fields.get('alg') if fields else None}")
+        if not normalize_code(code):
+            raise PairingError("Empty pairing code")
+        return cls(code, base64.b64decode(fields["salt"]))
+
+    def session_cipher(self, session_salt):
+        session_key = hmac.new(self.key, b"mydrop session" + session_salt, "sha256").digest()
+        return _crypto()[0](session_key)
+
+class _InlineExecutor:
+    """ThreadPoolExecutor stand-in that runs each task right away (single CPU)."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def submit(self, fn, *args):
+        future = Future()
+        try:
+            future.set_result(fn(*args))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+def _executor(name):
+    if WORKERS:
+        return ThreadPoolExecutor(WORKERS, thread_name_prefix=name)
+    return _InlineExecutor()
+
+def _nonce(index):
+    return b"\0\0\0\0" + index.to_bytes(8, "big")
+
+def _aad(header, index):
+    return header + index.to_bytes(8, "big")
+
+def _seal(cipher, index, header, plaintext, out):
+    """Encrypts into the reusable 'out' buffer when the library can (no per-frame allocation)."""
+    if hasattr(cipher, "encrypt_into"):
+        view = memoryview(out)[:len(plaintext) + TAG_SIZE]
+        cipher.encrypt_into(_nonce(index), plaintext, _aad(header, index), view)
+        return view
+    return cipher.encrypt(_nonce(index), plaintext, _aad(header, index))
+
+def _open(cipher, index, header, ciphertext, out):
+    if hasattr(cipher, "decrypt_into"):
+        view = memoryview(out)[:len(ciphertext) - TAG_SIZE]
+        cipher.decrypt_into(_nonce(index), ciphertext, _aad(header, index), view)
+        return view
+    return cipher.decrypt(_nonce(index), ciphertext, _aad(header, index))
+
+def _recv_exact(sock, size, buffer=None):
+    buffer = buffer if buffer is not None else bytearray(size)
+    view = memoryview(buffer)[:size]
+    got = 0
+    while got < size:
+        n = sock.recv_into(view[got:])
+        if not n:
+            raise ConnectionError("Connection closed mid-stream")
+        got += n
+    return view
+
+def _slots(size):
+    # Frame buffers reused round-robin: one per frame in flight, plus the one being filled
+    return [bytearray(size) for _ in range(WINDOW + 2)]
+
+# --- SENDER ---
+def send_encrypted(sock, f, pairing, on_bytes=None):
+    """
+    Streams the open file 'f' over 'sock' as encrypted frames.
+    on_bytes(plaintext_bytes) is called after each frame went out.
+    Returns: Plaintext bytes sent.
+    """
+    session_salt = os.urandom(SALT_SIZE)
+    cipher = pairing.session_cipher(session_salt)
+    sock.sendall(MAGIC + bytes([VERSION]) + session_salt)
+
+    plain = _slots(FRAME_SIZE)
+    sealed = _slots(FRAME_SIZE + TAG_SIZE)
+
+    def seal(index, length, final):
+        slot = index % len(plain)
+        header = _FRAME_HEADER.pack(length + TAG_SIZE, final)
+        return header, _seal(cipher, index, header, memoryview(plain[slot])[:length], sealed[slot]), length
+
+    sent = 0
+    pending = deque()
+    with _executor("mydrop-seal") as pool:
+        def flush(keep):
+            nonlocal sent
+            while len(pending) > keep:
+                header, ciphertext, size = pending.popleft().result()
+                sock.sendall(header) # Two sends instead of copying a whole frame
+                sock.sendall(ciphertext)
+                sent += size
+                if on_bytes:
+                    on_bytes(sent)
+
+        index = 0
+        length = f.readinto(plain[0]) or 0
+        while True:
+            # Read one frame ahead: the last frame has to be flagged as such
+            following = (f.readinto(plain[(index + 1) % len(plain)]) or 0) if length else 0
+            final = not following
+            pending.append(pool.submit(seal, index, length, final))
+            flush(WINDOW)
+            if final:
+                break
+            length = following
+            index += 1
+        flush(0)
+    return sent
+
+# --- RECEIVER ---
+def receive_encrypted(sock, f, pairing, on_bytes=None):
+    """
+    Reads encrypted frames from 'sock' and writes the plaintext to 'f'.
+    Raises PairingError if a frame fails authentication, ConnectionError if the stream is cut short.
+    Returns: (plaintext bytes written, seconds spent writing to disk)
+    """
+    header = _recv_exact(sock, _STREAM_HEADER_SIZE)
+    if bytes(header[:len(MAGIC)]) != MAGIC:
+        raise PairingError("The sender is not encrypting this transfer")
+    if header[len(MAGIC)] != VERSION:
+        raise PairingError(f"Unsupported stream version {header[len(MAGIC)]}")
+    cipher = pairing.session_cipher(bytes(header[len(MAGIC) + 1:]))
+    invalid_tag = _crypto()[1]
+
+    received = _slots(FRAME_SIZE + TAG_SIZE)
+    plain = _slots(FRAME_SIZE)
+
+    def open_frame(index, frame_header, ciphertext):
+        try:
+            return _open(cipher, index, frame_header, ciphertext, plain[index % len(plain)])
+        except invalid_tag:
+            if index == 0:
+                raise PairingError("Wrong pairing code") # Or a tampered first frame
+            raise PairingError("Frame failed authentication (tampered stream)")
+
+    written = 0
+    disk_seconds = 0.0
+    pending = deque()
+    with _executor("mydrop-open") as pool:
+        def flush(keep):
+            nonlocal written, disk_seconds
+            while len(pending) > keep:
+                data = pending.popleft().result()
+                write_start = time.perf_counter()
+                f.write(data)
+                disk_seconds += time.perf_counter() - write_start
+                written += len(data)
+                if on_bytes:
+                    on_bytes(written)
+
+        index = 0
+        while True:
+            frame_header = bytes(_recv_exact(sock, _FRAME_HEADER.size))
+            length, final = _FRAME_HEADER.unpack(frame_header)
+            if length < TAG_SIZE or length > FRAME_SIZE + TAG_SIZE:
+                raise PairingError(f"Invalid frame length {length}")
+            ciphertext = _recv_exact(sock, length, received[index % len(received)])
+            pending.append(pool.submit(open_frame, index, frame_header, ciphertext))
+            flush(WINDOW)
+            if final:
+                break
+            index += 1
+        flush(0)
+    return written, disk_seconds
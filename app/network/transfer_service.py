@@ -0,0 +1,315 @@
+"""
+=============================================================================
+MODULE: transfer_service.py
+DESCRIPTION:
+    Qt-free core of the direct Point-to-Point file transfer (TCP, Port 50001).
+    Used directly by the headless CLI/daemon (app/cli.py) and wrapped by
+    TransferManager (transfer.py) for the tray app.
+
+    Roles:
+    - Server (Sender): Opens a socket, waits for connection, streams file data.
+      Includes a 'Kill Switch' to stop previous servers if a new gesture occurs.
+      Can serve the same file to several receivers in a row (max_receivers).
+    - Client (Receiver): Connects to the Sender's IP, downloads stream, writes to disk.
+
+    Encryption (optional, see secure_channel.py):
+    - Pass a PairingKey to start_server() / download(): the stream is sent as
+      AES-256-GCM frames, sealed and opened on worker threads while the
+      socket keeps streaming. Without one, the file goes out as plaintext.
+
+    Auto-extract (optional):
+    - With auto_extract=True, a received bundle (MyDrop_Bundle_*.zip) is never
+      saved as a ZIP: its members are unpacked to the download folder while
+      the stream arrives (see app/core/bundle_extractor.py). Each file is
+      usable as soon as its member is complete, and every byte hits the disk
+      once instead of twice (ZIP written, then read + extracted).
+
+    Events:
+    - on_progress(percent) and on_complete(message) are called from the worker
+      threads. serve() / download() can also be called directly (blocking).
+    - on_first_byte(seconds): download() start (= accept) to the first received byte.
+
+    Safety:
+    - Uses SO_REUSEADDR to prevent 'Port In Use' errors.
+    - Implements timeouts (20s) to prevent hanging if no receiver connects.
+    - The offered file name is reduced to its base name before saving.
+=============================================================================
+"""
+
+#import statements
+import socket
+import os
+import threading
+import time
+
+from pathlib import Path
+from app.core.logging_setup import get_logger
+from app.core.metrics import metrics
+from app.core.bundle_extractor import BundleExtractor, is_bundle_name
+from app.network.secure_channel import send_encrypted, receive_encrypted
+
+log = get_logger("transfer")
+
+# Configuration
+TRANSFER_PORT = 50001
+BUFFER_SIZE = 256 * 1024 # Plaintext chunk (the old 4 KB loop spent its time in per-call overhead)
+ACCEPT_TIMEOUT = 20
+DEFAULT_DOWNLOAD_DIR = Path.home() / "Downloads" / "MyDrop"
+
+class TransferService:
+    def __init__(self, on_progress=None, on_complete=None, download_dir=None,
+                 port=TRANSFER_PORT, accept_timeout=ACCEPT_TIMEOUT, auto_extract=False, on_first_byte=None):
+        self.on_progress = on_progress
+        self.on_complete = on_complete
+        self.on_first_byte = on_first_byte
+        self.download_dir = Path(download_dir) if download_dir else DEFAULT_DOWNLOAD_DIR
+        self.port = port
+        self.accept_timeout = accept_timeout
+        self.auto_extract = auto_extract # Unpack received bundles while they stream in
+        self.server_socket = None # Keep track of the socket so we can close it
+        self.is_running = False
+        self.thread = None
+        self.last_download_path = None
+        self.last_result = None       # (success, message) of the last serve()/download()
+
+    # --- SENDER LOGIC ---
+    def start_server(self, filepath, max_receivers=1, pairing=None):
+        """Starts a TCP server. Kills any existing server first.
+        Then starts a new thread to host the given file (encrypted if 'pairing' is given)."""
+
+        # 1. STOP previous server if it's running
+        self.stop_server()
+
+        # 2. Start new server thread
+        self.is_running = True
+        self.thread = threading.Thread(target=self.serve, args=(filepath, max_receivers, pairing),
+                                       daemon=True)
+        self.thread.start()
+
+    def stop_server(self):
+        """Force closes the socket to free the port."""
+        self.is_running = False
+        if self.server_socket:
+            try:
+                log.info("Stopping previous server...")
+                self.server_socket.close() # This will trigger an error in the worker thread, killing it
+                self.server_socket = None
+                time.sleep(0.1) # Give OS a moment to release port
+            except:
+                pass
+
+    def serve(self, filepath, max_receivers=1, pairing=None):
+        """
+        Blocking loop that waits for client connections and pipes file data.
+        Serves up to 'max_receivers' receivers (each accept waits up to accept_timeout).
+        With a PairingKey, every receiver gets its own encrypted stream.
+        Returns: (success, message)
+        """
+        self.is_running = True
+        log.info("Server starting for %s...", filepath)
+        senders = []
+        results = []
+        try:
+            self.server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            self.server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+
+            # --- FIX: Set Timeout (20 Seconds) ---
+            self.server_socket.settimeout(self.accept_timeout)
+
+            try:
+                self.server_socket.bind(('0.0.0.0', self.port))
+            except OSError:
+                log.info("Port busy. Waiting...")
+                time.sleep(1)
+                self.server_socket.bind(('0.0.0.0', self.port))
+
+            self.server_socket.listen(max(1, max_receivers))
+            log.info("Waiting for receiver (%ds timeout)...", self.accept_timeout)
+
+            while len(senders) < max_receivers:
+                try:
+                    # This will now crash if nobody connects in time
+                    with metrics.span("transfer.accept_wait", trace="send"):
+                        client_socket, addr = self.server_socket.accept()
+                except socket.timeout:
+                    if senders:
+                        break # Everybody who wanted the file has it (or is getting it)
+                    raise
+
+                # Reset timeout for the actual file transfer (we don't want it cutting off mid-file)
+                client_socket.settimeout(None)
+                log.info("Connected to %s", addr)
+
+                if max_receivers == 1:
+                    self._send_file(client_socket, filepath, results, pairing)
+                    senders.append(None)
+                else:
+                    sender = threading.Thread(target=self._send_file, args=(client_socket, filepath, results, pairing),
+                                              daemon=True)
+                    sender.start()
+                    senders.append(sender)
+
+            for sender in senders:
+                if sender is not None:
+                    sender.join()
+
+            failures = [error for error in results if error]
+            if max_receivers == 1 and failures:
+                raise failures[0]
+            if failures:
+                message = f"File Sent to {len(results) - len(failures)} of {len(results)} receivers"
+            elif max_receivers == 1:
+                message = "File Sent Successfully!"
+            else:
+                message = f"File Sent to {len(results)} receivers"
+            log.info("%s", message)
+            return self._complete(not failures, message)
+
+        # --- Handle Timeout ---
+
+        except socket.timeout:
+            log.warning("Timeout: No receiver connected.")
+            metrics.incr("transfer.accept_timeouts")
+            return self._complete(False, "No Receiver Found")
+
+        except OSError as e:
+            # FIX: Only stay silent if we INTENTIONALLY stopped the server.
+            if self.is_running:
+                log.error("System Error: %s", e)
+                metrics.incr("transfer.send_errors")
+                return self._complete(False, f"Error: {e}")
+            log.info("Server stopped manually.")
+            self.last_result = (False, "Stopped")
+            return self.last_result
+
+        except Exception as e:
+            log.error("Server Error: %s", e)
+            metrics.incr("transfer.send_errors")
+            return self._complete(False, f"Error: {str(e)}")
+
+        finally:
+            if self.server_socket:
+                self.server_socket.close()
+                self.server_socket = None
+
+    def _send_file(self, client_socket, filepath, results, pairing=None):
+        """Streams the file to one receiver. Appends None (ok) or the exception to 'results'."""
+        try:
+            filesize = os.path.getsize(filepath)
+            progress = self._progress_reporter(filesize)
+
+            with metrics.span("transfer.send", trace="send", encrypted=pairing is not None) as span, \
+                    open(filepath, "rb") as f:
+                if pairing is not None:
+                    sent_bytes = send_encrypted(client_socket, f, pairing, on_bytes=progress)
+                else:
+                    sent_bytes = 0
+                    while True:
+                        data = f.read(BUFFER_SIZE)
+                        if not data: break
+                        client_socket.sendall(data)
+                        sent_bytes += len(data)
+                        progress(sent_bytes)
+                span.set(bytes=sent_bytes)
+            metrics.incr("transfer.bytes_sent", sent_bytes)
+            log.info("File sent successfully.")
+            results.append(None)
+        except Exception as e:
+            log.error("Send Error: %s", e)
+            results.append(e)
+        finally:
+            client_socket.close()
+
+    # --- RECEIVER LOGIC ---
+    def start_download(self, sender_ip, filename, pairing=None):
+        self.thread = threading.Thread(target=self.download, args=(sender_ip, filename, pairing), daemon=True)
+        self.thread.start()
+
+    def download(self, sender_ip, filename, pairing=None):
+        """
+        Downloads the offered file from 'sender_ip' (blocking).
+        'pairing': the PairingKey of an encrypted offer (None: plaintext).
+        Returns: (success, message)
+        """
+        log.info("Connecting to %s...", sender_ip)
+        partial_path = None
+        first_byte_span = metrics.span("transfer.first_byte", trace="receive")
+        def first_byte(*_):
+            if first_byte_span.duration is None:
+                seconds = first_byte_span.end()
+                if self.on_first_byte:
+                    self.on_first_byte(seconds)
+        try:
+            # 1. Create the download folder if it doesn't exist
+            self.download_dir.mkdir(parents=True, exist_ok=True)
+
+            # 2. Create the full file path (never outside the download folder)
+            safe_name = os.path.basename(str(filename).replace("\\", "/")) or "MyDrop_Download"
+            save_path = self.download_dir / safe_name
+
+            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+                with metrics.span("transfer.connect", trace="receive"):
+                    s.connect((sender_ip, self.port))
+                extract = self.auto_extract and is_bundle_name(safe_name)
+                if extract:
+                    log.info("Connected! Extracting into %s", self.download_dir)
+                    sink = BundleExtractor(self.download_dir)
+                else:
+                    log.info("Connected! Saving to %s", save_path)
+                    partial_path = save_path
+                    sink = open(save_path, "wb")
+
+                with metrics.span("transfer.receive", trace="receive", encrypted=pairing is not None,
+                                  extract=extract) as span, sink as f:
+                    if pairing is not None:
+                        received, disk_seconds = receive_encrypted(s, f, pairing, on_bytes=first_byte)
+                    else:
+                        received = 0
+                        disk_seconds = 0.0
+                        while True:
+                            data = s.recv(BUFFER_SIZE)
+                            if not data: break
+                            first_byte()
+                            write_start = time.perf_counter()
+                            f.write(data)
+                            disk_seconds += time.perf_counter() - write_start
+                            received += len(data)
+                    span.set(bytes=received, disk_seconds=round(disk_seconds, 4))
+                    if extract:
+                        span.set(files=len(f.files))
+                partial_path = None
+                metrics.incr("transfer.bytes_received", received)
+
+            log.info("Download complete.")
+            # Update the notification message
+            where = "Downloads/MyDrop" if self.download_dir == DEFAULT_DOWNLOAD_DIR else str(self.download_dir)
+            if extract:
+                self.last_download_path = Path(sink.top_level)
+                return self._complete(True, f"Extracted {len(sink.files)} files to {where}")
+            self.last_download_path = save_path
+            return self._complete(True, f"Saved to {where}")
+
+        except Exception as e:
+            log.error("Client Error: %s", e)
+            metrics.incr("transfer.receive_errors")
+            if pairing is not None and partial_path is not None:
+                partial_path.unlink(missing_ok=True) # Never keep a partially verified encrypted download
+            return self._complete(False, f"Download Failed: {str(e)}")
+
+    def _progress_reporter(self, total):
+        """on_progress(percent), called only when the percentage changes."""
+        last = [-1]
+        def report(done):
+            if not self.on_progress or not total:
+                return
+            percent = int(done * 100 / total)
+            if percent != last[0]:
+                last[0] = percent
+                self.on_progress(percent)
+        return report
+
+    def _complete(self, success, message):
+        self.last_result = (success, message)
+        if self.on_complete:
+            self.on_complete(message)
+        return success, message
@@ -0,0 +1,230 @@
+"""
+=============================================================================
+MODULE: gesture_benchmark.py
+DESCRIPTION:
+    Offline replay + benchmark for the gesture pipeline. Runs headless
+    (no webcam, no Qt, no display), so it can gate regressions on CI.
+
+    Inputs (one or more clips):
+    - Video files, image directories or landmark arrays (.npy / .npz),
+      see app/core/frame_sources.py.
+    - Labels: '<clip>.labels.json' next to each clip (or --labels for a single clip):
+        {"events": [{"type": "GRAB", "frame": 42}, {"type": "DROP", "frame": 97}]}
+      'frame' marks the first frame where the new pose is fully formed.
+
+    Reports per clip and overall:
+    - Per-frame inference time (MediaPipe only) and total processing time.
+    - Throughput FPS and CPU usage (% of one core).
+    - End-to-end gesture latency (labeled frame -> event emitted).
+    - GRAB/DROP precision and recall.
+
+USAGE:
+    python -m app.tools.gesture_benchmark clips/grab_drop.mp4 clips/hand.npz
+    python -m app.tools.gesture_benchmark clip.mp4 --realtime --json results.json
+=============================================================================
+"""
+
+#import statements
+import argparse
+import json
+import os
+import sys
+import time
+import numpy as np
+
+from app.core.frame_sources import open_source
+from app.core.gesture_processor import GestureProcessor, create_hands
+
+EVENT_TYPES = ("GRAB", "DROP")
+
+def load_labels(path):
+    """Returns a list of (frame_index, event_type), or None if there is no label file."""
+    if not path or not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return sorted((int(e["frame"]), e["type"].upper()) for e in data.get("events", []))
+
+def match_events(detected, labeled, tolerance, early=3):
+    """
+    Greedy one-to-one matching of detected events to labels of the same type.
+    A detection counts if it lands within [label - early, label + tolerance] frames.
+    Returns: List of (label_frame, detected_frame, type) for the matches.
+    """
+    matches = []
+    used = set()
+    for label_frame, event_type in labeled:
+        for i, (frame, detected_type) in enumerate(detected):
+            if i in used or detected_type != event_type:
+                continue
+            if label_frame - early <= frame <= label_frame + tolerance:
+                used.add(i)
+                matches.append((label_frame, frame, event_type))
+                break
+    return matches
+
+def run_clip(spec, labels_path=None, tolerance=15, realtime=False):
+    """
+    Replays one clip through a fresh GestureProcessor and collects stats.
+    Real frames get their own Hands instance: MediaPipe's tracking state must not
+    carry over from the previous clip (built before the timing starts).
+    """
+    source = open_source(spec)
+    if not source.open():
+        raise RuntimeError(f"Could not open {spec}")
+
+    try:
+        hands = None if source.provides_landmarks else create_hands()
+    except Exception:
+        source.release()
+        raise
+    processor = GestureProcessor(hands)
+    fps = getattr(source, "fps", 30.0)
+    frame_size = getattr(source, "frame_size", None)
+
+    inference_times = []
+    process_times = {}   # frame index -> seconds spent processing it
+    detected = []        # (frame index, event)
+    frames = skipped = 0
+    next_due = 0.0
+
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    try:
+        while True:
+            success, data, timestamp = source.read()
+            if not success:
+                break
+            index = frames
+            frames += 1
+
+            # --realtime: drop the frames the live loop would have slept through
+            if realtime and timestamp < next_due:
+                skipped += 1
+                continue
+
+            start = time.perf_counter()
+            event = processor.process(data, timestamp, source.provides_landmarks, frame_size)
+            elapsed = time.perf_counter() - start
+
+            process_times[index] = elapsed
+            if processor.last_inference_time is not None:
+                inference_times.append(processor.last_inference_time)
+            if event:
+                detected.append((index, event))
+            if realtime:
+                next_due = timestamp + elapsed + processor.next_delay(elapsed)
+    except BaseException:
+        if hands is not None:
+            hands.close()
+        raise
+    finally:
+        source.release()
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+    if hands is not None:
+        hands.close() # After the timing: tearing down the graph isn't part of the clip
+
+    result = {
+        "clip": spec,
+        "frames": frames,
+        "frames_skipped": skipped,
+        "wall_seconds": wall,
+        "fps": (frames - skipped) / wall if wall > 0 else 0.0,
+        "cpu_percent": 100.0 * cpu / wall if wall > 0 else 0.0,
+        "inference_ms": summarize([t * 1000 for t in inference_times]),
+        "process_ms": summarize([t * 1000 for t in process_times.values()]),
+        "detected": [{"frame": f, "type": t} for f, t in detected],
+    }
+
+    labeled = load_labels(labels_path or os.path.splitext(spec.rstrip("/\\"))[0] + ".labels.json")
+    if labeled is not None:
+        matches = match_events(detected, labeled, tolerance)
+        # Latency = media time between label and detection + time spent on the detecting frame
+        latencies = [
+            1000 * ((d - l) / fps + process_times.get(d, 0.0))
+            for l, d, _ in matches
+        ]
+        result["latency_ms"] = summarize(latencies)
+        counts = {
+            t: {
+                "tp": sum(1 for m in matches if m[2] == t),
+                "detected": sum(1 for d in detected if d[1] == t),
+                "labeled": sum(1 for l in labeled if l[1] == t),
+            }
+            for t in EVENT_TYPES
+        }
+        result["counts"] = counts
+        result["accuracy"] = {
+            t: precision_recall(c["tp"], c["detected"], c["labeled"]) for t, c in counts.items()
+        }
+    return result
+
+def summarize(values):
+    if not values:
+        return {"count": 0}
+    arr = np.asarray(values, dtype=np.float64)
+    return {
+        "count": int(arr.size),
+        "mean": float(arr.mean()),
+        "p50": float(np.percentile(arr, 50)),
+        "p95": float(np.percentile(arr, 95)),
+        "max": float(arr.max()),
+    }
+
+def precision_recall(true_positives, detected, labeled):
+    return {
+        "precision": true_positives / detected if detected else None,
+        "recall": true_positives / labeled if labeled else None,
+    }
+
+def format_ratio(value):
+    return "  n/a" if value is None else f"{value:5.2f}"
+
+def print_result(result):
+    print(f"\n== {result['clip']} ==")
+    print(f"  frames: {result['frames']} (skipped {result['frames_skipped']})  "
+          f"fps: {result['fps']:.1f}  cpu: {result['cpu_percent']:.0f}%")
+    for key in ("inference_ms", "process_ms", "latency_ms"):
+        stats = result.get(key)
+        if stats and stats["count"]:
+            print(f"  {key:<13} mean {stats['mean']:7.2f}  p50 {stats['p50']:7.2f}  "
+                  f"p95 {stats['p95']:7.2f}  max {stats['max']:7.2f}  (n={stats['count']})")
+    for event_type, pr in result.get("accuracy", {}).items():
+        print(f"  {event_type:<4} precision {format_ratio(pr['precision'])}  recall {format_ratio(pr['recall'])}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline GestureEngine benchmark")
+    parser.add_argument("clips", nargs="+", help="Video files, image folders or .npy/.npz landmark arrays")
+    parser.add_argument("--labels", help="Label file (only with a single clip)")
+    parser.add_argument("--tolerance", type=int, default=15, help="Frames a detection may lag its label")
+    parser.add_argument("--realtime", action="store_true", help="Skip frames like the live loop's pacing would")
+    parser.add_argument("--json", help="Write the full results to this file")
+    args = parser.parse_args(argv)
+
+    if args.labels and len(args.clips) > 1:
+        parser.error("--labels can only be used with a single clip")
+
+    results = []
+    for clip in args.clips:
+        result = run_clip(clip, args.labels, args.tolerance, args.realtime)
+        print_result(result)
+        results.append(result)
+
+    # Totals across clips
+    labeled_results = [r for r in results if "counts" in r]
+    if labeled_results:
+        print("\n== Overall ==")
+        for t in EVENT_TYPES:
+            tp, det, lab = (sum(r["counts"][t][k] for r in labeled_results) for k in ("tp", "detected", "labeled"))
+            pr = precision_recall(tp, det, lab)
+            print(f"  {t:<4} precision {format_ratio(pr['precision'])}  recall {format_ratio(pr['recall'])}  "
+                  f"(tp={tp}, detected={det}, labeled={lab})")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,386 @@
+"""
+=============================================================================
+MODULE: load_simulator.py
+DESCRIPTION:
+    Multi-peer load simulator for discovery and transfer scaling. Runs N
+    virtual MyDrop peers on loopback and replays an offer/accept workload
+    through the real DiscoveryService / TransferService (headless, no Qt).
+
+    Peers:
+    - Each peer has its own DiscoveryService (own instance ID, own listener
+      on the shared discovery port) and serves its files on its own TCP
+      port (a real floor has one IP per machine; loopback has one IP, so the
+      port stands in for it). Offers are broadcast to 127.255.255.255,
+      which every listener on the port hears, like a Wi-Fi broadcast.
+    - Peers can be spread over several processes (--processes) so the
+      simulator's own GIL doesn't become the bottleneck at large N.
+
+    Workload (per step of --peers):
+    - Every peer makes offers as a Poisson process (--rate offers per peer
+      per minute), with a file size in the --size range
+      (log-uniform), addressed to --acceptors random other peers.
+    - Those peers "press accept" after a random human delay (--accept-delay)
+      and download it. Like the tray, a peer that is still serving skips
+      its next offer and a peer that is still downloading ignores new ones.
+    - Offers carry 'sim_*' fields (ignored by real MyDrop receivers).
+
+    Reports per step:
+    - Offer delivery latency (broadcast -> on_offer) and dropped offers
+      (deliveries that never arrived, plus the kernel's UDP buffer drops).
+    - Accept-to-first-byte time and transfer failures.
+    - CPU per peer (listener + offers + serving + downloading, thread CPU
+      clocks) as % of one core.
+
+USAGE:
+    python -m app.tools.load_simulator --peers 10,50,200 --duration 30
+    python -m app.tools.load_simulator --peers 200 --processes 4 --rate 6 --json floor.json
+=============================================================================
+"""
+
+#import statements
+import argparse
+import heapq
+import json
+import math
+import multiprocessing
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+from app.core.logging_setup import setup_logging
+from app.network.discovery_service import DiscoveryService
+from app.network.transfer_service import TransferService
+
+LOOPBACK_BROADCAST = "127.255.255.255"
+PAYLOAD_SIZES = 8   # Distinct payload files, shared by all peers
+
+def _thread_cpu(thread):
+    """CPU seconds of another (live) thread, or None where the OS can't tell."""
+    try:
+        return time.clock_gettime(time.pthread_getcpuclockid(thread.ident))
+    except (AttributeError, OSError, TypeError):
+        return None
+
+def _udp_receive_errors():
+    """Datagrams the kernel dropped for full receive buffers (Linux), else None."""
+    try:
+        with open("/proc/net/snmp", "r") as f:
+            rows = [line.split() for line in f if line.startswith("Udp:")]
+        return int(rows[1][rows[0].index("RcvbufErrors")])
+    except (OSError, ValueError, IndexError):
+        return None
+
+def make_payloads(directory, min_size, max_size):
+    """A few files spread log-uniformly between min_size and max_size. Returns: [(size, path)]."""
+    payloads = []
+    for i in range(PAYLOAD_SIZES):
+        fraction = i / max(1, PAYLOAD_SIZES - 1)
+        size = int(math.exp(math.log(min_size) + fraction * (math.log(max_size) - math.log(min_size))))
+        path = os.path.join(directory, f"payload_{size}.bin")
+        with open(path, "wb") as f:
+            f.write(os.urandom(size))
+        payloads.append((size, path))
+    return payloads
+
+class VirtualPeer:
+    def __init__(self, index, settings, work_dir):
+        self.index = index
+        self.name = f"peer-{index:03d}"
+        self.settings = settings
+        self.port = settings["transfer_port"] + index
+        self.download_dir = os.path.join(work_dir, self.name)
+        self.discovery = DiscoveryService(self.name, on_offer=self._on_offer,
+                                          port=settings["discovery_port"], broadcast_target=LOOPBACK_BROADCAST)
+        self.rng = random.Random(settings["seed"] * 100003 + index)
+        self.lock = threading.Lock()
+        self.serving = False
+        self.receiving = False
+        self.cpu = {"offers": 0.0, "serving": 0.0, "downloads": 0.0}
+        self.offers = []      # (offer_id, sent_at, size, targets)
+        self.deliveries = []  # (offer_id, latency seconds)
+        self.transfers = []   # {"offer_id", "ok", "first_byte", "seconds", "bytes"}
+        self.skipped = {"offers_busy": 0, "accepts_busy": 0}
+        self.threads = []     # Servers and pending accepts, joined before reporting
+
+    def start(self):
+        self.discovery.start_listening()
+
+    def listener_cpu(self):
+        return _thread_cpu(self.discovery.thread) if self.discovery.thread else None
+
+    def wait(self, deadline):
+        """Waits (until 'deadline', monotonic) for the peer's transfers to finish. Returns: True if they did."""
+        for thread in list(self.threads):
+            thread.join(max(0.0, deadline - time.monotonic()))
+        return not any(thread.is_alive() for thread in self.threads)
+
+    def stop(self):
+        self.discovery.stop()
+
+    # --- Sender side ---
+    def offer(self, offer_id, payload, targets):
+        """Called from the scheduler thread: serve first, then announce (like the tray's DROP)."""
+        with self.lock:
+            if self.serving:
+                self.skipped["offers_busy"] += 1
+                return
+            self.serving = True
+        size, path = payload
+        start_cpu = time.thread_time()
+        server = threading.Thread(target=self._serve, args=(path, len(targets)), daemon=True)
+        server.start()
+        self.threads.append(server)
+        extra = {"offer_id": offer_id, "sim_port": self.port, "sim_targets": targets,
+                 "sim_sent": time.monotonic()}
+        self.discovery.broadcast_offer(os.path.basename(path), size, extra)
+        self.offers.append((offer_id, extra["sim_sent"], size, targets))
+        self.cpu["offers"] += time.thread_time() - start_cpu
+
+    def _serve(self, path, receivers):
+        start_cpu = time.thread_time()
+        service = TransferService(port=self.port, accept_timeout=self.settings["accept_timeout"])
+        service.serve(path, max_receivers=receivers)
+        self.cpu["serving"] += time.thread_time() - start_cpu
+        with self.lock:
+            self.serving = False
+
+    # --- Receiver side ---
+    def _on_offer(self, message, sender_ip):
+        heard_at = time.monotonic()
+        if "sim_sent" not in message:
+            return # A real MyDrop offer on the same port
+        self.deliveries.append((message["offer_id"], heard_at - message["sim_sent"]))
+        if self.name not in message.get("sim_targets", ()):
+            return
+        low, high = self.settings["accept_delay"]
+        timer = threading.Timer(self.rng.uniform(low, high), self._accept, args=(message, sender_ip))
+        timer.daemon = True
+        timer.start()
+        self.threads.append(timer)
+
+    def _accept(self, message, sender_ip):
+        with self.lock:
+            if self.receiving:
+                self.skipped["accepts_busy"] += 1
+                return
+            self.receiving = True
+        start_cpu = time.thread_time()
+        result = {"offer_id": message["offer_id"], "first_byte": None}
+        service = TransferService(port=message["sim_port"], download_dir=self.download_dir,
+                                  on_first_byte=lambda seconds: result.update(first_byte=seconds))
+        started = time.perf_counter()
+        ok, _ = service.download(sender_ip, message["filename"])
+        result.update(ok=ok, seconds=time.perf_counter() - started, bytes=message.get("filesize", 0))
+        if ok:
+            os.remove(service.last_download_path)
+        self.transfers.append(result)
+        self.cpu["downloads"] += time.thread_time() - start_cpu
+        with self.lock:
+            self.receiving = False
+
+    def report(self, listener_cpu):
+        cpu = dict(self.cpu, listener=listener_cpu)
+        return {"name": self.name, "offers": self.offers, "deliveries": self.deliveries,
+                "transfers": self.transfers, "skipped": self.skipped, "cpu": cpu,
+                "unfinished": any(thread.is_alive() for thread in self.threads)}
+
+def _schedule(indices, peer_count, settings, rng):
+    """(time offset, peer index, target indices) of every offer in the step, sorted by time."""
+    schedule = []
+    per_second = settings["rate"] / 60.0
+    for index in indices:
+        t = rng.expovariate(per_second) if per_second > 0 else math.inf
+        while t < settings["duration"]:
+            others = [i for i in range(peer_count) if i != index]
+            targets = rng.sample(others, min(settings["acceptors"], len(others)))
+            schedule.append((t, index, targets))
+            t += rng.expovariate(per_second)
+    heapq.heapify(schedule)
+    return schedule
+
+def _group_process(indices, peer_count, settings, payloads, start_at, results):
+    setup_logging(None, levels=settings["log_levels"], console=True, capture_stdio=False)
+    run_group(indices, peer_count, settings, payloads, start_at, results)
+
+def run_group(indices, peer_count, settings, payloads, start_at, results):
+    """Runs the peers 'indices' of one step (in this process) and puts their reports on 'results'."""
+    work_dir = tempfile.mkdtemp(prefix="mydrop_sim_")
+    peers = {index: VirtualPeer(index, settings, work_dir) for index in indices}
+    for peer in peers.values():
+        peer.start()
+    rng = random.Random(settings["seed"] + indices[0])
+    schedule = _schedule(indices, peer_count, settings, rng)
+
+    time.sleep(max(0.0, start_at - time.monotonic()))
+    while schedule:
+        offset, index, targets = heapq.heappop(schedule)
+        time.sleep(max(0.0, start_at + offset - time.monotonic()))
+        peer = peers[index]
+        offer_id = f"{peer.name}-{len(peer.offers) + peer.skipped['offers_busy']}"
+        peer.offer(offer_id, rng.choice(payloads), [f"peer-{i:03d}" for i in targets])
+
+    # Let the last offers be heard, accepted and downloaded
+    time.sleep(max(0.0, start_at + settings["duration"] - time.monotonic()))
+    deadline = time.monotonic() + settings["drain"]
+    for peer in peers.values():
+        peer.wait(deadline)
+    reports = [peer.report(peer.listener_cpu()) for peer in peers.values()]
+    for peer in peers.values():
+        peer.stop()
+    shutil.rmtree(work_dir, ignore_errors=True)
+    results.put(reports)
+
+def _percentile(values, fraction):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+def summarize(peer_count, reports, duration, udp_drops):
+    """Aggregates the per-peer reports of one step."""
+    offers = {o[0]: o for r in reports for o in r["offers"]}
+    heard = {}
+    for r in reports:
+        for offer_id, latency in r["deliveries"]:
+            heard.setdefault(offer_id, []).append(latency)
+    latencies = [latency for offer_id in offers for latency in heard.get(offer_id, [])]
+    expected = len(offers) * (peer_count - 1)
+    delivered = sum(len(heard.get(offer_id, [])) for offer_id in offers)
+    transfers = [t for r in reports for t in r["transfers"]]
+    first_bytes = [t["first_byte"] for t in transfers if t["first_byte"] is not None]
+
+    cpu_percent = []
+    listener_known = all(r["cpu"]["listener"] is not None for r in reports)
+    for r in reports:
+        seconds = sum(v for v in r["cpu"].values() if v is not None)
+        cpu_percent.append(100.0 * seconds / duration)
+
+    def ms(value):
+        return None if value is None else round(value * 1000, 2)
+
+    return {
+        "peers": peer_count,
+        "offers": len(offers),
+        "offers_skipped_busy": sum(r["skipped"]["offers_busy"] for r in reports),
+        "expected_deliveries": expected,
+        "delivered": delivered,
+        "dropped": expected - delivered,
+        "drop_rate": (expected - delivered) / expected if expected else 0.0,
+        "udp_rcvbuf_errors": udp_drops,
+        "delivery_ms": {"p50": ms(_percentile(latencies, 0.5)), "p95": ms(_percentile(latencies, 0.95)),
+                        "max": ms(max(latencies) if latencies else None)},
+        "transfers": len(transfers),
+        "transfers_failed": sum(1 for t in transfers if not t["ok"]),
+        "accepts_skipped_busy": sum(r["skipped"]["accepts_busy"] for r in reports),
+        "peers_unfinished": sum(1 for r in reports if r["unfinished"]),
+        "first_byte_ms": {"p50": ms(_percentile(first_bytes, 0.5)), "p95": ms(_percentile(first_bytes, 0.95)),
+                          "max": ms(max(first_bytes) if first_bytes else None)},
+        "cpu_percent_per_peer": {"mean": round(statistics.mean(cpu_percent), 3) if cpu_percent else None,
+                                 "max": round(max(cpu_percent), 3) if cpu_percent else None,
+                                 "includes_listener": listener_known},
+    }
+
+def run_step(peer_count, settings, payloads, processes):
+    groups = [list(range(peer_count))[i::processes] for i in range(min(processes, peer_count))]
+    results = multiprocessing.Queue()
+    start_at = time.monotonic() + 1.0 + 0.01 * peer_count # Time for every listener to bind
+    udp_before = _udp_receive_errors()
+
+    if len(groups) == 1:
+        # One process: no spawn overhead, run the peers right here
+        worker = threading.Thread(target=run_group, args=(groups[0], peer_count, settings, payloads,
+                                                           start_at, results))
+        worker.start()
+        workers = [worker]
+    else:
+        workers = [multiprocessing.Process(target=_group_process, args=(group, peer_count, settings, payloads,
+                                                                   start_at, results))
+                   for group in groups]
+        for worker in workers:
+            worker.start()
+
+    reports = []
+    for _ in groups:
+        reports.extend(results.get())
+    for worker in workers:
+        worker.join()
+
+    udp_after = _udp_receive_errors()
+    udp_drops = udp_after - udp_before if udp_before is not None and udp_after is not None else None
+    return summarize(peer_count, reports, settings["duration"] + settings["drain"], udp_drops)
+
+def print_step(step):
+    delivery, first_byte, cpu = step["delivery_ms"], step["first_byte_ms"], step["cpu_percent_per_peer"]
+    udp = "" if step["udp_rcvbuf_errors"] is None else f" (UDP buffer drops: {step['udp_rcvbuf_errors']})"
+    print(f"N={step['peers']}: {step['offers']} offers ({step['offers_skipped_busy']} skipped, sender busy)")
+    print(f"  delivery    p50 {delivery['p50']} ms  p95 {delivery['p95']} ms  max {delivery['max']} ms")
+    print(f"  dropped     {step['dropped']} of {step['expected_deliveries']} ({step['drop_rate']:.2%}){udp}")
+    unfinished = f", {step['peers_unfinished']} peers still busy at the end" if step["peers_unfinished"] else ""
+    print(f"  transfers   {step['transfers']} ({step['transfers_failed']} failed, "
+          f"{step['accepts_skipped_busy']} accepts skipped, receiver busy{unfinished})")
+    print(f"  first byte  p50 {first_byte['p50']} ms  p95 {first_byte['p95']} ms  max {first_byte['max']} ms")
+    listener = "" if cpu["includes_listener"] else " (listener threads not measurable here)"
+    print(f"  CPU/peer    mean {cpu['mean']}%  max {cpu['max']}% of one core{listener}", flush=True)
+
+def _range(text, cast=float):
+    low, _, high = text.partition(",")
+    return cast(low), cast(high or low)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate N MyDrop peers on loopback.")
+    parser.add_argument("--peers", default="10,50,100", help="Peer counts to run, e.g. '10,50,200'.")
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds of offers per step (default 20).")
+    parser.add_argument("--drain", type=float, default=5.0, help="Extra seconds for the last transfers (default 5).")
+    parser.add_argument("--rate", type=float, default=6.0, help="Offers per peer per minute (default 6).")
+    parser.add_argument("--acceptors", type=int, default=1, help="Peers that accept each offer (default 1).")
+    parser.add_argument("--accept-delay", default="0.2,1.5", help="Human accept delay range in seconds.")
+    parser.add_argument("--size", default="64K,4M", help="File size range (K/M suffixes).")
+    parser.add_argument("--processes", type=int, default=1, help="Spread the peers over N processes.")
+    parser.add_argument("--discovery-port", type=int, default=50300, help="Shared UDP port (default 50300).")
+    parser.add_argument("--transfer-port", type=int, default=51000,
+                        help="First TCP port (peer i of a step: +i, every step gets fresh ports).")
+    parser.add_argument("--seed", type=int, default=1, help="Workload random seed.")
+    parser.add_argument("--log-levels", default="critical",
+                        help="Log levels for the peers (default critical: failures are counted, not logged).")
+    parser.add_argument("--json", default=None, help="Also write the results to this file.")
+    args = parser.parse_args(argv)
+
+    def size(text):
+        units = {"K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}
+        text = text.strip().upper()
+        return int(float(text[:-1]) * units[text[-1]]) if text[-1] in units else int(text)
+
+    min_size, max_size = _range(args.size, size)
+    accept_delay = _range(args.accept_delay)
+    settings = {
+        "duration": args.duration, "drain": args.drain, "rate": args.rate, "acceptors": args.acceptors,
+        "accept_delay": accept_delay, "discovery_port": args.discovery_port,
+        "transfer_port": args.transfer_port, "seed": args.seed, "log_levels": args.log_levels,
+        "accept_timeout": accept_delay[1] + 2.0,
+    }
+    setup_logging(None, levels=args.log_levels, console=True, capture_stdio=False)
+
+    steps = []
+    with tempfile.TemporaryDirectory(prefix="mydrop_sim_payloads_") as payload_dir:
+        payloads = make_payloads(payload_dir, min_size, max_size)
+        first_port = args.transfer_port
+        for peer_count in (int(n) for n in args.peers.split(",")):
+            # Fresh ports per step: a slow server of the previous step can't collide
+            settings["transfer_port"] = first_port
+            first_port += peer_count
+            step = run_step(peer_count, settings, payloads, args.processes)
+            print_step(step)
+            steps.append(step)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"settings": settings, "steps": steps}, f, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,116 @@
+"""
+=============================================================================
+MODULE: transfer_benchmark.py
+DESCRIPTION:
+    Loopback throughput of the TCP transfer, plaintext vs encrypted
+    (AES-256-GCM, see app/network/secure_channel.py). Headless, no Qt.
+
+    Each run serves a temporary file with TransferService from a separate
+    sender process (like a second machine would) and downloads it on
+    127.0.0.1 to a temporary folder, then checks the copy byte-for-byte.
+    Reports MB/s per mode (median of the runs) and the encrypted/plaintext
+    ratio; the pairing key is derived once, outside the timing (scrypt is
+    a one-off cost per offer, not per byte).
+
+USAGE:
+    python -m app.tools.transfer_benchmark
+    python -m app.tools.transfer_benchmark --size 512 --runs 5 --json results.json
+=============================================================================
+"""
+
+#import statements
+import argparse
+import filecmp
+import json
+import multiprocessing
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+from app.network.secure_channel import PairingKey, generate_pairing_code, WORKERS
+from app.network.transfer_service import TransferService
+
+def _wait_for_listener(service, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while service.server_socket is None and time.monotonic() < deadline:
+        time.sleep(0.005)
+    time.sleep(0.02) # bind() + listen() follow right after the socket appears
+
+def _sender_process(filepath, port, code, salt, listening, results):
+    pairing = PairingKey(code, salt) if code else None
+    sender = TransferService(port=port, accept_timeout=10)
+    server = threading.Thread(target=sender.serve, args=(filepath, 1, pairing), daemon=True)
+    server.start()
+    _wait_for_listener(sender)
+    listening.set()
+    server.join()
+    results.put(sender.last_result)
+
+def run_once(filepath, download_dir, port, pairing=None):
+    """One loopback transfer. Returns: Seconds from connect to the last byte on disk."""
+    listening = multiprocessing.Event()
+    results = multiprocessing.Queue()
+    sender = multiprocessing.Process(target=_sender_process, daemon=True, args=(
+        filepath, port, pairing.code if pairing else None, pairing.salt if pairing else None, listening, results))
+    sender.start()
+    listening.wait(30)
+    receiver = TransferService(port=port, download_dir=download_dir)
+
+    start = time.perf_counter()
+    success, message = receiver.download("127.0.0.1", os.path.basename(filepath), pairing=pairing)
+    seconds = time.perf_counter() - start
+    sent, sent_message = results.get(timeout=30)
+    sender.join()
+    if not success or not sent:
+        raise RuntimeError(f"Transfer failed: {message} / {sent_message}")
+    if not filecmp.cmp(filepath, receiver.last_download_path, shallow=False):
+        raise RuntimeError("Received file differs from the original")
+    os.remove(receiver.last_download_path)
+    return seconds
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Loopback transfer throughput, plaintext vs encrypted.")
+    parser.add_argument("--size", type=int, default=256, help="Test file size in MB (default 256).")
+    parser.add_argument("--runs", type=int, default=3, help="Runs per mode (default 3, median is reported).")
+    parser.add_argument("--port", type=int, default=50101, help="Loopback TCP port (default 50101).")
+    parser.add_argument("--json", default=None, help="Also write the results to this file.")
+    args = parser.parse_args(argv)
+
+    size = args.size * 1024 * 1024
+    pairing = PairingKey(generate_pairing_code())
+    results = {"size_bytes": size, "runs": args.runs, "workers": WORKERS, "modes": {}}
+
+    with tempfile.TemporaryDirectory(prefix="mydrop_bench_") as tmp:
+        filepath = os.path.join(tmp, "payload.bin")
+        with open(filepath, "wb") as f:
+            for _ in range(args.size):
+                f.write(os.urandom(1024 * 1024))
+        download_dir = os.path.join(tmp, "received")
+
+        # Alternate the modes so both see the same machine state
+        times = {"plaintext": [], "encrypted": []}
+        for _ in range(args.runs):
+            times["plaintext"].append(run_once(filepath, download_dir, args.port))
+            times["encrypted"].append(run_once(filepath, download_dir, args.port, pairing))
+
+    print(f"Loopback transfer of {args.size} MB, {args.runs} run(s) per mode, {WORKERS} crypto worker(s)")
+    for mode, seconds in times.items():
+        median = statistics.median(seconds)
+        mb_per_s = size / median / 1e6
+        results["modes"][mode] = {"seconds": seconds, "median_seconds": median, "mb_per_s": mb_per_s}
+        print(f"  {mode:<10} {mb_per_s:8.1f} MB/s  (median {median:.3f}s)")
+
+    ratio = results["modes"]["encrypted"]["mb_per_s"] / results["modes"]["plaintext"]["mb_per_s"]
+    results["encrypted_vs_plaintext"] = ratio
+    print(f"  encrypted / plaintext: {ratio:.1%}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,9 +1,9 @@
 """
 =============================================================================
 MODULE: overlay.py
-DESCRIPTION: 
-    A transparent, click-through window that draws a colored border around the screen.
-    
+DESCRIPTION:
+    A click-through colored border around every screen.
+
     Purpose: Provides visual feedback of the application state without obstructing work.
     - Green: Ready / Listening.
     - Cyan: File Grabbed.
@@ -12,57 +12,81 @@ DESCRIPTION:
     - Red: Error / Timeout.
     - Yellow: Incoming Offer.
 
-    Tech: Uses PyQt6 WA_TransparentForMouseEvents to ensure it doesn't block clicks.
+    Rendering:
+    - Only the border exists on screen: four thin, opaque strip windows per
+      screen (top, bottom, left, right) instead of one full-screen translucent
+      window. The compositor no longer blends a screen-sized layer, just the
+      few thousand border pixels.
+    - The strips have no paint code: Qt fills them with their background
+      color, and a color change only touches the strips when the color really
+      changed (no antialiased full-surface repaints).
+    - Follows screens being added/removed or resized.
+
+    Tech: Uses PyQt6 WindowTransparentForInput to ensure it doesn't block clicks.
 =============================================================================
 """
 
 #import statements
 from PyQt6.QtWidgets import QWidget, QApplication
-from PyQt6.QtCore import Qt, QTimer
-from PyQt6.QtGui import QPainter, QColor, QPen
+from PyQt6.QtCore import Qt, QTimer, QRect
+from PyQt6.QtGui import QColor, QPalette
+
+class _BorderStrip(QWidget):
+    """One edge of the border: a small opaque window filled with a solid color."""
 
-class OverlayWindow(QWidget):
     def __init__(self):
         super().__init__()
-        
-        # 1. Remove Title Bar and Window Frame
         self.setWindowFlags(
             Qt.WindowType.FramelessWindowHint |       # No border/title bar
             Qt.WindowType.WindowStaysOnTopHint |      # Always on top of other apps
             Qt.WindowType.Tool |                      # Don't show in taskbar
-            Qt.WindowType.WindowTransparentForInput   # CLICK THROUGH (Crucial!)
+            Qt.WindowType.WindowTransparentForInput | # CLICK THROUGH (Crucial!)
+            Qt.WindowType.WindowDoesNotAcceptFocus
         )
-        
-        # 2. Make the background transparent
-        self.setAttribute(Qt.WidgetAttribute.WA_TranslucentBackground)
-        
-        # 3. Set to Full Screen
-        screen_geometry = QApplication.primaryScreen().geometry()
-        self.setGeometry(screen_geometry)
-        
+        self.setAttribute(Qt.WidgetAttribute.WA_ShowWithoutActivating)
+        self.setAutoFillBackground(True)
+
+    def set_color(self, color):
+        palette = self.palette()
+        palette.setColor(QPalette.ColorRole.Window, color)
+        self.setPalette(palette)
+
+class OverlayWindow:
+    def __init__(self, border_width=10):
         # State
         self.border_color = QColor(0, 255, 0) # Green for "Active"
-        self.border_width = 10
-
-    def paintEvent(self, event):
-        """Draws the colored border around the screen"""
-        painter = QPainter(self)
-        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
-        
-        # Setup the Pen (The Border)
-        pen = QPen(self.border_color)
-        pen.setWidth(self.border_width)
-        painter.setPen(pen)
-        
-        # Draw the rectangle exactly around the window edges
-        # We adjust by half width to ensure it stays on screen
-        rect = self.rect().adjusted(
-            self.border_width // 2, 
-            self.border_width // 2, 
-            -self.border_width // 2, 
-            -self.border_width // 2
-        )
-        painter.drawRect(rect)
+        self.border_width = border_width
+        self._applied_color = None
+        self._visible = False
+        self._strips = []
+
+        app = QApplication.instance()
+        app.screenAdded.connect(self._on_screens_changed)
+        app.screenRemoved.connect(self._on_screens_changed)
+        self._build_strips()
+
+    # --- QWidget-like API used by the tray ---
+    def show(self):
+        self._visible = True
+        self.update()
+        for strip in self._strips:
+            strip.show()
+
+    def hide(self):
+        self._visible = False
+        for strip in self._strips:
+            strip.hide()
+
+    def isVisible(self):
+        return self._visible
+
+    def update(self):
+        """Applies 'border_color' (only touches the strips if it changed)."""
+        if self.border_color == self._applied_color:
+            return
+        self._applied_color = QColor(self.border_color)
+        for strip in self._strips:
+            strip.set_color(self._applied_color)
 
     def flash_success(self):
         """Changes color to Blue briefly (e.g., when file sent)"""
@@ -72,4 +96,42 @@ class OverlayWindow(QWidget):
 
     def reset_color(self):
         self.border_color = QColor(0, 255, 0) # Back to Green
-        self.update()
\ No newline at end of file
+        self.update()
+
+    # --- Screens ---
+    def _edge_rects(self, geometry):
+        """Top, bottom, left and right strip of one screen (sides don't overlap the corners)."""
+        w = self.border_width
+        x, y, width, height = geometry.x(), geometry.y(), geometry.width(), geometry.height()
+        return [
+            QRect(x, y, width, w),
+            QRect(x, y + height - w, width, w),
+            QRect(x, y + w, w, height - 2 * w),
+            QRect(x + width - w, y + w, w, height - 2 * w),
+        ]
+
+    def _build_strips(self):
+        for strip in self._strips:
+            strip.close()
+            strip.deleteLater()
+        self._strips = []
+        self._applied_color = None
+
+        for screen in QApplication.screens():
+            # Resolution / arrangement changes move the strips along
+            try:
+                screen.geometryChanged.connect(self._on_screens_changed, Qt.ConnectionType.UniqueConnection)
+            except TypeError:
+                pass # Already connected
+            for rect in self._edge_rects(screen.geometry()):
+                strip = _BorderStrip()
+                strip.setGeometry(rect)
+                self._strips.append(strip)
+
+        self.update()
+        if self._visible:
+            for strip in self._strips:
+                strip.show()
+
+    def _on_screens_changed(self, *args):
+        self._build_strips()
@@ -10,37 +10,62 @@ DESCRIPTION:
     - Core Logic: Gesture Engine (Camera), File Grabber (Clipboard/Zip).
     - Networking: Discovery (UDP) and Transfer (TCP).
 
+    Startup:
+    - The tray, hotkey listener and discovery come up first. OpenCV, MediaPipe
+      and the clipboard modules load lazily, warmed up by a low-priority
+      background thread once the event loop is running (see core/startup.py).
+
     State Management:
     - Idle: Waiting for user hotkey.
     - Sender Mode: Camera active, looking for 'Grab' and 'Drop' gestures.
     - Receiver Mode: Waiting for user to accept incoming file via hotkey.
-    - Busy: Currently zipping or transferring files.
+    - Busy: Currently zipping or transferring files. Zipping runs on GrabWorker's
+      pool; a DROP that arrives mid-bundle is queued until the bundle is ready.
 
 KEY METHODS:
     - handle_hotkey: The master switch for toggling modes.
     - on_gesture_event: Handles Sender logic (Grab File -> Broadcast Offer).
+    - on_grab_finished: Result of the background grab (may run a queued DROP).
     - on_offer_received: Handles Receiver logic (Incoming UDP -> Notification).
     - accept_transfer: Initiates TCP download.
+
+    Metrics:
+    - Every grab -> drop -> transfer (and offer -> accept -> download) is a
+      trace in core/metrics.py; 'Last transfer stats' in the menu shows it.
 =============================================================================
 """
 
 #import statements
-from PyQt6.QtWidgets import QSystemTrayIcon, QMenu, QApplication, QStyle
+from PyQt6.QtWidgets import QSystemTrayIcon, QMenu, QApplication, QStyle, QMessageBox, QInputDialog
 from PyQt6.QtGui import QAction, QColor
 from PyQt6.QtCore import QTimer
 import sys
 import os
 import socket
+from collections import deque
 
 from app.ui.overlay import OverlayWindow
 from app.core.input_listener import GlobalInputListener
-from app.core.gesture_engine import GestureEngine
+from app.core.grab_worker import GrabWorker
+from app.core.startup import BackgroundPrewarm, seconds_since_start
+from app.core.dir_scanner import format_size
 from app.network.discovery import DiscoveryManager
 from app.network.transfer import TransferManager
-from app.core.file_grabber import FileGrabber
+from app.network.secure_channel import PairingKey, PairingError, generate_pairing_code
+from app.core.logging_setup import get_logger
+from app.core.metrics import metrics, format_trace, start_metrics_server
+
+log = get_logger("ui")
+
+SEEN_OFFERS = 256 # Offer ids remembered (senders repeat their announce until served)
+
+# Loaded in the background after the tray is visible
+PREWARM_MODULES = ["numpy", "cv2", "app.core.gesture_engine", "app.core.file_grabber", "pyautogui"]
+if sys.platform == "win32":
+    PREWARM_MODULES += ["win32clipboard", "win32gui"]
 
 class SystemTrayApp:
-    def __init__(self):
+    def __init__(self, import_profiler=None, gesture_process=False, metrics_port=None):
         """Initializes UI components, starts background threads (Listener, Discovery), and sets up signals."""
         self.app = QApplication(sys.argv)
         self.app.setQuitOnLastWindowClosed(False)
@@ -52,13 +77,25 @@ class SystemTrayApp:
         self.tray_icon.setVisible(True)
 
         self.overlay = OverlayWindow()
-        self.engine = GestureEngine()
+        self._engine = None # Created on first use (pulls in OpenCV + MediaPipe)
+        self.import_profiler = import_profiler
+        self.gesture_process = gesture_process # Run capture + inference in a child process
 
         # Menu
         self.menu = QMenu()
         self.status_action = QAction("Status: Idle")
         self.status_action.setEnabled(False)
         self.menu.addAction(self.status_action)
+        self.stats_action = QAction("Last transfer stats")
+        self.stats_action.triggered.connect(self.show_transfer_stats)
+        self.menu.addAction(self.stats_action)
+        self.encrypt_action = QAction("Encrypt transfers")
+        self.encrypt_action.setCheckable(True)
+        self.menu.addAction(self.encrypt_action)
+        self.extract_action = QAction("Unpack received folders")
+        self.extract_action.setCheckable(True)
+        self.extract_action.setChecked(True)
+        self.menu.addAction(self.extract_action)
         self.menu.addSeparator()
         self.quit_action = QAction("Quit MyDrop")
         self.quit_action.triggered.connect(self.quit_app)
@@ -78,27 +115,101 @@ class SystemTrayApp:
         self.net_manager.offer_received.connect(self.on_offer_received)
         self.net_manager.start_listening()
 
-        self.engine.gesture_detected.connect(self.on_gesture_event)
         self.transfer_manager = TransferManager()
+        self.transfer_manager.set_auto_extract(self.extract_action.isChecked())
+        self.extract_action.toggled.connect(self.transfer_manager.set_auto_extract)
         self.transfer_manager.transfer_complete.connect(self.on_transfer_done)
+
+        # Background grab (clipboard + zip) so the GUI thread never blocks
+        self.grab_worker = GrabWorker()
+        self.grab_worker.scanned.connect(self.on_grab_scanned)
+        self.grab_worker.progress.connect(self.on_grab_progress)
+        self.grab_worker.finished.connect(self.on_grab_finished)
+        self.grab_job_id = None
+        self.pending_drop = False
+        self.grab_to_drop_span = None
+        self.drop_wait_span = None
+        self.offer_span = None
+        self.transfer_role = None # 'send' / 'receive' while a transfer runs
+
+        # Optional local endpoint (/metrics, /metrics.json)
+        self.metrics_server = start_metrics_server(metrics_port) if metrics_port else None
         
         # State
         self.current_sender_ip = None
         self.current_filename = None
+        self.current_sender_name = None
+        self.current_encryption = None # 'encryption' field of an encrypted offer
         self.current_grabbed_file = None
+        self.current_selection = None # {"file_count", "total_bytes"} of the last grab
         self.has_pending_offer = False
+        self.seen_offers = deque(maxlen=SEEN_OFFERS)
+        self.camera_check_pending = False # Sender mode requested, camera check still running
 
         self.deny_timer = QTimer()
         self.deny_timer.setSingleShot(True)
         self.deny_timer.timeout.connect(self.deny_request)
 
+        # Runs once the event loop starts, i.e. right after the tray is drawn
+        QTimer.singleShot(0, self.on_startup_finished)
+
+    @property
+    def engine(self):
+        """The GestureEngine, created (on the GUI thread) the first time it's needed."""
+        if self._engine is None:
+            from app.core.gesture_engine import GestureEngine, RemoteGestureEngine
+            self.engine = RemoteGestureEngine() if self.gesture_process else GestureEngine()
+        return self._engine
+
+    @engine.setter
+    def engine(self, engine):
+        """Swaps the engine: the old one is stopped and its signals disconnected."""
+        old = self._engine
+        if old is not None:
+            old.stop(keep_warm=False)
+            old.gesture_detected.disconnect(self.on_gesture_event)
+            old.error_occurred.disconnect(self.on_engine_error)
+            old.camera_checked.disconnect(self.on_camera_checked)
+        self._engine = engine
+        if engine is not None:
+            engine.gesture_detected.connect(self.on_gesture_event)
+            engine.error_occurred.connect(self.on_engine_error)
+            engine.camera_checked.connect(self.on_camera_checked)
+
+    def on_engine_error(self, message):
+        """The gesture loop (or worker) failed: gestures have stopped, so say so."""
+        log.warning("Gesture engine error: %s", message)
+        if self.camera_check_pending:
+            return # The running camera check reports it (on_camera_checked)
+        self.tray_icon.showMessage("Gesture Error", message, QSystemTrayIcon.MessageIcon.Warning, 3000)
+        if self.overlay.isVisible() and self.transfer_role is None:
+            self.full_shutdown()
+
+    def on_startup_finished(self):
+        log.info("Tray ready in %.2fs", seconds_since_start())
+        # With --gesture-process the model lives in the worker, not in this process
+        warmups = [] if self.gesture_process else [self._build_hand_model]
+        self.prewarm = BackgroundPrewarm(PREWARM_MODULES, warmups=warmups, on_done=self._on_prewarm_done)
+        self.prewarm.start()
+
+    @staticmethod
+    def _build_hand_model():
+        from app.core.gesture_processor import get_hands
+        get_hands()
+
+    def _on_prewarm_done(self):
+        # Called from the prewarm thread; only logging here
+        if self.import_profiler:
+            self.import_profiler.uninstall()
+            log.info("Import profile:\n%s", self.import_profiler.report())
+
     def handle_hotkey(self, key_type):
         """
         Triggered by GlobalInputListener.
         - 'TOGGLE': Starts/Stops the Sender Mode (Camera).
         - 'ACCEPT': Accepts a pending file transfer if one exists.
         """
-        print(f"[UI] Hotkey Triggered: {key_type}")
+        log.info("Hotkey Triggered: %s", key_type)
 
         # 1. HANDLE ACCEPT (Win+Alt+M)
         if key_type == "ACCEPT":
@@ -111,16 +222,28 @@ class SystemTrayApp:
 
         # 2. HANDLE TOGGLE (Ctrl+Alt+M)
         if key_type == "TOGGLE":
-            # If overlay is ON, turn it OFF
-            if self.overlay.isVisible():
+            # If overlay is ON (or about to be), turn it OFF
+            if self.overlay.isVisible() or self.camera_check_pending:
                 self.full_shutdown()
             else:
                 # If idle, turn ON Sender Mode
                 self.start_sender_mode()
 
     def start_sender_mode(self):
-        is_healthy, message = self.engine.diagnose_camera()
+        """Checks the camera in the background; on_camera_checked() continues from there."""
+        self.camera_check_pending = True
+        self.status_action.setText("Status: Checking camera...")
+        self.engine.check_camera()
+
+    def on_camera_checked(self, is_healthy, message):
+        if not self.camera_check_pending:
+            # Toggled off (or shut down) while the check ran: hand the camera back
+            if is_healthy:
+                self.engine.stop()
+            return
+        self.camera_check_pending = False
         if not is_healthy:
+            self.status_action.setText("Status: Idle")
             self.tray_icon.showMessage("Camera Error", message, QSystemTrayIcon.MessageIcon.Warning, 3000)
             return 
 
@@ -133,20 +256,37 @@ class SystemTrayApp:
     def on_offer_received(self, metadata, sender_ip):
         """
         Triggered when a valid UDP broadcast is detected.
+        - Ignores repeats of an offer already shown (the CLI re-announces every few seconds).
         - Ignores if app is busy.
         - Otherwise, shows 'Incoming File' notification and starts 20s timeout.
         """
+        # 0. REPEATED ANNOUNCE of an offer we already handled
+        offer_id = metadata.get('offer_id')
+        if offer_id and offer_id in self.seen_offers:
+            return
+
         # 1. CHECK IF BUSY
         if self.has_pending_offer or self.overlay.border_color == QColor(0, 0, 255):
-            print(f"[UI] BUSY. Ignored offer from {sender_ip}")
+            log.info("BUSY. Ignored offer from %s", sender_ip)
             return # Ignore the new guy
-        print(f"[UI] Offer from {sender_ip}")
+        log.info("Offer from %s", sender_ip)
+        if offer_id:
+            self.seen_offers.append(offer_id)
         
         self.current_sender_ip = sender_ip
         self.current_filename = metadata.get('filename')
+        self.current_encryption = metadata.get('encryption')
         sender_name = metadata.get('sender', 'Unknown User')
+        self.current_sender_name = sender_name
+        details = ""
+        if metadata.get('file_count') and metadata.get('content_bytes') is not None:
+            details = f" ({metadata['file_count']} files, {format_size(metadata['content_bytes'])})"
+        if self.current_encryption:
+            details += "\nEncrypted: you'll need the sender's pairing code"
         
         self.has_pending_offer = True
+        metrics.begin_trace("receive")
+        self.offer_span = metrics.span("receiver.offer_to_accept", trace="receive")
         
         # --- CHANGES START HERE ---
         # 1. No visual overlay (Gold removed)
@@ -154,7 +294,7 @@ class SystemTrayApp:
         
         self.tray_icon.showMessage(
             "Incoming File",
-            f"{sender_name} sends: {self.current_filename}\nPress Win+Alt+M to Download",
+            f"{sender_name} sends: {self.current_filename}{details}\nPress Win+Alt+M to Download",
             QSystemTrayIcon.MessageIcon.Information,
             5000
         )
@@ -163,9 +303,19 @@ class SystemTrayApp:
         self.deny_timer.start(20000) 
 
     def accept_transfer(self):
-        print("[UI] Accepting Transfer...")
+        log.info("Accepting Transfer...")
         self.deny_timer.stop()
         self.has_pending_offer = False
+        if self.offer_span is not None:
+            self.offer_span.end()
+            self.offer_span = None
+
+        pairing = None
+        if self.current_encryption:
+            pairing = self.ask_pairing_code()
+            if pairing is None:
+                return
+        self.transfer_role = "receive"
         
         # Only show Blue overlay when download ACTUALLY starts
         self.overlay.border_color = QColor(0, 0, 255) # Blue
@@ -174,65 +324,158 @@ class SystemTrayApp:
         self.tray_icon.showMessage("MyDrop", "Downloading...", QSystemTrayIcon.MessageIcon.NoIcon, 1000)
         
         if self.current_sender_ip and self.current_filename:
-            self.transfer_manager.start_download(self.current_sender_ip, self.current_filename)
+            self.transfer_manager.start_download(self.current_sender_ip, self.current_filename, pairing)
+
+    def ask_pairing_code(self):
+        """Asks for the code shown on the sender. Returns: PairingKey, or None (cancelled / wrong code)."""
+        code, ok = QInputDialog.getText(None, "MyDrop - Encrypted transfer",
+                                        f"Pairing code shown on {self.current_sender_name}:")
+        if not ok or not code.strip():
+            metrics.end_trace("receive", "cancelled")
+            return None
+        try:
+            return PairingKey.from_offer(code, self.current_encryption)
+        except PairingError as e:
+            log.warning("Pairing failed: %s", e)
+            self.tray_icon.showMessage("Transfer Failed", str(e), QSystemTrayIcon.MessageIcon.Warning, 3000)
+            metrics.end_trace("receive", "pairing failed")
+            return None
 
     def deny_request(self):
-        print("[UI] Request Timed Out")
+        log.info("Request Timed Out")
         self.has_pending_offer = False
+        self.offer_span = None
+        metrics.end_trace("receive", "timed out")
         # Silent failure - just reset variables, no big red flash unless you want it
         self.current_sender_ip = None
 
     def on_gesture_event(self, event_type):
         """
         The Core Logic for SENDER Mode.
-        - 'GRAB': Calls FileGrabber to zip/get files. Updates UI to Cyan.
+        - 'GRAB': Starts a background FileGrabber job (see on_grab_finished).
         - 'DROP': Starts TCP Server, Broadcasts UDP Offer, locks Camera.
         """
         # SENDER LOGIC ONLY
         if event_type == "GRAB":
             # SENDER: GRAB FILE
-            print("[UI] Sender: Attempting Smart Grab...")
+            log.info("Sender: Attempting Smart Grab...")
             
             # 1. Notify User (Processing...)
-            # We force an update so the user sees this BEFORE the zip lag happens
             self.tray_icon.showMessage("MyDrop", "Processing selection...", QSystemTrayIcon.MessageIcon.NoIcon, 1000)
-            QApplication.processEvents() # Force UI to draw the notification NOW
             
-            # 2. Perform the Grab (Zipping happens here)
-            filepath, error = FileGrabber.get_grabbed_content()
-            
-            if filepath:
-                self.current_grabbed_file = filepath
-                filename = os.path.basename(filepath)
-                
-                # Update Visuals to Success (Cyan)
-                self.overlay.border_color = QColor(0, 255, 255) 
-                self.overlay.update()
-                self.tray_icon.showMessage("MyDrop", f"Ready to Send: {filename}", QSystemTrayIcon.MessageIcon.NoIcon, 2000)
-            
-            else:
-                # Failure
-                print(f"[UI] Grab Failed: {error}")
-                self.overlay.border_color = QColor(255, 0, 0)
-                self.overlay.update()
-                self.tray_icon.showMessage("Grab Failed", error, QSystemTrayIcon.MessageIcon.Warning, 3000)
-                QTimer.singleShot(1000, self.reset_to_ready)
+            # 2. Perform the Grab in the background (Zipping happens there)
+            metrics.begin_trace("send")
+            self.grab_to_drop_span = metrics.span("gesture.grab_to_drop", trace="send")
+            self.current_grabbed_file = None
+            self.current_selection = None
+            self.pending_drop = False
+            self.grab_job_id = self.grab_worker.start()
 
         elif event_type == "DROP":
-            if self.current_grabbed_file:
+            if self.grab_to_drop_span is not None:
+                self.grab_to_drop_span.end()
+                self.grab_to_drop_span = None
+            if self.grab_worker.is_busy:
+                # Still bundling: send as soon as the bundle is ready
+                log.info("DROP queued until the bundle is ready.")
+                self.pending_drop = True
+                self.drop_wait_span = metrics.span("ui.drop_waits_for_bundle", trace="send")
                 self.overlay.border_color = QColor(200, 0, 255) # Purple
                 self.overlay.update()
-                self.transfer_manager.start_server(self.current_grabbed_file)
-                
-                filesize = os.path.getsize(self.current_grabbed_file)
-                filename = os.path.basename(self.current_grabbed_file)
-                self.net_manager.broadcast_offer(filename, filesize)
-                
-                self.tray_icon.showMessage("MyDrop", "Transferring...", QSystemTrayIcon.MessageIcon.NoIcon, 2000)
-                self.engine.stop() 
+                self.tray_icon.showMessage("MyDrop", "Preparing files, sending when ready...", QSystemTrayIcon.MessageIcon.NoIcon, 2000)
+                self.engine.stop()
+            elif self.current_grabbed_file:
+                self.send_grabbed_file()
+
+    def on_grab_scanned(self, job_id, summary):
+        """The selection was scanned: its size is known before any zipping."""
+        if job_id != self.grab_job_id:
+            return
+        self.current_selection = summary
+        if summary["file_count"] > 1:
+            self.status_action.setText(
+                f"Status: Bundling {summary['file_count']} files ({format_size(summary['total_bytes'])})...")
+
+    def on_grab_progress(self, job_id, percent):
+        if job_id == self.grab_job_id:
+            total = self.current_selection["total_bytes"] if self.current_selection else 0
+            done = f" ({format_size(total * percent // 100)} of {format_size(total)})" if total else ""
+            self.status_action.setText(f"Status: Bundling {percent}%{done}...")
+
+    def on_grab_finished(self, job_id, filepath, error):
+        """Result of the background grab. Runs a DROP that was queued meanwhile."""
+        if job_id != self.grab_job_id:
+            return # A newer grab (or a shutdown) replaced this job
+        self.grab_job_id = None
+        if self.drop_wait_span is not None:
+            self.drop_wait_span.end()
+            self.drop_wait_span = None
+
+        if filepath:
+            self.current_grabbed_file = filepath
+            filename = os.path.basename(filepath)
+            self.status_action.setText("Status: LISTENING...")
+
+            if self.pending_drop:
+                self.pending_drop = False
+                self.send_grabbed_file()
+                return
+
+            # Update Visuals to Success (Cyan)
+            self.overlay.border_color = QColor(0, 255, 255) 
+            self.overlay.update()
+            self.tray_icon.showMessage("MyDrop", f"Ready to Send: {filename}", QSystemTrayIcon.MessageIcon.NoIcon, 2000)
+        
+        else:
+            # Failure
+            log.warning("Grab Failed: %s", error)
+            self.overlay.border_color = QColor(255, 0, 0)
+            self.overlay.update()
+            self.tray_icon.showMessage("Grab Failed", error, QSystemTrayIcon.MessageIcon.Warning, 3000)
+            metrics.end_trace("send", "grab failed")
+            if self.pending_drop:
+                # The queued DROP already stopped the camera: nothing left to do
+                self.pending_drop = False
+                QTimer.singleShot(2000, self.full_shutdown)
+            else:
+                QTimer.singleShot(1000, self.reset_to_ready)
+
+    def send_grabbed_file(self):
+        """Starts the TCP server, broadcasts the offer and locks the camera."""
+        self.overlay.border_color = QColor(200, 0, 255) # Purple
+        self.overlay.update()
+        self.transfer_role = "send"
+        pairing = PairingKey(generate_pairing_code()) if self.encrypt_action.isChecked() else None
+        self.transfer_manager.start_server(self.current_grabbed_file, pairing)
+        
+        filesize = os.path.getsize(self.current_grabbed_file)
+        filename = os.path.basename(self.current_grabbed_file)
+        extra = {}
+        if self.current_selection:
+            extra = {"file_count": self.current_selection["file_count"],
+                     "content_bytes": self.current_selection["total_bytes"]}
+        if pairing:
+            extra["encryption"] = pairing.offer_fields()
+        self.net_manager.broadcast_offer(filename, filesize, extra)
+        
+        if pairing:
+            # The receiver types this code; it never goes over the network
+            self.status_action.setText(f"Status: Pairing code {pairing.code}")
+            self.tray_icon.showMessage("MyDrop", f"Transferring... Pairing code: {pairing.code}",
+                                       QSystemTrayIcon.MessageIcon.NoIcon, 20000)
+        else:
+            self.tray_icon.showMessage("MyDrop", "Transferring...", QSystemTrayIcon.MessageIcon.NoIcon, 2000)
+        self.engine.stop() 
 
     def on_transfer_done(self, message):
-        print(f"[UI] Transfer Done Signal Received: {message}") # Debug Print
+        log.info("Transfer Done Signal Received: %s", message)
+        # "Download Failed: Wrong pairing code" etc. count as failures too
+        failed = any(word in message for word in ("No Receiver Found", "Error", "Failed"))
+        if self.transfer_role:
+            trace = metrics.end_trace(self.transfer_role, "failed" if failed else "ok")
+            self.transfer_role = None
+            if trace is not None:
+                log.info("Transfer stats:\n%s", format_trace(trace))
 
         # Default to Success (Green)
         title = "Transfer Successful"
@@ -240,7 +483,7 @@ class SystemTrayApp:
         icon = QSystemTrayIcon.MessageIcon.Information
         
         # Check for Failure
-        if "No Receiver Found" in message or "Error" in message:
+        if failed:
             title = "Transfer Failed"
             color = QColor(255, 0, 0) # Red
             icon = QSystemTrayIcon.MessageIcon.Warning
@@ -253,9 +496,21 @@ class SystemTrayApp:
         # Shutdown after 2 seconds
         QTimer.singleShot(2000, self.full_shutdown)
 
+    def show_transfer_stats(self):
+        """'Last transfer stats' menu entry: stage timings of the newest send and receive."""
+        text = "\n\n".join(format_trace(metrics.last_trace(role)) for role in ("send", "receive")
+                           if metrics.last_trace(role) is not None) or "No transfer yet."
+        QMessageBox.information(None, "MyDrop - Last transfer stats", text)
+
     def full_shutdown(self):
         self.overlay.hide()
-        self.engine.stop()
+        self.camera_check_pending = False
+        self.grab_worker.cancel()
+        self.grab_job_id = None
+        self.pending_drop = False
+        self.grab_to_drop_span = self.drop_wait_span = None
+        if self._engine:
+            self._engine.stop()
         self.has_pending_offer = False
         self.status_action.setText("Status: Idle")
 
@@ -265,9 +520,13 @@ class SystemTrayApp:
             self.overlay.update()
 
     def quit_app(self):
-        self.engine.stop()
+        if self._engine:
+            self._engine.stop(keep_warm=False)
+        self.grab_worker.shutdown()
         self.listener.stop()
         self.net_manager.stop()
+        if self.metrics_server:
+            self.metrics_server.shutdown()
         self.app.quit()
 
     def run(self):
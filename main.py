@@ -7,14 +7,22 @@ DESCRIPTION:
     
     Responsibilities:
     1. Environment Setup: Suppresses unnecessary MediaPipe/TensorFlow warnings.
-    2. Logger Initialization: Redirects stdout/stderr to a local log file 
-       ('MyDrop_Debug.log') to ensure debugging is possible even when 
-       running as a compiled --noconsole EXE.
+       Heavy modules (OpenCV, MediaPipe) are NOT imported here; they load in the
+       background after the tray is up.
+    2. Logger Initialization: Starts the buffered, rotating log backend
+       ('MyDrop_Debug.log', see app/core/logging_setup.py) to ensure debugging
+       is possible even when running as a compiled --noconsole EXE.
     3. Application Bootstrap: Instantiates the Qt Application and the 
        SystemTrayApp controller.
 
 USAGE:
     Run directly via Python: `python main.py`
+    Import-time breakdown:   `python main.py --profile-imports`
+    Out-of-process gestures: `python main.py --gesture-process`
+    Log levels per subsystem: `python main.py --log-levels info,net=debug`
+    Local metrics endpoint:   `python main.py --metrics-port 9465`
+    Headless send/receive:    `python main.py send <paths>` / `python main.py receive --auto-accept`
+                              (see app/cli.py; no Qt, camera or clipboard needed)
     Or build into EXE using PyInstaller.
 =============================================================================
 """
@@ -23,49 +31,70 @@ USAGE:
 import sys
 import os
 import warnings
+import multiprocessing
+
+# Starts the 'time-to-tray' clock (tiny module, stdlib only)
+from app.core.startup import ImportProfiler
+from app.core.logging_setup import setup_logging, get_logger, LOG_FILE
 
 # 1. Suppress the MediaPipe Protobuf Warning
 os.environ['TF_CPP_MIN_LOG_LEVEL'] = '2'
 warnings.filterwarnings('ignore', category=UserWarning, module='google.protobuf')
 
-# 2. Redirect Prints to Log File (The "Black Box")
-# This ensures that when you run the EXE, you still have a record of what happened.
-class Logger(object):
-    """
-    A custom output stream that writes to both the terminal (if available)
-    and a persistent log file. Critical for debugging 'frozen' EXE apps.
-    """
-    def __init__(self):
-        self.terminal = sys.stdout
-        # Create log file in the same folder as the app
-        self.log = open("MyDrop_Debug.log", "a", encoding="utf-8")
+# 2. Optional import-time profile (printed once the background prewarm is done)
+import_profiler = None
+if "--profile-imports" in sys.argv:
+    sys.argv.remove("--profile-imports")
+    import_profiler = ImportProfiler()
+    import_profiler.install()
 
-    def write(self, message):
-        # Write to terminal (if visible)
-        if self.terminal:
-            self.terminal.write(message)
-        # Write to file
-        try:
-            self.log.write(message)
-            self.log.flush() # Ensure it saves immediately
-        except:
-            pass
+if __name__ == "__main__":
+    # Needed for the --gesture-process worker in the frozen EXE
+    multiprocessing.freeze_support()
 
-    def flush(self):
-        pass
+    # Headless mode (python main.py send/receive/daemon): no Qt, camera or clipboard
+    if len(sys.argv) > 1 and sys.argv[1] in ("send", "receive", "daemon"):
+        from app.cli import main as cli_main
+        sys.exit(cli_main(sys.argv[1:]))
 
-# Activate Logger
-sys.stdout = Logger()
-sys.stderr = Logger()
+    # 3. Logging backend (The "Black Box")
+    # This ensures that when you run the EXE, you still have a record of what happened.
+    # Buffered + written by a background thread, rotated by size; stray prints land there too.
+    # (Set up here, after freeze_support: gesture workers send their logs to this process.)
+    log_levels = None
+    if "--log-levels" in sys.argv:
+        index = sys.argv.index("--log-levels")
+        log_levels = sys.argv[index + 1] if index + 1 < len(sys.argv) else ""
+        del sys.argv[index:index + 2]
+    setup_logging(LOG_FILE, levels=log_levels)
+    log = get_logger("main")
 
-# 3. Import UI
-from app.ui.tray_icon import SystemTrayApp
+    gesture_process = "--gesture-process" in sys.argv
+    if gesture_process:
+        sys.argv.remove("--gesture-process")
 
-if __name__ == "__main__":
-    print("\n--- NEW SESSION STARTED ---")
+    metrics_port = None
+    if "--metrics-port" in sys.argv:
+        index = sys.argv.index("--metrics-port")
+        value = sys.argv[index + 1] if index + 1 < len(sys.argv) else ""
+        del sys.argv[index:index + 2]
+        # A typo must not keep the tray from starting: run without the endpoint instead
+        try:
+            metrics_port = int(value)
+            if not 0 < metrics_port < 65536:
+                raise ValueError
+        except ValueError:
+            metrics_port = None
+            log.warning("Invalid --metrics-port '%s', metrics endpoint disabled.", value)
+
+    # 4. Import UI (inside the guard, so spawned worker processes never load Qt)
+    from app.ui.tray_icon import SystemTrayApp
+
+    log.info("--- NEW SESSION STARTED ---")
     try:
-        tray = SystemTrayApp()
+        tray = SystemTrayApp(import_profiler=import_profiler, gesture_process=gesture_process,
+                             metrics_port=metrics_port)
         tray.run()
     except Exception as e:
         # If the app crashes completely, this catches it in the log
-        print(f"CRITICAL CRASH: {e}")
\ No newline at end of file
+        log.critical("CRITICAL CRASH: %s", e, exc_info=True)
\ No newline at end of file
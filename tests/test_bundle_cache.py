@@ -0,0 +1,71 @@
+"""
+=============================================================================
+MODULE: test_bundle_cache.py
+DESCRIPTION:
+    Incremental BundleCache rebuilds: unchanged members are carried over from
+    the previous ZIP (raw copy, or the ZipFile.open() fallback on Python
+    versions whose zipfile internals weren't checked), changed ones are
+    compressed again, and the result reads back with the standard zipfile
+    module.
+
+USAGE:
+    python -m pytest tests/test_bundle_cache.py
+=============================================================================
+"""
+
+#import statements
+import os
+import zipfile
+
+import pytest
+
+from app.core import bundle_cache
+from app.core.bundle_cache import BundleCache
+
+def write(path, data):
+    with open(path, "wb") as f:
+        f.write(data)
+
+def touch_later(path):
+    """Makes the change visible even on file systems with coarse mtimes."""
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 10))
+
+def read_bundle(zip_path):
+    with zipfile.ZipFile(zip_path) as zf:
+        assert zf.testzip() is None
+        return {info.filename: zf.read(info) for info in zf.infolist()}
+
+@pytest.fixture
+def folder(tmp_path):
+    root = tmp_path / "photos"
+    root.mkdir()
+    write(root / "a.txt", b"unchanged " * 10000)
+    write(root / "b.bin", os.urandom(50000))
+    write(root / "c.txt", b"old")
+    return root
+
+@pytest.mark.parametrize("raw_copy", [True, False])
+def test_incremental_rebuild(tmp_path, folder, monkeypatch, raw_copy):
+    if not raw_copy:
+        monkeypatch.setattr(bundle_cache, "RAW_COPY_MAX_PYTHON", (3, 0))
+    used = []
+    for name in ("_copy_raw_member", "_recompress_member"):
+        original = getattr(bundle_cache, name)
+        monkeypatch.setattr(bundle_cache, name,
+                            lambda *args, name=name, original=original: (used.append(name), original(*args)))
+    cache = BundleCache(cache_dir=str(tmp_path / "cache"))
+    first = cache.get_bundle([str(folder)])
+    assert cache.get_bundle([str(folder)]) == first # Nothing changed: cache hit
+
+    write(folder / "c.txt", b"new contents")
+    touch_later(folder / "c.txt")
+    second = cache.get_bundle([str(folder)])
+
+    assert second != first
+    contents = read_bundle(second)
+    assert sorted(contents) == ["photos/a.txt", "photos/b.bin", "photos/c.txt"]
+    assert contents["photos/a.txt"] == b"unchanged " * 10000
+    assert contents["photos/b.bin"] == (folder / "b.bin").read_bytes()
+    assert contents["photos/c.txt"] == b"new contents"
+    assert set(used) == {"_copy_raw_member" if raw_copy else "_recompress_member"}
@@ -0,0 +1,143 @@
+"""
+=============================================================================
+MODULE: test_bundle_extractor.py
+DESCRIPTION:
+    BundleExtractor fed with archives built by the standard zipfile module,
+    once byte by byte and once in large chunks (the two extremes of how a
+    socket hands the stream over).
+
+USAGE:
+    python -m pytest tests/test_bundle_extractor.py
+=============================================================================
+"""
+
+#import statements
+import io
+import os
+import zipfile
+
+import pytest
+
+from app.core.bundle_extractor import BundleExtractor
+
+CHUNKS = [1, 1024 * 1024]
+
+class _Unseekable(io.RawIOBase):
+    """Write-only stream: makes zipfile emit data descriptors, like a socket would."""
+
+    def __init__(self):
+        self.buffer = bytearray()
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.buffer += data
+        return len(data)
+
+def build_zip(members, compression=zipfile.ZIP_DEFLATED, seekable=True, force_zip64=False):
+    """members: [(name, bytes)]. Returns the archive bytes."""
+    target = io.BytesIO() if seekable else _Unseekable()
+    with zipfile.ZipFile(target, "w", compression) as zf:
+        for name, data in members:
+            info = zipfile.ZipInfo(name)
+            info.compress_type = compression
+            with zf.open(info, "w", force_zip64=force_zip64) as member:
+                member.write(data)
+    return target.getvalue() if seekable else bytes(target.buffer)
+
+def extract(data, target_dir, chunk):
+    sink = BundleExtractor(target_dir)
+    with sink:
+        for i in range(0, len(data), chunk):
+            sink.write(data[i:i + chunk])
+    return sink
+
+def read(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+PAYLOAD = os.urandom(3000) + b"compressible " * 5000
+
+@pytest.mark.parametrize("chunk", CHUNKS)
+@pytest.mark.parametrize("compression", [zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED])
+def test_extracts_members(tmp_path, chunk, compression):
+    members = [("folder/a.bin", PAYLOAD), ("folder/sub/b.txt", b"hello")]
+    sink = extract(build_zip(members, compression), tmp_path, chunk)
+
+    assert sink.files == [str(tmp_path / "folder" / "a.bin"), str(tmp_path / "folder" / "sub" / "b.txt")]
+    assert read(sink.files[0]) == PAYLOAD
+    assert read(sink.files[1]) == b"hello"
+    assert sink.bytes_written == len(PAYLOAD) + 5
+    assert sink.top_level == str(tmp_path / "folder")
+
+@pytest.mark.parametrize("chunk", CHUNKS)
+def test_data_descriptor(tmp_path, chunk):
+    data = build_zip([("a.bin", PAYLOAD), ("b.bin", b"x" * 100)], seekable=False)
+    sink = extract(data, tmp_path, chunk)
+
+    assert read(tmp_path / "a.bin") == PAYLOAD
+    assert read(tmp_path / "b.bin") == b"x" * 100
+    assert len(sink.files) == 2
+
+@pytest.mark.parametrize("chunk", CHUNKS)
+@pytest.mark.parametrize("seekable", [True, False])
+def test_zip64(tmp_path, chunk, seekable):
+    data = build_zip([("big.bin", PAYLOAD)], seekable=seekable, force_zip64=True)
+    extract(data, tmp_path, chunk)
+
+    assert read(tmp_path / "big.bin") == PAYLOAD
+
+@pytest.mark.parametrize("chunk", CHUNKS)
+def test_empty_member_and_folder(tmp_path, chunk):
+    data = build_zip([("empty.txt", b""), ("dir/", b""), ("dir/after.txt", b"after")])
+    sink = extract(data, tmp_path, chunk)
+
+    assert read(tmp_path / "empty.txt") == b""
+    assert (tmp_path / "dir").is_dir()
+    assert read(tmp_path / "dir" / "after.txt") == b"after"
+    assert len(sink.files) == 2
+
+@pytest.mark.parametrize("chunk", CHUNKS)
+def test_unsafe_names_are_skipped(tmp_path, chunk):
+    target = tmp_path / "target"
+    members = [("../escape.txt", b"evil"), ("/abs.txt", b"evil"), ("a/../../up.txt", b"evil"),
+               ("C:/drive.txt", b"evil"), ("ok.txt", b"fine")]
+    sink = extract(build_zip(members), target, chunk)
+
+    assert sink.skipped == ["../escape.txt", "/abs.txt", "a/../../up.txt", "C:/drive.txt"]
+    assert sink.files == [str(target / "ok.txt")]
+    assert sorted(os.listdir(tmp_path)) == ["target"]
+    assert os.listdir(target) == ["ok.txt"]
+
+@pytest.mark.parametrize("chunk", CHUNKS)
+def test_truncated_stream(tmp_path, chunk):
+    data = build_zip([("first.txt", b"complete"), ("second.bin", PAYLOAD)])
+    cut = data.index(b"second.bin") + 100 # Partway into the second member's data
+
+    with pytest.raises(zipfile.BadZipFile):
+        extract(data[:cut], tmp_path, chunk)
+    # The finished member stays, the broken one leaves no file (not even a .part)
+    assert os.listdir(tmp_path) == ["first.txt"]
+
+@pytest.mark.parametrize("chunk", CHUNKS)
+def test_corrupt_data(tmp_path, chunk):
+    data = bytearray(build_zip([("a.bin", PAYLOAD)], zipfile.ZIP_STORED))
+    data[data.index(b"a.bin") + 10] ^= 0xFF
+
+    with pytest.raises(zipfile.BadZipFile):
+        extract(bytes(data), tmp_path, chunk)
+    assert os.listdir(tmp_path) == []
+
+@pytest.mark.parametrize("chunk", CHUNKS)
+def test_stored_member_without_sizes(tmp_path, chunk):
+    # Rejected while parsing the name, before the member's output exists
+    data = build_zip([("a.bin", PAYLOAD)], zipfile.ZIP_STORED, seekable=False)
+
+    with pytest.raises(zipfile.BadZipFile):
+        extract(data, tmp_path, chunk)
+    assert os.listdir(tmp_path) == []
+
+def test_not_a_zip(tmp_path):
+    with pytest.raises(zipfile.BadZipFile):
+        extract(b"definitely not a zip archive", tmp_path, 1024)
@@ -0,0 +1,147 @@
+"""
+=============================================================================
+MODULE: test_gesture_classifier.py
+DESCRIPTION:
+    GestureClassifier / GestureEdgeDetector on synthetic landmark arrays:
+    hands whose fingers are bent by a known curl, so the expected state of
+    every frame is known exactly (no camera, no MediaPipe).
+
+USAGE:
+    python -m pytest tests/test_gesture_classifier.py
+=============================================================================
+"""
+
+#import statements
+import numpy as np
+import pytest
+
+from app.core.gesture_classifier import (
+    FINGER_CHAINS, FIST_CURL, FULL_CURL, OPEN_CURL,
+    GestureClassifier, GestureEdgeDetector, classify_sequence, finger_curl, fist_score,
+)
+
+def _rotate(vector, axis, angle):
+    """Rodrigues rotation of 'vector' around the unit 'axis'."""
+    return (vector * np.cos(angle) + np.cross(axis, vector) * np.sin(angle)
+            + axis * np.dot(axis, vector) * (1 - np.cos(angle)))
+
+def hand(curl, rotation=None):
+    """
+    (21, 3) landmarks of a hand whose 4 long fingers all have the given curl
+    (0 = straight, 1 = fully folded), spread like a real palm.
+    'rotation': optional 3x3 matrix applied to the whole hand.
+    """
+    points = np.zeros((21, 3), dtype=np.float64)
+    bend = curl * FULL_CURL / 3 # Split evenly over MCP, PIP and DIP
+    for spread, chain in zip((-0.3, -0.1, 0.1, 0.3), FINGER_CHAINS):
+        direction = np.array([spread, 1.0, 0.0])
+        direction /= np.linalg.norm(direction)
+        axis = np.cross(direction, [0.0, 0.0, 1.0])
+        axis /= np.linalg.norm(axis)
+        position = direction.copy() # Wrist -> MCP
+        points[chain[1]] = position
+        for joint in chain[2:]:
+            direction = _rotate(direction, axis, bend)
+            position = position + 0.4 * direction
+            points[joint] = position
+    if rotation is not None:
+        points = points @ rotation.T
+    return points.astype(np.float32)
+
+OPEN = hand(0.0)
+FIST = hand(1.0)
+
+def score_to_curl(score):
+    """Curl whose fist_score is 'score' (inverse of the linear ramp)."""
+    return OPEN_CURL + score * (FIST_CURL - OPEN_CURL)
+
+# --- Features ---
+def test_curl_of_straight_and_folded_fingers():
+    assert finger_curl(OPEN) == pytest.approx([0.0] * 4, abs=1e-3)
+    assert finger_curl(FIST) == pytest.approx([1.0] * 4, abs=1e-3)
+    assert finger_curl(hand(0.5)) == pytest.approx([0.5] * 4, abs=1e-3)
+
+def test_fist_score_thresholds():
+    assert fist_score(OPEN) == 0.0
+    assert fist_score(hand(OPEN_CURL - 0.02)) == 0.0 # Clearly open
+    assert fist_score(hand(FIST_CURL + 0.02)) == 1.0 # Clearly closed
+    assert fist_score(FIST) == 1.0
+    assert fist_score(hand(score_to_curl(0.5))) == pytest.approx(0.5, abs=1e-3)
+
+def test_rotation_invariance():
+    angle = np.radians(70)
+    rotation = np.array([[np.cos(angle), -np.sin(angle), 0.0],
+                         [np.sin(angle), np.cos(angle), 0.0],
+                         [0.0, 0.0, 1.0]])
+    for curl in (0.0, 0.4, 1.0):
+        assert finger_curl(hand(curl, rotation)) == pytest.approx(finger_curl(hand(curl)), abs=1e-3)
+
+def test_batches():
+    batch = np.stack([OPEN, FIST, hand(0.5)])
+    assert finger_curl(batch).shape == (3, 4)
+    assert fist_score(batch) == pytest.approx([0.0, 1.0, fist_score(hand(0.5))], abs=1e-6)
+
+# --- Smoothing / hysteresis ---
+def test_states():
+    classifier = GestureClassifier()
+    assert classifier.state == "UNKNOWN"
+    assert classifier.update(OPEN)[0] == "OPEN"
+    for _ in range(3):
+        state, confidence = classifier.update(FIST)
+    assert state == "FIST"
+    assert confidence == pytest.approx(1.0)
+
+@pytest.mark.parametrize("start", [OPEN, FIST])
+def test_hysteresis_band_keeps_state(start):
+    classifier = GestureClassifier()
+    for _ in range(3):
+        expected, _ = classifier.update(start)
+
+    # Scores hovering around the middle of the band never flip the state
+    for score in (0.45, 0.55, 0.4, 0.6, 0.5, 0.45, 0.55):
+        assert classifier.update(hand(score_to_curl(score)))[0] == expected
+
+def test_single_noisy_frame_does_not_flip():
+    classifier = GestureClassifier()
+    states = [classifier.update(points)[0] for points in (OPEN, OPEN, OPEN, FIST, OPEN, OPEN)]
+    assert states == ["OPEN"] * 6
+
+# --- Events ---
+def test_grab_then_drop():
+    frames = [OPEN] * 5 + [FIST] * 5 + [OPEN] * 5
+    assert classify_sequence(frames) == [(6, "GRAB"), (11, "DROP")]
+
+def test_fist_without_open_first_is_no_grab():
+    # The hand enters the frame already closed: no OPEN -> FIST edge
+    assert classify_sequence([FIST] * 5 + [OPEN] * 5) == []
+
+def test_edge_detector():
+    edges = GestureEdgeDetector()
+    assert [edges.feed(state) for state in ("OPEN", "FIST", "FIST", "UNKNOWN", "OPEN", "OPEN")] == \
+        [None, "GRAB", None, None, "DROP", None]
+    assert edges.feed("FIST") == "GRAB"
+    edges.reset()
+    assert edges.feed("OPEN") is None # No DROP without a GRAB
+
+# --- Missing / occluded landmarks ---
+def test_lost_hand_keeps_state_and_clears_window():
+    classifier = GestureClassifier()
+    for _ in range(3):
+        classifier.update(FIST)
+    assert classifier.update(None) == ("FIST", 0.0)
+
+    # Old FIST scores are gone: one open frame after the gap is enough to reopen
+    assert classifier.update(OPEN)[0] == "OPEN"
+
+def test_occluded_frames_in_a_sequence():
+    missing = np.full((21, 3), np.nan, dtype=np.float32) # How recordings store "no hand"
+    partial = OPEN.copy()
+    partial[8] = np.nan                                  # One fingertip occluded
+    frames = [OPEN] * 3 + [missing, partial] + [FIST] * 3 + [None] * 4 + [OPEN] * 3
+    # Each gap empties the window, so the first clean frame after it decides on its own
+    assert classify_sequence(frames) == [(5, "GRAB"), (12, "DROP")]
+
+def test_recorded_array_input():
+    frames = np.stack([OPEN] * 4 + [FIST] * 4 + [OPEN] * 4)
+    frames[5] = np.nan
+    assert classify_sequence(frames) == [(6, "GRAB"), (9, "DROP")]